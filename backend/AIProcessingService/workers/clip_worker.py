@@ -14,6 +14,7 @@ import io
 import json
 import logging
 import os
+import time
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
@@ -23,6 +24,8 @@ import numpy as np
 import torch
 from PIL import Image
 
+from worker_metrics import TraceContext, WorkerMetrics
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,6 +41,8 @@ DEVICE = os.getenv("DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
 
 API_CALLBACK_URL = os.getenv("API_CALLBACK_URL", "http://aiprocessingservice:8080")
 
+metrics = WorkerMetrics("clip")
+
 
 @dataclass
 class ClassificationMessage:
@@ -119,7 +124,8 @@ class CLIPProcessor:
         self.device = device
         self.model = None
         self.preprocess = None
-        self._load_model(model_name)
+        with metrics.model_load("clip"):
+            self._load_model(model_name)
 
     def _load_model(self, model_name: str):
         """Load CLIP model"""
@@ -258,9 +264,15 @@ class CLIPWorker:
 
     async def process_message(self, message: aio_pika.IncomingMessage):
         """Process classification message"""
-        async with message.process():
+        start_time = time.time()
+        data = {}
+        trace = TraceContext.from_message(message)
+
+        async with message.process(), metrics.in_flight():
             try:
                 data = json.loads(message.body.decode())
+                trace = TraceContext.from_message(message, data)
+                metrics.record_queue_lag(message, data)
 
                 # MassTransit sends extra envelope fields - extract only what we need
                 expected_fields = {"job_id", "vehicle_id", "image_url"}
@@ -273,13 +285,15 @@ class CLIPWorker:
 
                 msg = ClassificationMessage(**filtered_data)
 
-                logger.info(f"Classifying image for job {msg.job_id}")
+                logger.info(f"Classifying image for job {msg.job_id} (trace {trace.trace_id})")
 
                 # Download image
-                image = await self.download_image(msg.image_url)
+                with metrics.stage("download"):
+                    image = await self.download_image(msg.image_url)
 
                 # Classify
-                result = self.processor.classify_vehicle_image(image)
+                with metrics.stage("clip_classify"):
+                    result = self.processor.classify_vehicle_image(image)
 
                 # Report result
                 classification_result = ClassificationResult(
@@ -295,19 +309,22 @@ class CLIPWorker:
                     all_predictions=result,
                 )
 
-                await self._report_result(classification_result)
+                metrics.record_job(True, time.time() - start_time)
+                await self._report_result(classification_result, trace)
 
                 logger.info(f"Job {msg.job_id} classified: {result['image_type']} ({result['angle']})")
 
             except Exception as e:
                 logger.error(f"Error classifying: {e}")
 
+                metrics.record_job(False, time.time() - start_time)
                 await self._report_result(
-                    ClassificationResult(job_id=data.get("job_id", "unknown"), success=False, error_message=str(e))
+                    ClassificationResult(job_id=data.get("job_id", "unknown"), success=False, error_message=str(e)),
+                    trace,
                 )
 
-    async def _report_result(self, result: ClassificationResult):
-        """Report result back to API"""
+    async def _report_result(self, result: ClassificationResult, trace: Optional[TraceContext] = None):
+        """Report result back to API, propagating the job's traceparent"""
         try:
             async with httpx.AsyncClient() as client:
                 await client.post(
@@ -325,6 +342,7 @@ class CLIPWorker:
                         "all_predictions": result.all_predictions,
                         "error_message": result.error_message,
                     },
+                    headers=trace.headers() if trace else None,
                     timeout=30,
                 )
         except Exception as e:
@@ -346,6 +364,7 @@ async def main():
     logger.info(f"Device: {DEVICE}")
     logger.info(f"Model: {MODEL_NAME}")
 
+    metrics.serve()
     worker = CLIPWorker()
     await worker.run()
 
@@ -0,0 +1,147 @@
+"""
+Responsive Variants Module - Multi-width WEBP/AVIF renditions of processed images
+Used by the SAM2 worker after background removal/replacement
+
+Features:
+- One pass over the already-decoded result: widths are produced largest to
+  smallest, each resized from the previous one (no re-decode, no upscaling)
+- Every (width, format) encode runs in a thread pool (Pillow releases the GIL
+  while encoding), starting as soon as its width is ready
+- AVIF is skipped with a warning when Pillow was built without libavif
+- srcset strings per format for the callback metadata
+
+Author: OKLA Team
+"""
+
+import asyncio
+import io
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from PIL import Image, features
+
+logger = logging.getLogger(__name__)
+
+# ========== Configuration ==========
+VARIANT_WIDTHS = [int(w) for w in os.getenv("VARIANT_WIDTHS", "320,640,1024,1600").split(",") if w.strip()]
+VARIANT_FORMATS = [f.strip().upper() for f in os.getenv("VARIANT_FORMATS", "WEBP,AVIF").split(",") if f.strip()]
+VARIANT_QUALITY = {
+    "WEBP": int(os.getenv("VARIANT_WEBP_QUALITY", "80")),
+    "AVIF": int(os.getenv("VARIANT_AVIF_QUALITY", "60")),
+    "JPEG": int(os.getenv("VARIANT_JPEG_QUALITY", "82")),
+}
+VARIANT_ENCODE_WORKERS = int(os.getenv("VARIANT_ENCODE_WORKERS", str(min(8, os.cpu_count() or 2))))
+
+CONTENT_TYPES = {"WEBP": "image/webp", "AVIF": "image/avif", "JPEG": "image/jpeg", "PNG": "image/png"}
+EXTENSIONS = {"WEBP": "webp", "AVIF": "avif", "JPEG": "jpg", "PNG": "png"}
+
+
+@dataclass
+class Variant:
+    """One encoded rendition of an image"""
+
+    width: int
+    height: int
+    format: str
+    data: bytes
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES[self.format]
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self.format]
+
+    def key(self, base_key: str) -> str:
+        return f"{base_key}_w{self.width}"
+
+
+def supported_formats(formats: Sequence[str]) -> List[str]:
+    """Drop formats this Pillow build can't encode"""
+    available = []
+    for fmt in formats:
+        if fmt == "AVIF" and not features.check("avif"):
+            logger.warning("Pillow built without AVIF support, skipping AVIF variants")
+            continue
+        if fmt == "WEBP" and not features.check("webp"):
+            logger.warning("Pillow built without WEBP support, skipping WEBP variants")
+            continue
+        if fmt not in CONTENT_TYPES:
+            logger.warning(f"Unknown variant format {fmt}, skipping")
+            continue
+        available.append(fmt)
+    return available
+
+
+class ResponsiveVariantGenerator:
+    """Resize once per width, encode every format in parallel"""
+
+    def __init__(
+        self,
+        widths: Sequence[int] = VARIANT_WIDTHS,
+        formats: Sequence[str] = VARIANT_FORMATS,
+        quality: Optional[Dict[str, int]] = None,
+        max_workers: int = VARIANT_ENCODE_WORKERS,
+    ):
+        self.widths = sorted({w for w in widths if w > 0}, reverse=True)
+        self.formats = supported_formats(formats)
+        self.quality = {**VARIANT_QUALITY, **(quality or {})}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="variant-encode")
+
+    def target_widths(self, source_width: int) -> List[int]:
+        """Requested widths below the source width, plus the source width itself (never upscale)"""
+        widths = [w for w in self.widths if w < source_width]
+        if not self.widths or source_width <= self.widths[0]:
+            widths.insert(0, source_width)
+        return widths
+
+    def generate(self, image: Union[Image.Image, np.ndarray]) -> List[Variant]:
+        """All variants, largest first"""
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        futures: List[Future] = []
+        current = image
+        for width in self.target_widths(image.width):
+            if width != current.width:
+                height = max(1, round(current.height * width / current.width))
+                # Cascade: each width comes from the previous (larger) one, not the original
+                current = current.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+            for fmt in self.formats:
+                futures.append(self.executor.submit(self._encode, current, fmt))
+        return [f.result() for f in futures]
+
+    async def agenerate(self, image: Union[Image.Image, np.ndarray]) -> List[Variant]:
+        """generate() off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, image)
+
+    def _encode(self, image: Image.Image, fmt: str) -> Variant:
+        if fmt == "JPEG" and image.mode == "RGBA":
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        save_kwargs = {"format": fmt}
+        if fmt in self.quality:
+            save_kwargs["quality"] = self.quality[fmt]
+        if fmt == "WEBP":
+            save_kwargs["method"] = 4
+        image.save(buffer, **save_kwargs)
+        return Variant(image.width, image.height, fmt, buffer.getvalue())
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def srcset(variants: Sequence[dict]) -> Dict[str, str]:
+    """{"webp": "url 1600w, url 1024w, ..."} from uploaded variant metadata"""
+    by_format: Dict[str, List[str]] = {}
+    for v in variants:
+        by_format.setdefault(v["format"].lower(), []).append(f"{v['url']} {v['width']}w")
+    return {fmt: ", ".join(entries) for fmt, entries in by_format.items()}
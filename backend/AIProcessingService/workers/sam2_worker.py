@@ -7,6 +7,7 @@ Features:
 - Background removal (transparent PNG)
 - Background replacement with presets
 - Shadow generation
+- Responsive WEBP/AVIF variants (multiple widths) for listing pages
 - Batch processing support
 """
 
@@ -17,7 +18,7 @@ import logging
 import os
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 import aio_pika
 import httpx
@@ -27,6 +28,8 @@ from PIL import Image
 
 # Import mask refinement module
 from mask_refinement import AlphaMatting, MaskRefinement
+from responsive_variants import ResponsiveVariantGenerator, Variant, srcset
+from worker_metrics import TraceContext, WorkerMetrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,7 +45,8 @@ class VehicleDetector:
     def __init__(self, device: str = "cpu"):
         self.device = device
         self.model = None
-        self._load_model()
+        with metrics.model_load("yolov8n"):
+            self._load_model()
 
     def _load_model(self):
         """Load YOLO model for vehicle detection"""
@@ -148,6 +152,12 @@ DEVICE = os.getenv("DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
 
 API_CALLBACK_URL = os.getenv("API_CALLBACK_URL", "http://aiprocessingservice:8080")
 
+# Responsive variants (widths/formats/quality configured in responsive_variants.py)
+RESPONSIVE_VARIANTS = os.getenv("RESPONSIVE_VARIANTS", "true").lower() == "true"
+VARIANT_UPLOAD_CONCURRENCY = int(os.getenv("VARIANT_UPLOAD_CONCURRENCY", "8"))
+
+metrics = WorkerMetrics("sam2")
+
 
 class ProcessingType(Enum):
     SEGMENTATION = "Segmentation"
@@ -194,7 +204,8 @@ class SAM2Processor:
             enable_antialiasing=True,
         )
         self.alpha_matter = AlphaMatting(feather_radius=5)
-        self._load_model(model_path)
+        with metrics.model_load("sam2"):
+            self._load_model(model_path)
 
     def _load_model(self, model_path: str):
         """Load SAM2 model"""
@@ -286,12 +297,14 @@ class SAM2Processor:
             return mask, 0.95
 
         # Set image for predictor
-        self.predictor.set_image(image)
+        with metrics.stage("set_image"):
+            self.predictor.set_image(image)
 
         # IMPROVED: Use YOLO to detect vehicle bounding box if no prompts provided
         if point_coords is None and box is None:
             logger.info("No prompts provided, using YOLO to detect vehicle bounding box...")
-            detected_box = self.vehicle_detector.detect_vehicle(image)
+            with metrics.stage("yolo_detect"):
+                detected_box = self.vehicle_detector.detect_vehicle(image)
 
             if detected_box is not None:
                 # Add padding to bounding box for better segmentation
@@ -322,16 +335,17 @@ class SAM2Processor:
                 point_labels = np.array([1, 1, 1, 1, 1])  # All foreground
 
         # Initial prediction
-        if box is not None:
-            logger.info(f"Running SAM2 with bounding box prompt: {box}")
-            masks, scores, _ = self.predictor.predict(
-                point_coords=None, point_labels=None, box=box, multimask_output=True
-            )
-        else:
-            logger.info(f"Running SAM2 with {len(point_coords)} point prompts")
-            masks, scores, _ = self.predictor.predict(
-                point_coords=point_coords, point_labels=point_labels, box=None, multimask_output=True
-            )
+        with metrics.stage("sam2_predict"):
+            if box is not None:
+                logger.info(f"Running SAM2 with bounding box prompt: {box}")
+                masks, scores, _ = self.predictor.predict(
+                    point_coords=None, point_labels=None, box=box, multimask_output=True
+                )
+            else:
+                logger.info(f"Running SAM2 with {len(point_coords)} point prompts")
+                masks, scores, _ = self.predictor.predict(
+                    point_coords=point_coords, point_labels=point_labels, box=None, multimask_output=True
+                )
 
         # Select best mask
         best_idx = np.argmax(scores)
@@ -364,13 +378,14 @@ class SAM2Processor:
                 # Use current mask's bbox as box prompt too
                 mask_bbox = np.array([min_x, min_y, max_x, max_y])
 
-                masks, scores, _ = self.predictor.predict(
-                    point_coords=refinement_points,
-                    point_labels=refinement_labels,
-                    box=mask_bbox,
-                    multimask_output=True,
-                    mask_input=best_mask[None, :, :].astype(np.float32),  # Use previous mask as input
-                )
+                with metrics.stage("sam2_iteration"):
+                    masks, scores, _ = self.predictor.predict(
+                        point_coords=refinement_points,
+                        point_labels=refinement_labels,
+                        box=mask_bbox,
+                        multimask_output=True,
+                        mask_input=best_mask[None, :, :].astype(np.float32),  # Use previous mask as input
+                    )
 
                 new_best_idx = np.argmax(scores)
                 if scores[new_best_idx] > confidence:
@@ -388,9 +403,10 @@ class SAM2Processor:
         # Apply mask refinement (post-processing)
         if refine_mask:
             logger.info("Applying mask refinement...")
-            mask_uint8, metadata = self.mask_refiner.refine_mask(
-                mask_uint8, image=image, bbox=detected_box if detected_box is not None else box
-            )
+            with metrics.stage("mask_refinement"):
+                mask_uint8, metadata = self.mask_refiner.refine_mask(
+                    mask_uint8, image=image, bbox=detected_box if detected_box is not None else box
+                )
             logger.info(f"Refinement: {metadata['refinement_applied']}")
 
         return mask_uint8, confidence
@@ -417,15 +433,16 @@ class SAM2Processor:
             PIL Image in RGB mode with colored background
         """
         if use_alpha_matte:
-            # Create smooth alpha matte for professional edges
-            alpha = self.alpha_matter.create_alpha_matte(mask, image)
+            with metrics.stage("alpha_matting"):
+                # Create smooth alpha matte for professional edges
+                alpha = self.alpha_matter.create_alpha_matte(mask, image)
 
-            # Create solid color background
-            h, w = image.shape[:2]
-            background = np.full((h, w, 3), background_color, dtype=np.uint8)
+                # Create solid color background
+                h, w = image.shape[:2]
+                background = np.full((h, w, 3), background_color, dtype=np.uint8)
 
-            # Alpha composite
-            result = self.alpha_matter.apply_alpha_composite(image, background, alpha)
+                # Alpha composite
+                result = self.alpha_matter.apply_alpha_composite(image, background, alpha)
 
             # Count affected pixels for logging
             alpha_binary = alpha > 127
@@ -478,14 +495,16 @@ class SAM2Processor:
 
         # Create shadow if requested
         if shadow_intensity > 0:
-            shadow = self._create_shadow(mask, shadow_intensity, shadow_offset)
-            # Apply shadow to background
-            background_resized = self._apply_shadow(background_resized, shadow)
+            with metrics.stage("shadow"):
+                shadow = self._create_shadow(mask, shadow_intensity, shadow_offset)
+                # Apply shadow to background
+                background_resized = self._apply_shadow(background_resized, shadow)
 
         if use_alpha_matte:
             # Create smooth alpha matte for professional blending
-            alpha = self.alpha_matter.create_alpha_matte(mask, image)
-            result = self.alpha_matter.apply_alpha_composite(image, background_resized, alpha)
+            with metrics.stage("alpha_matting"):
+                alpha = self.alpha_matter.create_alpha_matte(mask, image)
+                result = self.alpha_matter.apply_alpha_composite(image, background_resized, alpha)
         else:
             # Legacy hard-edge composite
             mask_normalized = mask.astype(np.float32) / 255.0
@@ -562,53 +581,109 @@ class MediaServiceClient:
         if format in ["WEBP", "JPEG"]:
             save_kwargs["quality"] = quality
 
-        image.save(buffer, **save_kwargs)
-        buffer.seek(0)
+        with metrics.stage(f"encode_{format.lower()}"):
+            image.save(buffer, **save_kwargs)
 
         # Determine content type and extension
         content_type = {"WEBP": "image/webp", "PNG": "image/png", "JPEG": "image/jpeg"}.get(format, "image/webp")
         ext = {"WEBP": "webp", "PNG": "png", "JPEG": "jpg"}.get(format, "webp")
         filename = f"{key.replace('/', '_')}.{ext}"
 
+        return await self.upload_bytes(buffer.getvalue(), filename, content_type, entity_type=entity_type)
+
+    async def upload_bytes(
+        self,
+        content: bytes,
+        filename: str,
+        content_type: str,
+        entity_type: str = "Vehicle",
+        client: Optional[httpx.AsyncClient] = None,
+        local_fallback: bool = True,
+    ) -> str:
+        """Upload already-encoded bytes via MediaService (or local storage) and return public URL
+
+        With local_fallback=False a failed MediaService upload raises instead of
+        returning a file:// URL that only exists inside this container.
+        """
         # Use local storage for development
         if self.use_local_storage:
-            local_file = os.path.join(self.local_path, filename)
-            with open(local_file, "wb") as f:
-                buffer.seek(0)
-                f.write(buffer.read())
-            # Return URL that AIProcessingService can serve
             local_url = f"http://aiprocessingservice:8080/api/aiprocessing/images/{filename}"
+            local_file = self._save_local(content, filename)
             logger.info(f"Saved image locally: {local_file} -> {local_url}")
             return local_url
 
         # Try to upload via MediaService
         try:
-            async with httpx.AsyncClient(timeout=120) as client:
-                files = {"file": (filename, buffer.getvalue(), content_type)}
-                # MediaService expects 'folder' parameter for the simple upload endpoint
-                data = {"folder": f"ai-processed/{entity_type.lower()}"}
-
-                response = await client.post(f"{self.media_service_url}/api/media/upload/image", files=files, data=data)
-
-                if response.status_code in [200, 201]:
-                    result = response.json()
-                    public_url = result.get("url", result.get("publicUrl", ""))
-                    logger.info(f"Uploaded via MediaService: {public_url}")
-                    return public_url
+            files = {"file": (filename, content, content_type)}
+            # MediaService expects 'folder' parameter for the simple upload endpoint
+            data = {"folder": f"ai-processed/{entity_type.lower()}"}
+
+            with metrics.stage("upload"):
+                if client is not None:
+                    response = await client.post(
+                        f"{self.media_service_url}/api/media/upload/image", files=files, data=data
+                    )
                 else:
-                    logger.warning(f"MediaService returned {response.status_code}: {response.text}")
-                    raise Exception(f"MediaService error: {response.status_code}")
+                    async with httpx.AsyncClient(timeout=120) as own_client:
+                        response = await own_client.post(
+                            f"{self.media_service_url}/api/media/upload/image", files=files, data=data
+                        )
+
+            if response.status_code in [200, 201]:
+                result = response.json()
+                public_url = result.get("url", result.get("publicUrl", ""))
+                logger.info(f"Uploaded via MediaService: {public_url}")
+                return public_url
+            else:
+                logger.warning(f"MediaService returned {response.status_code}: {response.text}")
+                raise Exception(f"MediaService error: {response.status_code}")
 
         except Exception as e:
+            if not local_fallback:
+                raise
             logger.warning(f"MediaService upload failed: {e}, saving locally")
             # Fallback to local storage
-            local_file = os.path.join(self.local_path, filename)
-            with open(local_file, "wb") as f:
-                buffer.seek(0)
-                f.write(buffer.read())
+            local_file = self._save_local(content, filename)
             logger.info(f"Saved image locally: {local_file}")
             return f"file://{local_file}"
 
+    async def upload_variants(self, variants: List[Variant], base_key: str, entity_type: str = "Vehicle") -> List[dict]:
+        """Upload responsive variants concurrently over one connection pool
+
+        Variants whose upload fails are left out (never published as file:// URLs),
+        so the callback's variants/srcset only list URLs clients can fetch.
+        """
+        semaphore = asyncio.Semaphore(VARIANT_UPLOAD_CONCURRENCY)
+
+        async def upload(variant: Variant, client: httpx.AsyncClient) -> Optional[dict]:
+            filename = f"{variant.key(base_key).replace('/', '_')}.{variant.extension}"
+            async with semaphore:
+                try:
+                    url = await self.upload_bytes(
+                        variant.data, filename, variant.content_type, entity_type=entity_type,
+                        client=client, local_fallback=False,
+                    )
+                except Exception as e:
+                    logger.warning(f"Variant upload failed, leaving {filename} out: {e}")
+                    return None
+            return {
+                "width": variant.width,
+                "height": variant.height,
+                "format": variant.format.lower(),
+                "url": url,
+                "bytes": len(variant.data),
+            }
+
+        async with httpx.AsyncClient(timeout=120) as client:
+            uploaded = await asyncio.gather(*(upload(v, client) for v in variants))
+        return [u for u in uploaded if u is not None]
+
+    def _save_local(self, content: bytes, filename: str) -> str:
+        local_file = os.path.join(self.local_path, filename)
+        with open(local_file, "wb") as f:
+            f.write(content)
+        return local_file
+
 
 class SAM2Worker:
     """Main worker class for SAM2 processing"""
@@ -616,6 +691,7 @@ class SAM2Worker:
     def __init__(self):
         self.processor = SAM2Processor(MODEL_PATH, DEVICE)
         self.storage = MediaServiceClient()
+        self.variants = ResponsiveVariantGenerator() if RESPONSIVE_VARIANTS else None
         self.connection = None
         self.channel = None
 
@@ -638,11 +714,15 @@ class SAM2Worker:
         import time
 
         start_time = time.time()
+        data = {}
+        trace = TraceContext.from_message(message)
 
-        async with message.process():
+        async with message.process(), metrics.in_flight():
             try:
                 # Parse message
                 data = json.loads(message.body.decode())
+                trace = TraceContext.from_message(message, data)
+                metrics.record_queue_lag(message, data)
 
                 # MassTransit sends extra envelope fields - extract only what we need
                 # Expected fields: job_id, vehicle_id, user_id, image_url, processing_type, options
@@ -662,10 +742,11 @@ class SAM2Worker:
 
                 msg = ProcessingMessage(**filtered_data)
 
-                logger.info(f"Processing job {msg.job_id}: {msg.processing_type}")
+                logger.info(f"Processing job {msg.job_id}: {msg.processing_type} (trace {trace.trace_id})")
 
                 # Download image
-                image = await self.storage.download_image(msg.image_url)
+                with metrics.stage("download"):
+                    image = await self.storage.download_image(msg.image_url)
 
                 # Get processing options
                 options = msg.options or {}
@@ -695,7 +776,8 @@ class SAM2Worker:
                 ):
                     # Get background - default to white studio
                     bg_code = options.get("background_code", options.get("background_id", "white_studio"))
-                    background = await self._get_background(bg_code)
+                    with metrics.stage("background"):
+                        background = await self._get_background(bg_code)
 
                     shadow_intensity = options.get("shadow_intensity", 0.3)
 
@@ -710,19 +792,36 @@ class SAM2Worker:
                 quality = options.get("quality", 90)
 
                 processed_key = f"processed_{msg.vehicle_id}_{msg.job_id}"
-                processed_url = await self.storage.upload_image(
-                    result_image,
-                    processed_key,
-                    format=format,
-                    quality=quality,
-                    entity_type="Vehicle",
-                    entity_id=msg.vehicle_id,
-                )
-
                 mask_key = f"mask_{msg.vehicle_id}_{msg.job_id}"
-                mask_url = await self.storage.upload_image(
-                    Image.fromarray(mask, "L"), mask_key, format="PNG", entity_type="Vehicle", entity_id=msg.vehicle_id
+
+                # Variants go first so their encode threads start before the full-size encode
+                want_variants = (
+                    self.variants is not None
+                    and options.get("responsive_variants", True)
+                    and processing_type not in (ProcessingType.SEGMENTATION, ProcessingType.VEHICLE_SEGMENTATION)
                 )
+                uploads = [
+                    self.storage.upload_image(
+                        result_image,
+                        processed_key,
+                        format=format,
+                        quality=quality,
+                        entity_type="Vehicle",
+                        entity_id=msg.vehicle_id,
+                    ),
+                    self.storage.upload_image(
+                        Image.fromarray(mask, "L"),
+                        mask_key,
+                        format="PNG",
+                        entity_type="Vehicle",
+                        entity_id=msg.vehicle_id,
+                    ),
+                ]
+                if want_variants:
+                    uploads.insert(0, self._publish_variants(result_image, processed_key))
+                results = await asyncio.gather(*uploads)
+                processed_url, mask_url = results[-2:]
+                variants = results[0] if want_variants else []
 
                 # Calculate processing time
                 processing_time_ms = int((time.time() - start_time) * 1000)
@@ -741,8 +840,12 @@ class SAM2Worker:
                         "format": format,
                     },
                 )
+                if variants:
+                    result.metadata["variants"] = variants
+                    result.metadata["srcset"] = srcset(variants)
 
-                await self._report_result(result)
+                metrics.record_job(True, time.time() - start_time)
+                await self._report_result(result, trace)
 
                 logger.info(f"Job {msg.job_id} completed in {processing_time_ms}ms")
 
@@ -756,7 +859,19 @@ class SAM2Worker:
                     processing_time_ms=int((time.time() - start_time) * 1000),
                 )
 
-                await self._report_result(result)
+                metrics.record_job(False, time.time() - start_time)
+                await self._report_result(result, trace)
+
+    async def _publish_variants(self, image: Image.Image, base_key: str) -> List[dict]:
+        """Encode and upload responsive variants; failures are logged, never fail the job"""
+        try:
+            with metrics.stage("variants_encode"):
+                variants = await self.variants.agenerate(image)
+            with metrics.stage("variants_upload"):
+                return await self.storage.upload_variants(variants, base_key, entity_type="Vehicle")
+        except Exception as e:
+            logger.warning(f"Responsive variants failed for {base_key}: {e}")
+            return []
 
     async def _get_background(self, code: str) -> np.ndarray:
         """Get background image by code"""
@@ -781,8 +896,8 @@ class SAM2Worker:
             logger.warning(f"Background {code} not found, using white")
             return backgrounds["white_studio"]
 
-    async def _report_result(self, result: ProcessingResult):
-        """Report processing result back to API"""
+    async def _report_result(self, result: ProcessingResult, trace: Optional[TraceContext] = None):
+        """Report processing result back to API, propagating the job's traceparent"""
         try:
             async with httpx.AsyncClient() as client:
                 await client.post(
@@ -796,6 +911,7 @@ class SAM2Worker:
                         "processing_time_ms": result.processing_time_ms,
                         "metadata": result.metadata,
                     },
+                    headers=trace.headers() if trace else None,
                     timeout=30,
                 )
         except Exception as e:
@@ -820,6 +936,7 @@ async def main():
     logger.info(f"Model: {MODEL_PATH}")
     logger.info(f"RabbitMQ: {RABBITMQ_HOST}")
 
+    metrics.serve()
     worker = SAM2Worker()
     await worker.run()
 
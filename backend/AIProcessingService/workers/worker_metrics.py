@@ -0,0 +1,221 @@
+"""
+Worker Metrics Module - Prometheus instrumentation and trace propagation
+Shared by the SAM2, YOLO and CLIP workers
+
+Features:
+- Per-stage latency histograms (download, inference, refinement, encode, upload...)
+- Queue lag from the MassTransit envelope sentTime
+- In-flight job gauge and job outcome counters
+- Model load time and memory high-water marks (RSS + CUDA)
+- W3C traceparent propagation from the envelope to the result callback
+
+Author: OKLA Team
+"""
+
+import logging
+import os
+import re
+import resource
+import secrets
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+# ========== Configuration ==========
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+REGISTRY = CollectorRegistry()
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+PROM_STAGE_DURATION = Histogram(
+    "okla_ai_worker_stage_duration_seconds",
+    "Time spent in each pipeline stage",
+    ["worker", "stage"],
+    buckets=STAGE_BUCKETS,
+    registry=REGISTRY,
+)
+PROM_JOB_DURATION = Histogram(
+    "okla_ai_worker_job_duration_seconds",
+    "End-to-end job processing time",
+    ["worker", "status"],
+    buckets=STAGE_BUCKETS,
+    registry=REGISTRY,
+)
+PROM_JOBS_TOTAL = Counter(
+    "okla_ai_worker_jobs_total",
+    "Jobs processed by outcome",
+    ["worker", "status"],
+    registry=REGISTRY,
+)
+PROM_QUEUE_LAG = Histogram(
+    "okla_ai_worker_queue_lag_seconds",
+    "Time between message publish (sentTime) and consumption",
+    ["worker"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600),
+    registry=REGISTRY,
+)
+PROM_IN_FLIGHT = Gauge(
+    "okla_ai_worker_in_flight_jobs",
+    "Jobs currently being processed",
+    ["worker"],
+    registry=REGISTRY,
+)
+PROM_MODEL_LOAD = Gauge(
+    "okla_ai_worker_model_load_seconds",
+    "Time taken to load each model at startup",
+    ["worker", "model"],
+    registry=REGISTRY,
+)
+PROM_RSS_HIGH_WATER = Gauge(
+    "okla_ai_worker_rss_high_water_bytes",
+    "Peak resident set size of the worker process",
+    ["worker"],
+    registry=REGISTRY,
+)
+PROM_GPU_HIGH_WATER = Gauge(
+    "okla_ai_worker_gpu_memory_high_water_bytes",
+    "Peak CUDA memory allocated by torch",
+    ["worker"],
+    registry=REGISTRY,
+)
+
+TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass
+class TraceContext:
+    """W3C trace context for a single job (https://www.w3.org/TR/trace-context/)"""
+
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    flags: str = "01"
+
+    @classmethod
+    def from_message(cls, message, data: Optional[dict] = None) -> "TraceContext":
+        """
+        Build the worker span from an incoming message.
+
+        Looks for traceparent in the AMQP headers first, then in the
+        MassTransit envelope headers. Starts a new trace if none is valid.
+        """
+        candidates = [(getattr(message, "headers", None) or {}).get("traceparent")]
+        if isinstance(data, dict):
+            candidates.append((data.get("headers") or {}).get("traceparent"))
+
+        for value in candidates:
+            if isinstance(value, bytes):
+                value = value.decode(errors="ignore")
+            match = TRACEPARENT_RE.match(value.strip().lower()) if isinstance(value, str) else None
+            if match and match.group(1) != "ff" and set(match.group(2)) != {"0"}:
+                return cls(
+                    trace_id=match.group(2),
+                    span_id=secrets.token_hex(8),
+                    parent_span_id=match.group(3),
+                    flags=match.group(4),
+                )
+
+        return cls(trace_id=secrets.token_hex(16), span_id=secrets.token_hex(8))
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{self.flags}"
+
+    def headers(self) -> dict:
+        """HTTP headers to attach to outgoing calls (e.g. the result callback)"""
+        return {"traceparent": self.traceparent}
+
+
+class WorkerMetrics:
+    """Prometheus instrumentation bound to a single worker name"""
+
+    def __init__(self, worker: str):
+        self.worker = worker
+
+    def serve(self, port: int = METRICS_PORT):
+        """Expose /metrics on the given port (background thread)"""
+        if not METRICS_ENABLED:
+            logger.info("Worker metrics disabled (METRICS_ENABLED=false)")
+            return
+        start_http_server(port, registry=REGISTRY)
+        logger.info(f"Prometheus metrics served on :{port}/metrics")
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage; works around both sync code and awaits"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            PROM_STAGE_DURATION.labels(self.worker, name).observe(time.perf_counter() - start)
+
+    @contextmanager
+    def model_load(self, model: str):
+        """Time a model load and record memory right after it"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            PROM_MODEL_LOAD.labels(self.worker, model).set(elapsed)
+            logger.info(f"Model {model} loaded in {elapsed:.2f}s")
+            self.update_memory()
+
+    @asynccontextmanager
+    async def in_flight(self):
+        """Track a job as in flight for the duration of the (async) block"""
+        gauge = PROM_IN_FLIGHT.labels(self.worker)
+        gauge.inc()
+        try:
+            yield
+        finally:
+            gauge.dec()
+            self.update_memory()
+
+    def record_job(self, success: bool, duration_s: float):
+        status = "success" if success else "error"
+        PROM_JOBS_TOTAL.labels(self.worker, status).inc()
+        PROM_JOB_DURATION.labels(self.worker, status).observe(duration_s)
+
+    def record_queue_lag(self, message, data: Optional[dict] = None):
+        """Observe queue lag from the envelope sentTime, falling back to the AMQP timestamp"""
+        sent_at = None
+
+        if isinstance(data, dict) and data.get("sentTime"):
+            try:
+                sent_at = datetime.fromisoformat(str(data["sentTime"]).replace("Z", "+00:00"))
+            except ValueError:
+                sent_at = None
+
+        if sent_at is None:
+            sent_at = getattr(message, "timestamp", None)
+
+        if not isinstance(sent_at, datetime):
+            return
+
+        if sent_at.tzinfo is None:
+            sent_at = sent_at.replace(tzinfo=timezone.utc)
+
+        lag = (datetime.now(timezone.utc) - sent_at).total_seconds()
+        PROM_QUEUE_LAG.labels(self.worker).observe(max(lag, 0.0))
+
+    def update_memory(self):
+        """Refresh RSS and CUDA memory high-water marks"""
+        # ru_maxrss is reported in KB on Linux
+        PROM_RSS_HIGH_WATER.labels(self.worker).set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                PROM_GPU_HIGH_WATER.labels(self.worker).set(torch.cuda.max_memory_allocated())
+        except ImportError:
+            pass
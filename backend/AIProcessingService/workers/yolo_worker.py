@@ -24,6 +24,8 @@ import numpy as np
 from botocore.client import Config
 from PIL import Image, ImageFilter
 
+from worker_metrics import TraceContext, WorkerMetrics
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -46,6 +48,8 @@ DEVICE = os.getenv("DEVICE", "0")  # CUDA device ID
 
 API_CALLBACK_URL = os.getenv("API_CALLBACK_URL", "http://aiprocessingservice:8080")
 
+metrics = WorkerMetrics("yolo")
+
 
 @dataclass
 class BoundingBox:
@@ -83,7 +87,8 @@ class YOLOProcessor:
         self.device = device
         self.model = None
         self.plate_model = None
-        self._load_models(model_path, plate_model_path)
+        with metrics.model_load("yolov8"):
+            self._load_models(model_path, plate_model_path)
 
     def _load_models(self, model_path: str, plate_model_path: str):
         """Load YOLO models"""
@@ -238,18 +243,20 @@ class S3Client:
     async def upload_image(self, image: Image.Image, key: str, format: str = "WEBP", quality: int = 90) -> str:
         """Upload image to S3"""
         buffer = io.BytesIO()
-        image.save(buffer, format=format, quality=quality)
+        with metrics.stage(f"encode_{format.lower()}"):
+            image.save(buffer, format=format, quality=quality)
         buffer.seek(0)
 
         content_type = {"WEBP": "image/webp", "PNG": "image/png", "JPEG": "image/jpeg"}.get(format, "image/webp")
 
         loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
-            lambda: self.client.put_object(
-                Bucket=self.bucket, Key=key, Body=buffer.getvalue(), ContentType=content_type, ACL="public-read"
-            ),
-        )
+        with metrics.stage("upload"):
+            await loop.run_in_executor(
+                None,
+                lambda: self.client.put_object(
+                    Bucket=self.bucket, Key=key, Body=buffer.getvalue(), ContentType=content_type, ACL="public-read"
+                ),
+            )
 
         return f"https://{self.bucket}.s3.{S3_REGION}.amazonaws.com/{key}"
 
@@ -279,10 +286,14 @@ class YOLOWorker:
         import time
 
         start_time = time.time()
+        data = {}
+        trace = TraceContext.from_message(message)
 
-        async with message.process():
+        async with message.process(), metrics.in_flight():
             try:
                 data = json.loads(message.body.decode())
+                trace = TraceContext.from_message(message, data)
+                metrics.record_queue_lag(message, data)
 
                 # MassTransit sends extra envelope fields - extract only what we need
                 expected_fields = {"job_id", "vehicle_id", "image_url", "blur_plates"}
@@ -299,20 +310,23 @@ class YOLOWorker:
 
                 msg = DetectionMessage(**filtered_data)
 
-                logger.info(f"Processing detection for job {msg.job_id}")
+                logger.info(f"Processing detection for job {msg.job_id} (trace {trace.trace_id})")
 
                 # Download image
-                image = await self.s3.download_image(msg.image_url)
+                with metrics.stage("download"):
+                    image = await self.s3.download_image(msg.image_url)
                 image_np = np.array(image)
 
                 # Detect plates
-                plates = self.processor.detect_plates(image_np)
+                with metrics.stage("yolo_detect"):
+                    plates = self.processor.detect_plates(image_np)
 
                 blurred_url = None
 
                 # Blur plates if requested
                 if msg.blur_plates and plates:
-                    blurred = self.processor.blur_plates(image, plates)
+                    with metrics.stage("blur"):
+                        blurred = self.processor.blur_plates(image, plates)
 
                     # Upload blurred image
                     key = f"blurred/{msg.vehicle_id}/{msg.job_id}.webp"
@@ -339,24 +353,27 @@ class YOLOWorker:
                     processing_time_ms=processing_time_ms,
                 )
 
-                await self._report_result(result)
+                metrics.record_job(True, time.time() - start_time)
+                await self._report_result(result, trace)
 
                 logger.info(f"Job {msg.job_id}: detected {len(plates)} plates in {processing_time_ms}ms")
 
             except Exception as e:
                 logger.error(f"Error in detection: {e}")
 
+                metrics.record_job(False, time.time() - start_time)
                 await self._report_result(
                     DetectionResult(
                         job_id=data.get("job_id", "unknown"),
                         success=False,
                         error_message=str(e),
                         processing_time_ms=int((time.time() - start_time) * 1000),
-                    )
+                    ),
+                    trace,
                 )
 
-    async def _report_result(self, result: DetectionResult):
-        """Report result to API"""
+    async def _report_result(self, result: DetectionResult, trace: Optional[TraceContext] = None):
+        """Report result to API, propagating the job's traceparent"""
         try:
             async with httpx.AsyncClient() as client:
                 await client.post(
@@ -370,6 +387,7 @@ class YOLOWorker:
                         "error_message": result.error_message,
                         "processing_time_ms": result.processing_time_ms,
                     },
+                    headers=trace.headers() if trace else None,
                     timeout=30,
                 )
         except Exception as e:
@@ -391,6 +409,7 @@ async def main():
     logger.info(f"Device: {DEVICE}")
     logger.info(f"Model: {MODEL_PATH}")
 
+    metrics.serve()
     worker = YOLOWorker()
     await worker.run()
 
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+OKLA Pricing - Benchmark de latencia y precisión
+================================================
+
+Reproduce un corpus fijo de requests contra SimplePricingEngine y
+AdvancedPricingEngine y mide:
+- Latencia por request (p50/p95/p99) y por lote (batch de 100 / 1000)
+- Cold start (constructor + carga + primera predicción) y memoria pico (RSS),
+  cada uno en un subproceso aislado
+- Precisión sobre un holdout que no participa del entrenamiento (MAE, MAPE, R²)
+
+Genera un reporte JSON y, con --baseline, falla (exit 1) si alguna métrica
+empeora más allá de la tolerancia respecto del baseline versionado.
+
+Uso:
+    python benchmarks/pricing_benchmark.py [--requests 2000] [--output report.json]
+    python benchmarks/pricing_benchmark.py --baseline benchmarks/baseline.json
+    python benchmarks/pricing_benchmark.py --baseline benchmarks/baseline.json --update-baseline
+
+Las latencias dependen del hardware: regenerar el baseline en la máquina de CI.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SERVICE_DIR = BENCHMARK_DIR.parent
+sys.path.insert(0, str(SERVICE_DIR))
+
+CORPUS_SEED = 2024  # distinta de las semillas del training store (42, 7)
+BATCH_SIZES = (100, 1000)
+REQUEST_FIELDS = ('make', 'model', 'year', 'mileage', 'fuel_type', 'transmission', 'condition', 'province')
+
+# (ruta en el reporte, mejor si es 'lower' | 'higher', tipo de tolerancia)
+CHECKS = [
+    ('simple.single.p50_us', 'lower', 'latency'),
+    ('simple.single.p99_us', 'lower', 'latency'),
+    ('simple.batch_1000.per_vehicle_us', 'lower', 'latency'),
+    ('simple.cold_start_ms', 'lower', 'latency'),
+    ('simple.peak_rss_mb', 'lower', 'memory'),
+    ('simple.accuracy.mape', 'lower', 'accuracy'),
+    ('advanced.single.p50_us', 'lower', 'latency'),
+    ('advanced.single.p99_us', 'lower', 'latency'),
+    ('advanced.batch_1000.per_vehicle_us', 'lower', 'latency'),
+    ('advanced.cold_start_ms', 'lower', 'latency'),
+    ('advanced.peak_rss_mb', 'lower', 'memory'),
+    ('advanced.accuracy.base_mae', 'lower', 'accuracy'),
+    ('advanced.accuracy.base_r2', 'higher', 'accuracy'),
+]
+
+DEFAULT_TOLERANCES = {'latency': 0.30, 'memory': 0.20, 'accuracy': 0.02}
+
+
+# ----------------------------------------------------------------------
+# Utilidades
+# ----------------------------------------------------------------------
+def _percentiles_us(samples_s: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_s)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e6, 1)
+
+    return {
+        'runs': len(ordered),
+        'p50_us': pick(0.50),
+        'p95_us': pick(0.95),
+        'p99_us': pick(0.99),
+        'max_us': round(ordered[-1] * 1e6, 1)
+    }
+
+
+def _batch_stats(samples_s: List[float], size: int) -> Dict[str, float]:
+    p50 = statistics.median(samples_s)
+    return {
+        'runs': len(samples_s),
+        'p50_ms': round(p50 * 1000, 3),
+        'per_vehicle_us': round(p50 / size * 1e6, 2),
+        'throughput_per_s': round(size / p50)
+    }
+
+
+def _accuracy(predicted: List[float], actual: List[float]) -> Dict[str, float]:
+    errors = [p - a for p, a in zip(predicted, actual)]
+    mean_actual = statistics.fmean(actual)
+    ss_res = sum(e * e for e in errors)
+    ss_tot = sum((a - mean_actual) ** 2 for a in actual)
+    return {
+        'mae': round(statistics.fmean(abs(e) for e in errors), 1),
+        'rmse': round(math.sqrt(ss_res / len(errors)), 1),
+        'mape': round(statistics.fmean(abs(e) / a for e, a in zip(errors, actual)), 4),
+        'r2': round(1 - ss_res / ss_tot, 4) if ss_tot else 0.0
+    }
+
+
+def _peak_rss_mb() -> float:
+    # VmHWM se reinicia en exec; ru_maxrss hereda el pico del proceso padre en Linux
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss: KB en Linux, bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _load_corpus(path: Path) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def _vehicles(corpus: List[Dict[str, Any]], vehicle_cls) -> list:
+    return [vehicle_cls(**{field: row[field] for field in REQUEST_FIELDS}) for row in corpus]
+
+
+# ----------------------------------------------------------------------
+# Probes (subproceso aislado: cold start + memoria pico)
+# ----------------------------------------------------------------------
+def probe(engine_name: str, model_dir: str, data_dir: str, corpus_path: str) -> Dict[str, float]:
+    start = time.perf_counter()
+    corpus = _load_corpus(Path(corpus_path))
+
+    if engine_name == 'simple':
+        from simple_pricing_service import SimplePricingEngine, VehicleData
+
+        engine = SimplePricingEngine()
+        vehicles = _vehicles(corpus, VehicleData)
+        engine.predict_price(vehicles[0])
+        cold_start_ms = (time.perf_counter() - start) * 1000
+        engine.predict_batch(vehicles)
+    else:
+        from advanced_pricing_ml import AdvancedPricingEngine, VehicleData
+
+        engine = AdvancedPricingEngine(model_path=model_dir, data_path=data_dir)
+        vehicles = _vehicles(corpus, VehicleData)
+
+        async def run():
+            await engine.predict_price(vehicles[0])
+            first = time.perf_counter()
+            await engine.predict_price_batch(vehicles)
+            return first
+
+        first_prediction = asyncio.run(run())
+        cold_start_ms = (first_prediction - start) * 1000
+
+    return {'cold_start_ms': round(cold_start_ms, 1), 'peak_rss_mb': _peak_rss_mb()}
+
+
+def _run_probe(engine_name: str, model_dir: Path, data_dir: Path, corpus_path: Path,
+               repeat: int) -> Dict[str, float]:
+    results = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, __file__, '--probe', engine_name, '--model-dir', str(model_dir),
+             '--data-dir', str(data_dir), '--corpus', str(corpus_path)],
+            check=True, capture_output=True, text=True, cwd=str(data_dir.parent)
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'cold_start_ms': statistics.median(r['cold_start_ms'] for r in results),
+        'peak_rss_mb': max(r['peak_rss_mb'] for r in results)
+    }
+
+
+# ----------------------------------------------------------------------
+# Benchmarks en proceso
+# ----------------------------------------------------------------------
+def bench_simple(corpus: List[Dict[str, Any]], batch_repeat: int) -> Dict[str, Any]:
+    from simple_pricing_service import SimplePricingEngine, VehicleData
+
+    engine = SimplePricingEngine()
+    vehicles = _vehicles(corpus, VehicleData)
+
+    samples = []
+    predictions = []
+    for vehicle in vehicles:
+        start = time.perf_counter()
+        predictions.append(engine.predict_price(vehicle))
+        samples.append(time.perf_counter() - start)
+
+    report = {'single': _percentiles_us(samples)}
+    for size in BATCH_SIZES:
+        batch = vehicles[:size]
+        batch_samples = []
+        for _ in range(batch_repeat):
+            start = time.perf_counter()
+            engine.predict_batch(batch)
+            batch_samples.append(time.perf_counter() - start)
+        report[f'batch_{size}'] = _batch_stats(batch_samples, len(batch))
+
+    report['accuracy'] = _accuracy([p['suggested_price_dop'] for p in predictions],
+                                   [row['sale_price'] for row in corpus])
+    return report
+
+
+def bench_advanced(engine, corpus: List[Dict[str, Any]], batch_repeat: int) -> Dict[str, Any]:
+    from advanced_pricing_ml import VehicleData
+
+    vehicles = _vehicles(corpus, VehicleData)
+
+    async def run() -> Tuple[list, Dict[str, Any]]:
+        # Cache de predicciones vacío: se mide el costo real del modelo
+        engine.prediction_cache.clear()
+        samples, predictions = [], []
+        for vehicle in vehicles:
+            start = time.perf_counter()
+            predictions.append(await engine.predict_price(vehicle))
+            samples.append(time.perf_counter() - start)
+
+        report = {'single': _percentiles_us(samples)}
+        for size in BATCH_SIZES:
+            batch = vehicles[:size]
+            batch_samples = []
+            for _ in range(batch_repeat):
+                engine.prediction_cache.clear()
+                start = time.perf_counter()
+                await engine.predict_price_batch(batch)
+                batch_samples.append(time.perf_counter() - start)
+            report[f'batch_{size}'] = _batch_stats(batch_samples, len(batch))
+        return predictions, report
+
+    predictions, report = asyncio.run(run())
+    engine.prediction_cache.clear()
+    base_predictions, _ = engine._predict_base_prices(vehicles)
+
+    actual = [row['sale_price'] for row in corpus]
+    final = _accuracy([p.suggested_price_dop for p in predictions], actual)
+    base = _accuracy([float(p) for p in base_predictions], actual)
+    report['accuracy'] = {**{f'base_{k}': v for k, v in base.items()},
+                          **{f'final_{k}': v for k, v in final.items()}}
+    return report
+
+
+def run(n_requests: int, batch_repeat: int, probe_repeat: int) -> Dict[str, Any]:
+    from advanced_pricing_ml import AdvancedPricingEngine
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = Path(tmp) / 'models'
+        data_dir = Path(tmp) / 'data'
+        # Sin sketches de mercado del entorno: ambos motores parten del mismo estado vacío
+        os.environ['PRICE_SKETCH_PATH'] = str(data_dir / 'price_sketches.json')
+        engine = AdvancedPricingEngine(model_path=str(model_dir), data_path=str(data_dir))
+
+        # Corpus fijo: semilla propia, nunca escrito en el training store
+        holdout = engine._generate_synthetic_data(n_samples=n_requests, seed=CORPUS_SEED)
+        corpus = [
+            {**{field: holdout[field].iat[i] for field in REQUEST_FIELDS},
+             'sale_price': float(holdout['sale_price'].iat[i])}
+            for i in range(len(holdout))
+        ]
+        corpus = json.loads(json.dumps(corpus, default=lambda v: v.item()))  # tipos numpy -> Python
+        corpus_path = Path(tmp) / 'corpus.jsonl'
+        corpus_text = ''.join(json.dumps(row, ensure_ascii=False, sort_keys=True) + '\n' for row in corpus)
+        corpus_path.write_text(corpus_text, encoding='utf-8')
+
+        train_start = time.perf_counter()
+        asyncio.run(engine.train_model(retrain=True))
+        training_ms = (time.perf_counter() - train_start) * 1000
+        manifest = engine.model_store.read_manifest()
+
+        simple = bench_simple(corpus, batch_repeat)
+        simple.update(_run_probe('simple', model_dir, data_dir, corpus_path, probe_repeat))
+
+        advanced = bench_advanced(engine, corpus, batch_repeat)
+        advanced.update(_run_probe('advanced', model_dir, data_dir, corpus_path, probe_repeat))
+        advanced['training'] = {'training_ms': round(training_ms, 1), **manifest.metrics}
+        engine.inference_pool.shutdown()
+
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': sys.version.split()[0],
+            'corpus': {
+                'requests': len(corpus),
+                'seed': CORPUS_SEED,
+                'sha256': hashlib.sha256(corpus_text.encode('utf-8')).hexdigest()[:16]
+            },
+            'model_version': manifest.model_version,
+            'simple': simple,
+            'advanced': advanced
+        }
+
+
+# ----------------------------------------------------------------------
+# Comparación contra baseline
+# ----------------------------------------------------------------------
+def _lookup(report: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = report
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any],
+            tolerances: Dict[str, float]) -> List[str]:
+    """Lista de regresiones (vacía si todo está dentro de la tolerancia)"""
+    regressions = []
+    if report['corpus']['sha256'] != baseline.get('corpus', {}).get('sha256'):
+        regressions.append("el corpus cambió respecto del baseline (regenerar con --update-baseline)")
+        return regressions
+
+    for path, better, kind in CHECKS:
+        current, reference = _lookup(report, path), _lookup(baseline, path)
+        if current is None or reference is None:
+            continue
+        tolerance = tolerances[kind]
+        if better == 'lower':
+            limit = reference * (1 + tolerance)
+            failed = current > limit
+        else:
+            limit = reference - abs(reference) * tolerance
+            failed = current < limit
+        if failed:
+            regressions.append(f"{path}: {current} (baseline {reference}, límite {limit:.4g})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia y precisión del servicio de pricing")
+    parser.add_argument('--requests', type=int, default=2000, help="Tamaño del corpus de requests")
+    parser.add_argument('--batch-repeat', type=int, default=10)
+    parser.add_argument('--probe-repeat', type=int, default=3)
+    parser.add_argument('--output', type=str, default=None, help="Archivo JSON de salida")
+    parser.add_argument('--baseline', type=str, default=None, help="Baseline JSON contra el cual comparar")
+    parser.add_argument('--update-baseline', action='store_true', help="Sobrescribir el baseline con este reporte")
+    parser.add_argument('--latency-tolerance', type=float, default=DEFAULT_TOLERANCES['latency'])
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_TOLERANCES['memory'])
+    parser.add_argument('--accuracy-tolerance', type=float, default=DEFAULT_TOLERANCES['accuracy'])
+    # Uso interno: subproceso de cold start / memoria
+    parser.add_argument('--probe', choices=['simple', 'advanced'], help=argparse.SUPPRESS)
+    parser.add_argument('--model-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--data-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--corpus', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.model_dir, args.data_dir, args.corpus)))
+        return 0
+
+    report = run(args.requests, args.batch_repeat, args.probe_repeat)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+
+    if not args.baseline:
+        return 0
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline or not baseline_path.exists():
+        baseline_path.write_text(output + '\n', encoding='utf-8')
+        print(f"Baseline actualizado: {baseline_path}", file=sys.stderr)
+        return 0
+
+    regressions = compare(report, json.loads(baseline_path.read_text(encoding='utf-8')), {
+        'latency': args.latency_tolerance,
+        'memory': args.memory_tolerance,
+        'accuracy': args.accuracy_tolerance
+    })
+    if regressions:
+        print("Regresiones respecto del baseline:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  - {regression}", file=sys.stderr)
+        return 1
+
+    print("Sin regresiones respecto del baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+OKLA Pricing - Startup Benchmark
+================================
+
+Mide el cold start del servicio de pricing:
+- Carga del modelo legacy (pickle/joblib) vs formato nativo XGBoost (UBJSON)
+- Tiempo desde AdvancedPricingEngine() hasta la primera predicción
+
+Uso:
+    python benchmarks/startup_benchmark.py [--repeat 20] [--output startup.json]
+
+Entrena un modelo temporal una sola vez (fuera de las mediciones) en un directorio temporal.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import joblib  # noqa: E402
+
+from advanced_pricing_ml import AdvancedPricingEngine, VehicleData  # noqa: E402
+from model_store import LEGACY_MODEL_FILE, ModelStore  # noqa: E402
+
+SAMPLE_VEHICLE = VehicleData(
+    make='Toyota', model='Corolla', year=2019, mileage=60000,
+    fuel_type='Gasolina', transmission='Automática', condition='Muy Bueno', province='Santo Domingo'
+)
+
+
+def _timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': repeat,
+        'p50_ms': round(statistics.median(samples), 3),
+        'min_ms': round(min(samples), 3),
+        'max_ms': round(max(samples), 3)
+    }
+
+
+def _cold_start(model_dir: Path, data_dir: Path) -> float:
+    """Constructor + carga de modelo + primera predicción (sin red)"""
+    start = time.perf_counter()
+    engine = AdvancedPricingEngine(model_path=str(model_dir), data_path=str(data_dir))
+    engine._load_models()
+    asyncio.run(engine.predict_price(SAMPLE_VEHICLE))
+    return (time.perf_counter() - start) * 1000
+
+
+def run(repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = Path(tmp) / 'models'
+        data_dir = Path(tmp) / 'data'
+
+        # Preparación (no medida): entrenar y persistir en ambos formatos
+        engine = AdvancedPricingEngine(model_path=str(model_dir), data_path=str(data_dir))
+        train_start = time.perf_counter()
+        asyncio.run(engine.train_model(retrain=True))
+        train_ms = (time.perf_counter() - train_start) * 1000
+
+        legacy_file = model_dir / LEGACY_MODEL_FILE
+        joblib.dump(engine.xgb_model, legacy_file)
+
+        store = ModelStore(model_dir)
+        manifest = store.read_manifest()
+
+        cold_starts = [_cold_start(model_dir, data_dir) for _ in range(repeat)]
+
+        return {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'model_version': manifest.model_version,
+            'model_size_bytes': {
+                'native_ubj': (store.version_path(manifest.model_version) / manifest.model_file).stat().st_size,
+                'legacy_joblib': legacy_file.stat().st_size
+            },
+            'training_ms': round(train_ms, 1),
+            'model_load': {
+                'native_ubj': _timed(store.load, repeat),
+                'legacy_joblib': _timed(lambda: joblib.load(legacy_file), repeat)
+            },
+            'cold_start_to_first_prediction': {
+                'runs': repeat,
+                'p50_ms': round(statistics.median(cold_starts), 3),
+                'max_ms': round(max(cold_starts), 3)
+            }
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del servicio de pricing")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', type=str, default=None, help="Archivo JSON de salida")
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    output = json.dumps(report, indent=2)
+    print(output)
+
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+OKLA Comparable Listings Index
+==============================
+
+Índice en memoria de listings comparables (scraped_vehicles + inventario OKLA)
+para el análisis competitivo del motor de pricing.
+
+- Particionado por (make, model) normalizados
+- Dentro de cada partición: arrays NumPy ordenados por año; la búsqueda acota
+  la ventana de años con searchsorted y calcula la distancia (año, kilometraje)
+  vectorizada, por lo que k vecinos salen en sub-milisegundos
+- Refresco incremental con watermark sobre scraped_at (>=, descartando por
+  fingerprint las filas de ese mismo instante que ya se leyeron)
+- Dedup por listing (source + url), conservando el precio más reciente
+
+Autor: OKLA Development Team
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Un año de diferencia "pesa" lo mismo que 15,000 km
+YEAR_SCALE = 1.0
+MILEAGE_SCALE = 15000.0
+DEFAULT_YEAR_WINDOW = 3
+
+SCRAPED_VEHICLES_SQL = """
+    SELECT fingerprint, source, url, make, model, year, mileage, price, currency, location,
+           first_seen, scraped_at
+    FROM scraped_vehicles
+    WHERE scraped_at >= %(since)s AND price > 0
+    ORDER BY scraped_at
+"""
+
+
+@dataclass
+class Comparable:
+    """Listing comparable devuelto por el índice"""
+    source: str
+    url: str
+    year: int
+    mileage: Optional[int]
+    price_dop: float
+    distance: float
+
+
+class _Partition:
+    """Listings de un (make, model), ordenados por año"""
+
+    __slots__ = ('keys', 'year', 'mileage', 'price', 'source', 'url')
+
+    def __init__(self, frame: pd.DataFrame):
+        frame = frame.sort_values('year', kind='stable')
+        self.keys = frame['listing_key'].to_numpy(dtype=object)
+        self.year = frame['year'].to_numpy(dtype=np.float64)
+        self.mileage = frame['mileage'].to_numpy(dtype=np.float64)
+        self.price = frame['price_dop'].to_numpy(dtype=np.float64)
+        self.source = frame['source'].to_numpy(dtype=object)
+        self.url = frame['url'].to_numpy(dtype=object)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'listing_key': self.keys, 'year': self.year, 'mileage': self.mileage,
+            'price_dop': self.price, 'source': self.source, 'url': self.url
+        })
+
+    def __len__(self) -> int:
+        return len(self.year)
+
+
+class ComparableIndex:
+    """Índice k-NN de listings comparables por make/model, año y kilometraje"""
+
+    def __init__(self, usd_to_dop_rate: float = 58.5):
+        self.usd_to_dop_rate = usd_to_dop_rate
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        self._lock = threading.Lock()
+        self.watermark: Optional[datetime] = None
+        self._watermark_keys: Set[str] = set()  # fingerprints leídos con scraped_at == watermark
+        self.version = 0
+
+    def __len__(self) -> int:
+        return sum(len(p) for p in self._partitions.values())
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+    def add_listings(self, listings: pd.DataFrame) -> int:
+        """
+        Agregar/actualizar listings. Columnas: source, url, make, model, year,
+        mileage, price, currency (opcional), scraped_at (opcional).
+        """
+        if listings.empty:
+            return 0
+
+        with self._lock:
+            self._advance_watermark(listings)
+
+        df = listings.copy()
+        df = df.dropna(subset=['make', 'model', 'year', 'price'])
+        df = df[df['price'] > 0]
+        if df.empty:
+            return 0
+
+        currency = df['currency'] if 'currency' in df else pd.Series('DOP', index=df.index)
+        df['price_dop'] = np.where(currency == 'USD', df['price'] * self.usd_to_dop_rate, df['price'])
+        df['source'] = df['source'].fillna('unknown') if 'source' in df else 'unknown'
+        df['url'] = df['url'].fillna('') if 'url' in df else ''
+        if 'mileage' not in df:
+            df['mileage'] = np.nan
+        df['mileage'] = pd.to_numeric(df['mileage'], errors='coerce')
+
+        # Fingerprint del loader si viene de scraped_vehicles; si no, source+url o el contenido
+        if 'fingerprint' in df and df['fingerprint'].notna().all():
+            df['listing_key'] = df['fingerprint']
+        else:
+            df['listing_key'] = np.where(
+                df['url'] != '',
+                df['source'].astype(str) + '|' + df['url'].astype(str),
+                df['source'].astype(str) + '|' + df['make'].astype(str) + '|' + df['model'].astype(str) + '|'
+                + df['year'].astype(str) + '|' + df['mileage'].astype(str) + '|' + df['price'].astype(str)
+            )
+        df['partition'] = list(zip(_normalize(df['make']), _normalize(df['model'])))
+
+        columns = ['listing_key', 'year', 'mileage', 'price_dop', 'source', 'url']
+        with self._lock:
+            for key, group in df.groupby('partition', sort=False):
+                existing = self._partitions.get(key)
+                merged = group[columns] if existing is None else pd.concat(
+                    [existing.to_frame(), group[columns]], ignore_index=True
+                )
+                merged = merged.drop_duplicates('listing_key', keep='last')
+                self._partitions[key] = _Partition(merged)
+            self.version += 1
+
+        return len(df)
+
+    def _advance_watermark(self, listings: pd.DataFrame):
+        """Watermark = scraped_at más reciente leído (aunque la fila no sea utilizable)"""
+        if 'scraped_at' not in listings:
+            return
+        scraped_at = pd.to_datetime(listings['scraped_at'])
+        latest = scraped_at.max()
+        if pd.isna(latest):
+            return
+
+        keys = set(listings.loc[scraped_at == latest, 'fingerprint'].dropna()) if 'fingerprint' in listings else set()
+        if self.watermark is None or latest > self.watermark:
+            self.watermark = latest.to_pydatetime()
+            self._watermark_keys = keys
+        elif latest == self.watermark:
+            self._watermark_keys |= keys
+
+    def _unseen(self, scraped: pd.DataFrame) -> pd.DataFrame:
+        """Descartar las filas con scraped_at == watermark que ya se leyeron en un refresco anterior"""
+        if self.watermark is None or scraped.empty or 'fingerprint' not in scraped:
+            return scraped
+        seen = (pd.to_datetime(scraped['scraped_at']) == self.watermark) & scraped['fingerprint'].isin(
+            self._watermark_keys
+        )
+        return scraped[~seen]
+
+    def refresh_from_db(self, db_engine, inventory_sql: Optional[str] = None) -> pd.DataFrame:
+        """
+        Traer solo los listings nuevos/actualizados desde el último watermark (bloqueante).
+        Devuelve las filas de scraped_vehicles leídas, para otros consumidores (sketches).
+        """
+        # >= y no >: filas con el mismo scraped_at que el watermark pueden haberse
+        # confirmado después del refresco anterior; las ya leídas se descartan
+        since = self.watermark or datetime(1970, 1, 1)
+        scraped = self._unseen(pd.read_sql(SCRAPED_VEHICLES_SQL, db_engine, params={'since': since}))
+        added = self.add_listings(scraped)
+
+        # Inventario propio (consulta configurable; debe devolver las mismas columnas)
+        inventory_sql = inventory_sql or os.getenv('COMPARABLES_INVENTORY_SQL')
+        if inventory_sql:
+            inventory = pd.read_sql(inventory_sql, db_engine)
+            inventory['source'] = inventory.get('source', 'okla')
+            added += self.add_listings(inventory.drop(columns=['scraped_at'], errors='ignore'))
+
+        if added:
+            logger.info(f"Índice de comparables: +{added} listings ({len(self)} total, v{self.version})")
+        return scraped
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def nearest(self, make: str, model: str, year: int, mileage: Optional[int] = None,
+                k: int = 10, year_window: int = DEFAULT_YEAR_WINDOW) -> List[Comparable]:
+        """k listings más cercanos en (año, kilometraje) dentro del mismo make/model"""
+        partition = self._partitions.get((_normalize_one(make), _normalize_one(model)))
+        if partition is None or len(partition) == 0:
+            return []
+
+        # Ventana de años por búsqueda binaria; si no alcanza para k, toda la partición
+        lo = np.searchsorted(partition.year, year - year_window, side='left')
+        hi = np.searchsorted(partition.year, year + year_window, side='right')
+        if hi - lo < k:
+            lo, hi = 0, len(partition)
+
+        years = partition.year[lo:hi]
+        distance = ((years - year) / YEAR_SCALE) ** 2
+        if mileage is not None:
+            mileages = partition.mileage[lo:hi]
+            mileage_delta = np.where(np.isnan(mileages), 0.0, (mileages - mileage) / MILEAGE_SCALE)
+            distance = distance + mileage_delta ** 2
+        distance = np.sqrt(distance)
+
+        k = min(k, len(distance))
+        candidates = np.argpartition(distance, k - 1)[:k]
+        candidates = candidates[np.argsort(distance[candidates], kind='stable')]
+
+        return [
+            Comparable(
+                source=partition.source[lo + i],
+                url=partition.url[lo + i],
+                year=int(partition.year[lo + i]),
+                mileage=None if np.isnan(partition.mileage[lo + i]) else int(partition.mileage[lo + i]),
+                price_dop=float(partition.price[lo + i]),
+                distance=float(distance[i])
+            )
+            for i in candidates
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'listings': len(self),
+            'partitions': len(self._partitions),
+            'version': self.version,
+            'watermark': self.watermark.isoformat() if self.watermark else None
+        }
+
+
+def _normalize_one(value: Any) -> str:
+    return str(value).strip().lower() if value is not None else ''
+
+
+def _normalize(series: pd.Series) -> pd.Series:
+    return series.astype(str).str.strip().str.lower()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+OKLA Crawl Scheduler
+====================
+
+Scheduler asíncrono para el scraper de inteligencia de mercado:
+
+- Rate limit por host con token bucket (sin sleeps fijos entre requests)
+- Concurrencia acotada con un semáforo global
+- HTTP plano por defecto; pool de navegadores headless solo si la página
+  necesita JavaScript (el HTML estático no trae listings)
+- Paginación siguiendo rel="next" / enlaces de paginación
+- Requests condicionales (ETag / If-Modified-Since): una página sin cambios no se
+  re-descarga, pero su cuerpo guardado se vuelve a parsear para que sus listings
+  sigan apareciendo en la corrida (el upsert avanza last_seen y los rollups los cuentan)
+- Throughput por fuente (páginas, listings, bytes, 304s, errores)
+
+Autor: OKLA Development Team
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+NEXT_PAGE_SELECTORS = [
+    'a[rel="next"]',
+    'link[rel="next"]',
+    '.pagination a.next',
+    '.pagination li.next a',
+    'a.next-page',
+]
+
+VALIDATOR_TTL_SECONDS = 7 * 24 * 3600
+
+
+class TokenBucket:
+    """Token bucket asíncrono: `rate` requests/segundo con ráfagas de hasta `capacity`"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """Un token bucket por host, con overrides opcionales por host"""
+
+    def __init__(self, rate: float, burst: float = 1.0, overrides: Optional[Dict[str, float]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str):
+        host = urlparse(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.overrides.get(host, self.rate), self.burst)
+            self._buckets[host] = bucket
+        await bucket.acquire()
+
+
+class ValidatorStore:
+    """ETag / Last-Modified / siguiente página / cuerpo por URL (Redis si está disponible, si no memoria)"""
+
+    def __init__(self, redis_client=None, prefix: str = "crawl:validators:"):
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self._memory: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, url: str) -> Dict[str, Any]:
+        if self.redis_client is not None:
+            try:
+                raw = self.redis_client.get(self.prefix + url)
+                return json.loads(raw) if raw else {}
+            except Exception as e:
+                logger.warning(f"Validator store no disponible: {e}")
+        return self._memory.get(url, {})
+
+    def set(self, url: str, validators: Dict[str, Any]):
+        self._memory[url] = validators
+        if self.redis_client is not None:
+            try:
+                self.redis_client.set(self.prefix + url, json.dumps(validators), ex=VALIDATOR_TTL_SECONDS)
+            except Exception as e:
+                logger.warning(f"Validator store no disponible: {e}")
+
+    def forget(self, url: str):
+        self._memory.pop(url, None)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.delete(self.prefix + url)
+            except Exception as e:
+                logger.warning(f"Validator store no disponible: {e}")
+
+
+@dataclass
+class FetchResult:
+    """Resultado de un GET condicional"""
+    url: str
+    status: int
+    text: str = ""
+    not_modified: bool = False
+    validators: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SourceStats:
+    """Throughput de una fuente durante una corrida"""
+    source: str
+    pages_fetched: int = 0
+    pages_not_modified: int = 0
+    pages_rendered: int = 0
+    listings: int = 0
+    bytes: int = 0
+    errors: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    elapsed_seconds: float = 0.0
+
+    def finish(self):
+        self.elapsed_seconds = time.monotonic() - self.started_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop('started_at')
+        elapsed = self.elapsed_seconds or (time.monotonic() - self.started_at)
+        data['pages_per_second'] = round((self.pages_fetched + self.pages_not_modified) / elapsed, 3) if elapsed else 0.0
+        data['listings_per_second'] = round(self.listings / elapsed, 3) if elapsed else 0.0
+        return data
+
+
+class BrowserPool:
+    """Pool de drivers Selenium headless; las llamadas bloqueantes corren en un executor"""
+
+    def __init__(self, size: int = 2, page_timeout: float = 10.0):
+        self.size = size
+        self.page_timeout = page_timeout
+        self._available: asyncio.Queue = asyncio.Queue()
+        self._drivers: List[Any] = []
+        # Un slot por driver en uso: se toma antes de cualquier await, así que
+        # llamadas concurrentes nunca crean más de `size` drivers
+        self._slots = asyncio.Semaphore(size)
+
+    def _create_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        return webdriver.Chrome(options=chrome_options)
+
+    async def _acquire(self):
+        await self._slots.acquire()
+        try:
+            if not self._available.empty():
+                return self._available.get_nowait()
+            loop = asyncio.get_running_loop()
+            driver = await loop.run_in_executor(None, self._create_driver)
+            self._drivers.append(driver)
+            return driver
+        except BaseException:
+            self._slots.release()  # si la creación falla, el slot queda para otro
+            raise
+
+    def _release(self, driver):
+        self._available.put_nowait(driver)
+        self._slots.release()
+
+    async def render(self, url: str, wait_css: str) -> str:
+        """HTML renderizado, esperando el selector de listings en vez de un sleep fijo"""
+        driver = await self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._render_sync, driver, url, wait_css)
+        finally:
+            self._release(driver)
+
+    def _render_sync(self, driver, url: str, wait_css: str) -> str:
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver.get(url)
+        try:
+            WebDriverWait(driver, self.page_timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, wait_css))
+            )
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        except TimeoutException:
+            logger.warning(f"Timeout esperando '{wait_css}' en {url}")
+        return driver.page_source
+
+    def close(self):
+        for driver in self._drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.warning(f"Error cerrando driver: {e}")
+        self._drivers.clear()
+
+
+def find_next_page(html: str, url: str) -> Optional[str]:
+    """URL absoluta de la siguiente página, si existe"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for selector in NEXT_PAGE_SELECTORS:
+        link = soup.select_one(selector)
+        if link is not None and link.get('href'):
+            return urljoin(url, link['href'])
+    return None
+
+
+class CrawlScheduler:
+    """Crawl concurrente y rate-limited de fuentes paginadas"""
+
+    def __init__(self, session: aiohttp.ClientSession, rate_limiter: HostRateLimiter,
+                 validators: ValidatorStore, concurrency: int = 8, max_pages: int = 20,
+                 browser_pool: Optional[BrowserPool] = None):
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.validators = validators
+        self.max_pages = max_pages
+        self.browser_pool = browser_pool
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.stats: Dict[str, SourceStats] = {}
+
+    async def fetch(self, url: str) -> FetchResult:
+        """GET condicional con rate limit por host"""
+        validators = self.validators.get(url)
+        headers = {}
+        # Sin el cuerpo guardado un 304 no tendría listings que re-emitir: GET completo
+        if validators.get('body') is not None:
+            if validators.get('etag'):
+                headers['If-None-Match'] = validators['etag']
+            if validators.get('last_modified'):
+                headers['If-Modified-Since'] = validators['last_modified']
+
+        await self.rate_limiter.acquire(url)
+        async with self._semaphore:
+            async with self.session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    return FetchResult(url, 304, text=validators['body'], not_modified=True, validators=validators)
+                text = await response.text() if response.status == 200 else ""
+                return FetchResult(url, response.status, text=text, validators={
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                })
+
+    async def crawl(self, source: str, start_urls: List[str], parse: Callable[[str, str], List[Any]],
+                    render_css: Optional[str] = None) -> List[Any]:
+        """
+        Recorrer cada URL inicial y su paginación. `parse(html, url)` devuelve los listings
+        de una página; si el HTML estático no trae ninguno y hay `render_css`, la página se
+        renderiza con el pool de navegadores.
+        """
+        stats = SourceStats(source)
+        self.stats[source] = stats
+
+        chains = await asyncio.gather(
+            *(self._crawl_chain(stats, url, parse, render_css) for url in start_urls)
+        )
+        stats.finish()
+        logger.info(f"Crawl {source}: {stats.as_dict()}")
+        return [item for chain in chains for item in chain]
+
+    async def _crawl_chain(self, stats: SourceStats, url: Optional[str],
+                           parse: Callable[[str, str], List[Any]],
+                           render_css: Optional[str]) -> List[Any]:
+        items: List[Any] = []
+        visited = set()
+
+        while url and url not in visited and len(visited) < self.max_pages:
+            visited.add(url)
+            try:
+                result = await self.fetch(url)
+            except Exception as e:
+                stats.errors += 1
+                logger.warning(f"Error descargando {url}: {e}")
+                break
+
+            if result.not_modified:
+                # Sin cambios, pero los listings siguen publicados: se re-emiten desde el cuerpo guardado
+                stats.pages_not_modified += 1
+                page_items = parse(result.text, url)
+                items.extend(page_items)
+                stats.listings += len(page_items)
+                url = result.validators.get('next_url')
+                continue
+
+            if result.status != 200:
+                stats.errors += 1
+                logger.warning(f"{url} respondió {result.status}")
+                break
+
+            stats.pages_fetched += 1
+            stats.bytes += len(result.text)
+            html = result.text
+            page_items = parse(html, url)
+
+            if not page_items and render_css and self.browser_pool is not None:
+                try:
+                    html = await self.browser_pool.render(url, render_css)
+                    stats.pages_rendered += 1
+                    page_items = parse(html, url)
+                except Exception as e:
+                    stats.errors += 1
+                    logger.warning(f"Error renderizando {url}: {e}")
+
+            next_url = find_next_page(html, url)
+            has_validators = result.validators.get('etag') or result.validators.get('last_modified')
+            if html is result.text and has_validators:
+                self.validators.set(url, {**result.validators, 'next_url': next_url, 'body': html})
+            else:
+                # Sin validadores, o el contenido depende de JS (el shell estático no sirve)
+                self.validators.forget(url)
+
+            items.extend(page_items)
+            stats.listings += len(page_items)
+            url = next_url
+
+        return items
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+OKLA Pricing Dashboard - ML Service Client
+==========================================
+
+Acceso al servicio de pricing desde el dashboard:
+
+- Una sola `requests.Session` por proceso (keep-alive + pool de conexiones)
+  compartida por todas las sesiones de Streamlit
+- Predicciones cacheadas por (vehículo, versión del modelo): el mismo análisis
+  repetido por varios analistas no vuelve a llamar al servicio, y una versión
+  nueva del modelo invalida el cache
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+ML_SERVICE_URL = os.getenv('ML_SERVICE_URL', 'http://pricing-ml-service:8080')
+HTTP_POOL_SIZE = int(os.getenv('DASHBOARD_HTTP_POOL_SIZE', '20'))
+REQUEST_TIMEOUT = (3.05, 30)
+PREDICTION_CACHE_TTL_SECONDS = int(os.getenv('DASHBOARD_PREDICTION_TTL_SECONDS', '3600'))
+MODEL_VERSION_TTL_SECONDS = int(os.getenv('DASHBOARD_VERSION_TTL_SECONDS', '30'))
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Session compartida por todas las sesiones del dashboard"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+@st.cache_data(ttl=MODEL_VERSION_TTL_SECONDS, show_spinner=False)
+def model_version() -> str:
+    """Versión del modelo activo (health check; 'unknown' si el servicio no la expone)"""
+    try:
+        response = get_session().get(f"{ML_SERVICE_URL}/api/pricing/health", timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return str(response.json().get('model_version', 'unknown'))
+    except (requests.RequestException, ValueError):
+        return 'unknown'
+
+
+def predict(vehicle: Dict[str, Any]) -> Dict[str, Any]:
+    """Predicción del servicio ML (lanza requests.HTTPError si responde con error)"""
+    return _predict(tuple(sorted(vehicle.items())), model_version())
+
+
+@st.cache_data(ttl=PREDICTION_CACHE_TTL_SECONDS, max_entries=5000, show_spinner=False)
+def _predict(vehicle_items: tuple, version: str) -> Dict[str, Any]:
+    response = get_session().post(
+        f"{ML_SERVICE_URL}/api/pricing/predict",
+        json=dict(vehicle_items),
+        timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def trigger_retrain() -> Optional[Dict[str, Any]]:
+    """Pedir reentrenamiento (202 = iniciado en el training worker)"""
+    response = get_session().post(f"{ML_SERVICE_URL}/api/pricing/train", timeout=REQUEST_TIMEOUT)
+    return response.json() if response.ok else None
+
+
+def clear_cache():
+    """Invalidar predicciones y versión cacheadas"""
+    model_version.clear()
+    _predict.clear()
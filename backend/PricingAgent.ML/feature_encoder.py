@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+OKLA Pricing Feature Encoder
+============================
+
+Encoder de features precompilado para el modelo de pricing.
+Reemplaza los LabelEncoder que se reajustaban en cada request:
+
+- Tablas de enteros por categoría (make, model, fuel_type, transmission, province)
+  con un bucket explícito para valores desconocidos (código 0)
+- Conjuntos de marcas, ciudades y scores de condición precomputados
+- Calendario (año de referencia, temporada alta) recalculado como máximo una vez por hora
+- Persistido en JSON junto al modelo y versionado con él
+
+Autor: OKLA Development Team
+"""
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+ENCODER_SCHEMA_VERSION = 1
+
+UNKNOWN_CODE = 0
+UNKNOWN_LABEL = 'Unknown'
+
+CATEGORICAL_COLUMNS = ['make', 'model', 'fuel_type', 'transmission', 'province']
+
+FEATURE_COLUMNS = [
+    'year', 'mileage', 'vehicle_age', 'mileage_per_year', 'condition_score',
+    'is_luxury_brand', 'is_reliable_brand', 'is_high_season', 'is_major_city'
+] + [f'{col}_encoded' for col in CATEGORICAL_COLUMNS]
+
+LUXURY_BRANDS = frozenset(['BMW', 'Mercedes-Benz', 'Audi', 'Lexus', 'Acura'])
+RELIABLE_BRANDS = frozenset(['Toyota', 'Honda', 'Nissan', 'Mazda', 'Hyundai'])
+MAJOR_CITIES = frozenset(['Santo Domingo', 'Santiago'])
+HIGH_SEASON_MONTHS = frozenset([11, 12, 1, 2])  # Nov-Feb (temporada alta RD)
+
+CONDITION_SCORES = {
+    'Excelente': 1.0, 'Muy Bueno': 0.8, 'Bueno': 0.6,
+    'Regular': 0.4, 'Malo': 0.2
+}
+DEFAULT_CONDITION_SCORE = 0.6
+
+# Campos del vehículo que consume el encoder (y que forman la clave del cache de predicciones)
+INPUT_FIELDS = ('make', 'model', 'year', 'mileage', 'fuel_type', 'transmission', 'condition', 'province')
+
+
+class FeatureEncoder:
+    """Convierte vehículos en vectores de features con lookups de diccionario"""
+
+    def __init__(self, vocabularies: Dict[str, Dict[str, int]], model_version: str = "unversioned"):
+        self.vocabularies = vocabularies
+        self.model_version = model_version
+        self._calendar_expires_at = 0.0
+        self._reference_year = 0
+        self._is_high_season = 0.0
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, model_version: str = "unversioned") -> "FeatureEncoder":
+        """Construir vocabularios a partir del dataset de entrenamiento"""
+        vocabularies = {}
+        for col in CATEGORICAL_COLUMNS:
+            values = sorted(
+                {str(v).strip() for v in df[col].dropna().unique()} - {UNKNOWN_LABEL, ''}
+            ) if col in df else []
+            # Código 0 reservado para valores desconocidos
+            vocabularies[col] = {value: code for code, value in enumerate(values, start=1)}
+        return cls(vocabularies, model_version)
+
+    # ------------------------------------------------------------------
+    # Calendario
+    # ------------------------------------------------------------------
+    def _refresh_calendar(self):
+        """Recalcular año de referencia y temporada alta como máximo una vez por hora"""
+        now = time.time()
+        if now < self._calendar_expires_at:
+            return
+        today = datetime.now()
+        self._reference_year = today.year
+        self._is_high_season = 1.0 if today.month in HIGH_SEASON_MONTHS else 0.0
+        self._calendar_expires_at = now + 3600
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+    def encode_row(self, vehicle: Mapping[str, Any]) -> np.ndarray:
+        """Vector de features para un solo vehículo (sin pandas)"""
+        self._refresh_calendar()
+        return np.array(self._row_values(vehicle), dtype=np.float32)
+
+    def encode_rows(self, vehicles: Iterable[Mapping[str, Any]]) -> np.ndarray:
+        """Matriz de features para varios vehículos (sin pandas)"""
+        self._refresh_calendar()
+        rows = [self._row_values(vehicle) for vehicle in vehicles]
+        if not rows:
+            return np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32)
+        return np.array(rows, dtype=np.float32)
+
+    def _row_values(self, vehicle: Mapping[str, Any]) -> List[float]:
+        vehicle = normalize_vehicle(vehicle)
+        year = vehicle['year']
+        mileage = vehicle['mileage']
+        year = float(year) if year is not None else np.nan
+        mileage = float(mileage) if mileage is not None else np.nan
+
+        vehicle_age = self._reference_year - year
+        make = vehicle['make']
+        province = vehicle['province']
+
+        return [
+            year,
+            mileage,
+            vehicle_age,
+            mileage / (vehicle_age + 1) if vehicle_age != -1 else np.nan,
+            CONDITION_SCORES.get(vehicle['condition'], DEFAULT_CONDITION_SCORE),
+            1.0 if make in LUXURY_BRANDS else 0.0,
+            1.0 if make in RELIABLE_BRANDS else 0.0,
+            self._is_high_season,
+            1.0 if province in MAJOR_CITIES else 0.0,
+        ] + [
+            self.vocabularies[col].get(vehicle[col], UNKNOWN_CODE)
+            for col in CATEGORICAL_COLUMNS
+        ]
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """Matriz de features vectorizada para un DataFrame (entrenamiento / lotes grandes)"""
+        self._refresh_calendar()
+        n = len(df)
+
+        def column(name):
+            return df[name] if name in df else pd.Series([None] * n, index=df.index)
+
+        def text(name):
+            # Misma normalización que normalize_vehicle (strings sin espacios)
+            return column(name).astype('string').str.strip()
+
+        year = pd.to_numeric(column('year'), errors='coerce').to_numpy(dtype=np.float64)
+        mileage = pd.to_numeric(column('mileage'), errors='coerce').to_numpy(dtype=np.float64)
+        vehicle_age = self._reference_year - year
+        make = text('make')
+        province = text('province')
+
+        X = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float32)
+        X[:, 0] = year
+        X[:, 1] = mileage
+        X[:, 2] = vehicle_age
+        with np.errstate(divide='ignore', invalid='ignore'):
+            X[:, 3] = np.where(vehicle_age != -1, mileage / (vehicle_age + 1), np.nan)
+        condition = text('condition').map(CONDITION_SCORES).astype('Float64')
+        X[:, 4] = condition.fillna(DEFAULT_CONDITION_SCORE).to_numpy(dtype=np.float32)
+        X[:, 5] = make.isin(LUXURY_BRANDS).fillna(False).to_numpy(dtype=bool)
+        X[:, 6] = make.isin(RELIABLE_BRANDS).fillna(False).to_numpy(dtype=bool)
+        X[:, 7] = self._is_high_season
+        X[:, 8] = province.isin(MAJOR_CITIES).fillna(False).to_numpy(dtype=bool)
+
+        for offset, col in enumerate(CATEGORICAL_COLUMNS, start=9):
+            values = text(col)
+            X[:, offset] = values.map(self.vocabularies[col]).fillna(UNKNOWN_CODE).to_numpy(dtype=np.float32)
+
+        return X
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'schema_version': ENCODER_SCHEMA_VERSION,
+            'model_version': self.model_version,
+            'feature_columns': FEATURE_COLUMNS,
+            'unknown_code': UNKNOWN_CODE,
+            'vocabularies': self.vocabularies
+        }
+
+    def save(self, path: Path):
+        path = Path(path)
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, expected_version: Optional[str] = None) -> "FeatureEncoder":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data.get('schema_version') != ENCODER_SCHEMA_VERSION:
+            raise ValueError(f"Versión de esquema del encoder no soportada: {data.get('schema_version')}")
+        if data.get('feature_columns') != FEATURE_COLUMNS:
+            raise ValueError("Las columnas del encoder no coinciden con FEATURE_COLUMNS")
+        if expected_version is not None and data.get('model_version') != expected_version:
+            raise ValueError(
+                f"Encoder versión {data.get('model_version')} no corresponde al modelo {expected_version}"
+            )
+
+        return cls(data['vocabularies'], data.get('model_version', 'unversioned'))
+
+
+def normalize_vehicle(vehicle: Mapping[str, Any]) -> Dict[str, Any]:
+    """Valores exactos que consume el encoder, en orden de INPUT_FIELDS (strings sin espacios)"""
+    return {field: _clean(vehicle.get(field)) for field in INPUT_FIELDS}
+
+
+def _clean(value: Any) -> Optional[str]:
+    return value.strip() if isinstance(value, str) else value
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+OKLA Pricing Inference Pool
+===========================
+
+Ejecución de inferencia fuera del event loop de FastAPI:
+
+- Pool de threads dedicado y acotado (workers + máximo de trabajos pendientes);
+  cuando se llena, la request se rechaza en vez de encolar sin límite
+- Coalescing: requests idénticas concurrentes comparten una sola computación
+- Métricas Prometheus: tiempo en cola vs tiempo de cómputo, profundidad de cola,
+  requests coalescidas y rechazadas (expuestas en /metrics)
+
+Autor: OKLA Development Team
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+PROM_QUEUE_TIME = Histogram(
+    "okla_pricing_inference_queue_seconds",
+    "Tiempo de espera en cola antes de ejecutar la inferencia",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+PROM_COMPUTE_TIME = Histogram(
+    "okla_pricing_inference_compute_seconds",
+    "Tiempo de cómputo de la inferencia en el pool",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+    registry=REGISTRY,
+)
+PROM_QUEUE_DEPTH = Gauge(
+    "okla_pricing_inference_pending",
+    "Trabajos de inferencia en cola o en ejecución",
+    registry=REGISTRY,
+)
+PROM_COALESCED = Counter(
+    "okla_pricing_requests_coalesced_total",
+    "Requests resueltas con la computación de otra request idéntica en curso",
+    registry=REGISTRY,
+)
+PROM_REJECTED = Counter(
+    "okla_pricing_inference_rejected_total",
+    "Trabajos rechazados por pool lleno",
+    registry=REGISTRY,
+)
+
+
+def default_threads_per_worker(workers: int) -> int:
+    """Threads de XGBoost por worker para no sobre-suscribir los cores"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+class InferencePoolFull(RuntimeError):
+    """El pool alcanzó el máximo de trabajos pendientes"""
+
+
+class InferencePool:
+    """Pool de threads acotado para inferencia CPU-bound"""
+
+    def __init__(self, workers: int = 2, max_pending: int = 1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pricing-inference")
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, operation: str, fn: Callable[..., Any], *args) -> Any:
+        """Ejecutar `fn(*args)` en el pool midiendo cola y cómputo por separado"""
+        if self._pending >= self.max_pending:
+            PROM_REJECTED.inc()
+            raise InferencePoolFull(f"Pool de inferencia lleno ({self._pending} pendientes)")
+
+        submitted_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            PROM_QUEUE_TIME.labels(operation).observe(started_at - submitted_at)
+            try:
+                return fn(*args)
+            finally:
+                PROM_COMPUTE_TIME.labels(operation).observe(time.perf_counter() - started_at)
+
+        self._pending += 1
+        PROM_QUEUE_DEPTH.set(self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, job)
+        finally:
+            self._pending -= 1
+            PROM_QUEUE_DEPTH.set(self._pending)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RequestCoalescer:
+    """Une requests idénticas concurrentes en una sola computación"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._in_flight.get(key)
+        if future is not None:
+            PROM_COALESCED.inc()
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await factory()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # marcar como recuperada si no hay otras requests esperando
+            raise
+        finally:
+            self._in_flight.pop(key, None)
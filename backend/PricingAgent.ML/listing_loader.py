@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+OKLA Scraped Listings Loader
+============================
+
+Carga masiva de listings scrapeados en `scraped_vehicles` sin duplicados:
+
+1. COPY del lote a una tabla staging temporal
+2. INSERT ... ON CONFLICT (fingerprint) DO UPDATE sobre la tabla principal
+3. Historial de precios: cada cambio de precio de un listing existente queda
+   en `scraped_vehicle_price_history`
+
+El fingerprint es estable por listing: md5(source|url) si hay URL, si no
+md5(source|make|model|year|precio redondeado). El redondeo es el de
+`round(price::numeric)` en Postgres (.5 lejos de cero) en SQL y en Python.
+`first_seen` se conserva y `last_seen` avanza en cada corrida que vuelve a
+ver el listing (nunca retroceden, aunque se re-cargue un snapshot viejo).
+
+La migración de filas legacy (backfill + dedupe) corre solo si el índice
+único no existe o quedan filas sin fingerprint; el chequeo usa el índice.
+
+Autor: OKLA Development Team
+"""
+
+import hashlib
+import io
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, FrozenSet, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "scraped_vehicles"
+PRICE_HISTORY_TABLE = "scraped_vehicle_price_history"
+
+LISTING_COLUMNS = [
+    'fingerprint', 'source', 'make', 'model', 'year', 'price', 'currency', 'mileage',
+    'location', 'condition', 'fuel_type', 'transmission', 'description', 'images',
+    'url', 'scraped_at', 'first_seen', 'last_seen'
+]
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+    fingerprint TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    make TEXT,
+    model TEXT,
+    year INTEGER,
+    price DOUBLE PRECISION,
+    currency TEXT,
+    mileage INTEGER,
+    location TEXT,
+    condition TEXT,
+    fuel_type TEXT,
+    transmission TEXT,
+    description TEXT,
+    images TEXT,
+    url TEXT,
+    scraped_at TIMESTAMP,
+    first_seen TIMESTAMP,
+    last_seen TIMESTAMP
+);
+
+-- Tablas creadas por el loader anterior (df.to_sql append): agregar columnas nuevas
+ALTER TABLE {TABLE_NAME} ADD COLUMN IF NOT EXISTS fingerprint TEXT;
+ALTER TABLE {TABLE_NAME} ADD COLUMN IF NOT EXISTS first_seen TIMESTAMP;
+ALTER TABLE {TABLE_NAME} ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP;
+
+CREATE TABLE IF NOT EXISTS {PRICE_HISTORY_TABLE} (
+    fingerprint TEXT NOT NULL,
+    price DOUBLE PRECISION NOT NULL,
+    currency TEXT,
+    observed_at TIMESTAMP NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_{PRICE_HISTORY_TABLE}_fingerprint
+    ON {PRICE_HISTORY_TABLE} (fingerprint, observed_at);
+"""
+
+# Misma fórmula que listing_fingerprint(), para migrar filas legacy en SQL
+LEGACY_BACKFILL_SQL = f"""
+UPDATE {TABLE_NAME}
+SET fingerprint = CASE
+        WHEN COALESCE(url, '') <> '' THEN md5(source || '|' || url)
+        ELSE md5(concat_ws('|', source, lower(btrim(make)), lower(btrim(model)),
+                           year::bigint::text, round(price::numeric)::bigint::text))
+    END,
+    first_seen = COALESCE(first_seen, scraped_at),
+    last_seen = COALESCE(last_seen, scraped_at)
+WHERE fingerprint IS NULL;
+
+-- Queda exactamente una fila por fingerprint (la más reciente; last_seen NULL pierde
+-- y ctid desempata), si no CREATE UNIQUE INDEX falla con los duplicados restantes
+DELETE FROM {TABLE_NAME}
+WHERE ctid IN (
+    SELECT ctid FROM (
+        SELECT ctid, row_number() OVER (
+            PARTITION BY fingerprint ORDER BY last_seen DESC NULLS LAST, ctid DESC
+        ) AS rn
+        FROM {TABLE_NAME}
+    ) ranked
+    WHERE rn > 1
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_{TABLE_NAME}_fingerprint ON {TABLE_NAME} (fingerprint);
+CREATE INDEX IF NOT EXISTS ix_{TABLE_NAME}_last_seen ON {TABLE_NAME} (last_seen);
+"""
+
+# Barato una vez migrada la tabla: `fingerprint IS NULL` se resuelve con el índice único
+LEGACY_PENDING_SQL = f"""
+SELECT to_regclass('ux_{TABLE_NAME}_fingerprint') IS NULL
+    OR EXISTS (SELECT 1 FROM {TABLE_NAME} WHERE fingerprint IS NULL)
+"""
+
+# Dos procesos arrancando a la vez no repiten la migración
+LEGACY_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('scraped_vehicles_legacy_backfill'))"
+
+# Una sola sentencia: el historial lee los precios previos al upsert (mismo snapshot)
+# y cada fila devuelta dice si el listing es nuevo o cambió de precio
+UPSERT_SQL = f"""
+WITH repriced AS (
+    INSERT INTO {PRICE_HISTORY_TABLE} (fingerprint, price, currency, observed_at)
+    SELECT s.fingerprint, s.price, s.currency, s.last_seen
+    FROM scraped_vehicles_staging s
+    JOIN {TABLE_NAME} t ON t.fingerprint = s.fingerprint
+    WHERE t.price IS DISTINCT FROM s.price
+    RETURNING fingerprint
+), upserted AS (
+    INSERT INTO {TABLE_NAME} ({', '.join(LISTING_COLUMNS)})
+    SELECT {', '.join(LISTING_COLUMNS)} FROM scraped_vehicles_staging
+    ON CONFLICT (fingerprint) DO UPDATE SET
+        price = EXCLUDED.price,
+        currency = EXCLUDED.currency,
+        mileage = COALESCE(EXCLUDED.mileage, {TABLE_NAME}.mileage),
+        location = COALESCE(EXCLUDED.location, {TABLE_NAME}.location),
+        condition = COALESCE(EXCLUDED.condition, {TABLE_NAME}.condition),
+        fuel_type = COALESCE(EXCLUDED.fuel_type, {TABLE_NAME}.fuel_type),
+        transmission = COALESCE(EXCLUDED.transmission, {TABLE_NAME}.transmission),
+        description = COALESCE(EXCLUDED.description, {TABLE_NAME}.description),
+        images = EXCLUDED.images,
+        scraped_at = EXCLUDED.scraped_at,
+        -- Re-cargar un snapshot viejo no mueve las fechas hacia atrás
+        first_seen = LEAST({TABLE_NAME}.first_seen, EXCLUDED.first_seen),
+        last_seen = GREATEST({TABLE_NAME}.last_seen, EXCLUDED.last_seen)
+    RETURNING fingerprint, (xmax = 0) AS inserted
+)
+SELECT u.fingerprint, u.inserted, r.fingerprint IS NOT NULL AS repriced
+FROM upserted u
+LEFT JOIN repriced r ON r.fingerprint = u.fingerprint;
+"""
+
+
+@dataclass
+class LoadReport:
+    """Resultado de una carga"""
+    rows: int
+    inserted: int
+    updated: int
+    seconds: float
+    repriced: int = 0
+    # Listings nuevos o con precio distinto: lo único que vale la pena agregar al training store
+    changed: FrozenSet[str] = field(default_factory=frozenset, repr=False)
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.rows / self.seconds, 1) if self.seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        report = asdict(self)
+        report.pop('changed')
+        return {**report, 'rows_per_second': self.rows_per_second}
+
+
+def listing_fingerprint(source: str, url: Optional[str], make: Any, model: Any,
+                        year: Any, price: Any) -> str:
+    """Identidad estable del listing (ver LEGACY_BACKFILL_SQL para la versión SQL)"""
+    if url:
+        key = f"{source}|{url}"
+    else:
+        key = '|'.join([
+            str(source), str(make).strip().lower(), str(model).strip().lower(),
+            str(int(year)), str(round_price(price))
+        ])
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def batch_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """listing_fingerprint() de cada fila de un DataFrame de listings"""
+    urls = df['url'].fillna('') if 'url' in df else pd.Series('', index=df.index)
+    return pd.Series([
+        listing_fingerprint(source, url, make, model, year, price)
+        for source, url, make, model, year, price
+        in zip(df['source'], urls, df['make'], df['model'], df['year'], df['price'])
+    ], index=df.index, dtype=object)
+
+
+def round_price(price: Any) -> int:
+    """Igual que round(price::numeric) en Postgres: cast con 15 dígitos significativos, .5 lejos de cero"""
+    return int(Decimal(f"{float(price):.15g}").quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+class ScrapedListingLoader:
+    """COPY a staging + upsert por fingerprint sobre scraped_vehicles"""
+
+    def __init__(self, db_engine):
+        self.db_engine = db_engine
+        self._schema_ready = False
+
+    def ensure_schema(self):
+        """Crear/migrar tablas e índices (una vez por proceso; el backfill legacy solo si hace falta)"""
+        if self._schema_ready:
+            return
+        with self.db_engine.begin() as connection:
+            connection.exec_driver_sql(SCHEMA_SQL)
+            connection.exec_driver_sql(LEGACY_LOCK_SQL)
+            if connection.exec_driver_sql(LEGACY_PENDING_SQL).scalar():
+                logger.info(f"{TABLE_NAME}: migrando filas legacy (fingerprint + dedupe)")
+                connection.exec_driver_sql(LEGACY_BACKFILL_SQL)
+        self._schema_ready = True
+
+    def load(self, df: pd.DataFrame) -> LoadReport:
+        """Upsert de un lote de listings (columnas de ScrapedVehicle)"""
+        start = time.perf_counter()
+        if df.empty:
+            return LoadReport(rows=0, inserted=0, updated=0, seconds=0.0)
+
+        self.ensure_schema()
+        batch = self._prepare_batch(df)
+
+        connection = self.db_engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TEMP TABLE scraped_vehicles_staging "
+                    f"(LIKE {TABLE_NAME} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+
+                buffer = io.StringIO()
+                batch.to_csv(buffer, index=False, header=False)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY scraped_vehicles_staging ({', '.join(LISTING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+
+                cursor.execute(UPSERT_SQL)
+                results = cursor.fetchall()
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+        inserted = sum(1 for _, is_insert, _ in results if is_insert)
+        report = LoadReport(
+            rows=len(batch),
+            inserted=inserted,
+            updated=len(results) - inserted,
+            seconds=round(time.perf_counter() - start, 3),
+            repriced=sum(1 for _, _, is_repriced in results if is_repriced),
+            changed=frozenset(fp for fp, is_insert, is_repriced in results if is_insert or is_repriced)
+        )
+        logger.info(
+            f"{TABLE_NAME}: {report.inserted} nuevos, {report.updated} actualizados "
+            f"({report.repriced} con cambio de precio, {report.rows_per_second} filas/s)"
+        )
+        return report
+
+    def _prepare_batch(self, df: pd.DataFrame) -> pd.DataFrame:
+        batch = df.copy()
+        for col in LISTING_COLUMNS:
+            if col not in batch:
+                batch[col] = None
+
+        batch['url'] = batch['url'].fillna('')
+        batch['fingerprint'] = batch_fingerprints(batch)
+        batch['scraped_at'] = pd.to_datetime(batch['scraped_at']).fillna(pd.Timestamp.now())
+        batch['first_seen'] = batch['scraped_at']
+        batch['last_seen'] = batch['scraped_at']
+        batch['images'] = batch['images'].map(lambda images: json.dumps(images or []))
+        batch['mileage'] = pd.to_numeric(batch['mileage'], errors='coerce').astype('Int64')
+        batch['year'] = batch['year'].astype('Int64')
+
+        # ON CONFLICT no admite dos filas del mismo lote con la misma clave
+        batch = batch.sort_values('scraped_at').drop_duplicates('fingerprint', keep='last')
+        return batch[LISTING_COLUMNS]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+OKLA Market Rollups
+===================
+
+Agregados diarios materializados por make/model sobre `scraped_vehicles`
+(cantidad, media, percentiles, mín/máx en DOP), en la tabla `market_daily_stats`.
+
+- Mantenimiento incremental: después de cada carga solo se recalculan los
+  grupos (día, make, model) tocados por el lote
+- Los días cerrados no se recalculan: con el upsert por fingerprint un listing
+  re-visto mueve su last_seen a hoy, así que el snapshot del día queda congelado
+- El dashboard y get_market_summary leen de aquí en vez de agrupar la tabla cruda
+
+Autor: OKLA Development Team
+"""
+
+import logging
+import time
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLE = "market_daily_stats"
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    day DATE NOT NULL,
+    make TEXT NOT NULL,
+    model TEXT NOT NULL,
+    listings INTEGER NOT NULL,
+    mean_price DOUBLE PRECISION,
+    p10_price DOUBLE PRECISION,
+    p25_price DOUBLE PRECISION,
+    p50_price DOUBLE PRECISION,
+    p75_price DOUBLE PRECISION,
+    p90_price DOUBLE PRECISION,
+    min_price DOUBLE PRECISION,
+    max_price DOUBLE PRECISION,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (day, make, model)
+);
+CREATE INDEX IF NOT EXISTS ix_{ROLLUP_TABLE}_make_day ON {ROLLUP_TABLE} (make, day);
+CREATE INDEX IF NOT EXISTS ix_{ROLLUP_TABLE}_updated_at ON {ROLLUP_TABLE} (updated_at);
+"""
+
+_AGGREGATE_SELECT = """
+    SELECT
+        v.last_seen::date AS day,
+        v.make,
+        v.model,
+        COUNT(*) AS listings,
+        AVG(v.price_dop) AS mean_price,
+        percentile_cont(0.10) WITHIN GROUP (ORDER BY v.price_dop) AS p10_price,
+        percentile_cont(0.25) WITHIN GROUP (ORDER BY v.price_dop) AS p25_price,
+        percentile_cont(0.50) WITHIN GROUP (ORDER BY v.price_dop) AS p50_price,
+        percentile_cont(0.75) WITHIN GROUP (ORDER BY v.price_dop) AS p75_price,
+        percentile_cont(0.90) WITHIN GROUP (ORDER BY v.price_dop) AS p90_price,
+        MIN(v.price_dop) AS min_price,
+        MAX(v.price_dop) AS max_price,
+        NOW() AS updated_at
+    FROM (
+        SELECT last_seen, make, model,
+               CASE WHEN currency = 'USD' THEN price * %(usd_to_dop_rate)s ELSE price END AS price_dop
+        FROM scraped_vehicles
+        WHERE last_seen >= %(since)s AND last_seen < %(until)s AND price > 0
+    ) v
+    {key_filter}
+    GROUP BY v.last_seen::date, v.make, v.model
+"""
+
+_UPSERT_SUFFIX = """
+ON CONFLICT (day, make, model) DO UPDATE SET
+    listings = EXCLUDED.listings,
+    mean_price = EXCLUDED.mean_price,
+    p10_price = EXCLUDED.p10_price,
+    p25_price = EXCLUDED.p25_price,
+    p50_price = EXCLUDED.p50_price,
+    p75_price = EXCLUDED.p75_price,
+    p90_price = EXCLUDED.p90_price,
+    min_price = EXCLUDED.min_price,
+    max_price = EXCLUDED.max_price,
+    updated_at = EXCLUDED.updated_at
+"""
+
+REFRESH_GROUPS_SQL = f"INSERT INTO {ROLLUP_TABLE} " + _AGGREGATE_SELECT.format(
+    key_filter="JOIN unnest(%(makes)s::text[], %(models)s::text[]) AS k(make, model) "
+               "ON k.make = v.make AND k.model = v.model"
+) + _UPSERT_SUFFIX
+
+REBUILD_SQL = f"INSERT INTO {ROLLUP_TABLE} " + _AGGREGATE_SELECT.format(key_filter="") + _UPSERT_SUFFIX
+
+MARKET_SUMMARY_SQL = f"""
+    SELECT
+        make,
+        model,
+        SUM(mean_price * listings) / NULLIF(SUM(listings), 0) AS avg_price,
+        -- Cada día es un snapshot: un listing visto varios días aparece en cada uno,
+        -- así que el máximo diario es el inventario pico, no el total de la ventana
+        MAX(listings) AS peak_daily_listings,
+        MIN(min_price) AS min_price,
+        MAX(max_price) AS max_price
+    FROM {ROLLUP_TABLE}
+    WHERE day >= CURRENT_DATE - %(days)s
+    GROUP BY make, model
+    ORDER BY peak_daily_listings DESC
+    LIMIT %(limit)s
+"""
+
+
+class MarketRollups:
+    """Mantenimiento y lectura de market_daily_stats"""
+
+    def __init__(self, db_engine, usd_to_dop_rate: float = 58.5):
+        self.db_engine = db_engine
+        self.usd_to_dop_rate = usd_to_dop_rate
+        self._schema_ready = False
+
+    def ensure_schema(self):
+        if self._schema_ready:
+            return
+        with self.db_engine.begin() as connection:
+            connection.exec_driver_sql(SCHEMA_SQL)
+        self._schema_ready = True
+
+    def refresh(self, listings: pd.DataFrame) -> int:
+        """Recalcular solo los grupos (día, make, model) presentes en el lote cargado"""
+        if listings.empty:
+            return 0
+
+        self.ensure_schema()
+        start = time.perf_counter()
+        days = pd.to_datetime(listings['scraped_at']).dt.normalize()
+        groups = 0
+
+        with self.db_engine.begin() as connection:
+            for day, batch in listings.groupby(days):
+                keys = batch[['make', 'model']].drop_duplicates()
+                result = connection.exec_driver_sql(REFRESH_GROUPS_SQL, {
+                    'since': day.to_pydatetime(),
+                    'until': (day + pd.Timedelta(days=1)).to_pydatetime(),
+                    'usd_to_dop_rate': self.usd_to_dop_rate,
+                    'makes': keys['make'].astype(str).tolist(),
+                    'models': keys['model'].astype(str).tolist(),
+                })
+                groups += result.rowcount
+
+        logger.info(f"{ROLLUP_TABLE}: {groups} grupos actualizados en {(time.perf_counter() - start) * 1000:.0f}ms")
+        return groups
+
+    def rebuild(self, since: date, until: Optional[date] = None) -> int:
+        """Reconstruir todos los grupos de un rango de días (carga inicial)"""
+        self.ensure_schema()
+        until = until or date.today()
+        with self.db_engine.begin() as connection:
+            result = connection.exec_driver_sql(REBUILD_SQL, {
+                'since': since,
+                'until': pd.Timestamp(until) + pd.Timedelta(days=1),
+                'usd_to_dop_rate': self.usd_to_dop_rate,
+            })
+        logger.info(f"{ROLLUP_TABLE}: {result.rowcount} grupos reconstruidos desde {since}")
+        return result.rowcount
+
+    def market_summary(self, days: int = 7, limit: int = 50) -> pd.DataFrame:
+        """Resumen por make/model de los últimos `days` días"""
+        self.ensure_schema()
+        return pd.read_sql(MARKET_SUMMARY_SQL, self.db_engine, params={'days': days, 'limit': limit})
+
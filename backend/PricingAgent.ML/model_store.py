@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+OKLA Pricing Model Store
+========================
+
+Persistencia del modelo de pricing en formato nativo de XGBoost (UBJSON)
+con un manifest que lo versiona junto a su feature encoder.
+
+Estructura en disco:
+    models/
+        current.json                    # puntero a la versión activa + historial (rollback)
+        versions/<version>/
+            model_manifest.json         # versión, archivos, checksums, métricas
+            pricing_model.ubj           # booster XGBoost (formato nativo, sin pickle)
+            feature_encoder.json        # vocabularios del FeatureEncoder
+            evaluation.json             # evaluación shadow del candidato (opcional)
+
+Cada versión es inmutable una vez escrita; promover o hacer rollback solo
+reescribe current.json (tmp + rename atómico). El layout plano anterior
+(manifest en models/) y los modelos legacy (pricing_model.joblib) se siguen leyendo.
+
+Autor: OKLA Development Team
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import xgboost as xgb
+
+from feature_encoder import FEATURE_COLUMNS, FeatureEncoder
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "model_manifest.json"
+MODEL_FILE = "pricing_model.ubj"
+ENCODER_FILE = "feature_encoder.json"
+LEGACY_MODEL_FILE = "pricing_model.joblib"
+POINTER_FILE = "current.json"
+VERSIONS_DIR = "versions"
+EVALUATION_FILE = "evaluation.json"
+MAX_POINTER_HISTORY = 10
+
+
+@dataclass
+class ModelManifest:
+    """Metadatos de una versión del modelo"""
+    model_version: str
+    model_file: str
+    encoder_file: str
+    model_sha256: str
+    created_at: str
+    model_format: str = "ubj"
+    xgboost_version: str = xgb.__version__
+    feature_columns: list = field(default_factory=lambda: list(FEATURE_COLUMNS))
+    metrics: Dict[str, float] = field(default_factory=dict)
+
+
+class ModelStore:
+    """Versiones inmutables de modelo + encoder, activadas por un puntero atómico"""
+
+    def __init__(self, model_path: Path):
+        self.model_path = Path(model_path)
+        self.model_path.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def manifest_path(self) -> Path:
+        """Manifest del layout plano anterior"""
+        return self.model_path / MANIFEST_FILE
+
+    @property
+    def pointer_path(self) -> Path:
+        return self.model_path / POINTER_FILE
+
+    def version_path(self, version: str) -> Path:
+        return self.model_path / VERSIONS_DIR / version
+
+    def has_model(self) -> bool:
+        return (self.pointer_path.exists() or self.manifest_path.exists()
+                or (self.model_path / LEGACY_MODEL_FILE).exists())
+
+    # ------------------------------------------------------------------
+    # Puntero
+    # ------------------------------------------------------------------
+    def read_pointer(self) -> Dict[str, Any]:
+        if not self.pointer_path.exists():
+            return {}
+        with open(self.pointer_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def current_version(self) -> Optional[str]:
+        pointer = self.read_pointer()
+        if pointer.get('version'):
+            return pointer['version']
+        manifest = self._read_manifest_file(self.manifest_path)
+        return manifest.model_version if manifest else None
+
+    def promote(self, version: str, reason: str = "manual") -> Dict[str, Any]:
+        """Activar una versión; la activa pasa al historial para rollback"""
+        if self._read_manifest_file(self.version_path(version) / MANIFEST_FILE) is None:
+            raise FileNotFoundError(f"Versión {version} no encontrada en {self.model_path / VERSIONS_DIR}")
+
+        pointer = self.read_pointer()
+        current = pointer.get('version')
+        history = pointer.get('history', [])
+        if current and current != version:
+            history = [current] + [v for v in history if v != version]
+
+        new_pointer = {
+            'version': version,
+            'history': history[:MAX_POINTER_HISTORY],
+            'promoted_at': datetime.now().isoformat(),
+            'reason': reason
+        }
+        self._write_json(self.pointer_path, new_pointer)
+        logger.info(f"Modelo {version} promovido ({reason})")
+        return new_pointer
+
+    def rollback(self) -> Dict[str, Any]:
+        """Volver a la versión activa anterior"""
+        pointer = self.read_pointer()
+        history = pointer.get('history', [])
+        if not history:
+            raise ValueError("No hay versión anterior para rollback")
+
+        new_pointer = {
+            'version': history[0],
+            'history': history[1:],
+            'promoted_at': datetime.now().isoformat(),
+            'reason': f"rollback desde {pointer.get('version')}"
+        }
+        self._write_json(self.pointer_path, new_pointer)
+        logger.info(f"Rollback: {pointer.get('version')} -> {history[0]}")
+        return new_pointer
+
+    # ------------------------------------------------------------------
+    # Versiones
+    # ------------------------------------------------------------------
+    def read_manifest(self, version: Optional[str] = None) -> Optional[ModelManifest]:
+        version = version or self.read_pointer().get('version')
+        if version:
+            return self._read_manifest_file(self.version_path(version) / MANIFEST_FILE)
+        return self._read_manifest_file(self.manifest_path)
+
+    def list_versions(self) -> List[ModelManifest]:
+        versions_dir = self.model_path / VERSIONS_DIR
+        if not versions_dir.exists():
+            return []
+        manifests = [self._read_manifest_file(path / MANIFEST_FILE) for path in versions_dir.iterdir()]
+        return sorted((m for m in manifests if m is not None), key=lambda m: m.created_at)
+
+    def save_candidate(self, model: xgb.XGBRegressor, encoder: FeatureEncoder,
+                       metrics: Optional[Dict[str, float]] = None) -> ModelManifest:
+        """Escribir una versión nueva sin activarla; el manifest se escribe al final"""
+        version_dir = self.version_path(encoder.model_version)
+        version_dir.mkdir(parents=True, exist_ok=True)
+
+        model_file = version_dir / MODEL_FILE
+        tmp_model_file = version_dir / f"{MODEL_FILE}.tmp.ubj"
+        model.save_model(tmp_model_file)
+        tmp_model_file.replace(model_file)
+
+        encoder.save(version_dir / ENCODER_FILE)
+
+        manifest = ModelManifest(
+            model_version=encoder.model_version,
+            model_file=MODEL_FILE,
+            encoder_file=ENCODER_FILE,
+            model_sha256=_sha256(model_file),
+            created_at=datetime.now().isoformat(),
+            metrics=metrics or {}
+        )
+        self._write_json(version_dir / MANIFEST_FILE, asdict(manifest))
+        logger.info(f"Modelo {manifest.model_version} guardado en formato nativo ({model_file})")
+        return manifest
+
+    def save(self, model: xgb.XGBRegressor, encoder: FeatureEncoder,
+             metrics: Optional[Dict[str, float]] = None) -> ModelManifest:
+        """Guardar y activar inmediatamente (entrenamiento inline / bootstrap)"""
+        manifest = self.save_candidate(model, encoder, metrics)
+        self.promote(manifest.model_version, reason="entrenamiento inline")
+        return manifest
+
+    def save_evaluation(self, version: str, evaluation: Dict[str, Any]):
+        self._write_json(self.version_path(version) / EVALUATION_FILE, evaluation)
+
+    def prune(self, keep: int = 5) -> List[str]:
+        """Borrar versiones viejas que no están activas ni en el historial de rollback"""
+        pointer = self.read_pointer()
+        protected = {pointer.get('version'), *pointer.get('history', [])}
+        candidates = [m.model_version for m in self.list_versions() if m.model_version not in protected]
+        removed = candidates[:max(0, len(candidates) - keep)]
+        for version in removed:
+            shutil.rmtree(self.version_path(version), ignore_errors=True)
+        return removed
+
+    def load(self, version: Optional[str] = None,
+             verify_checksum: bool = False) -> Tuple[xgb.XGBRegressor, FeatureEncoder, ModelManifest]:
+        """Cargar modelo nativo + encoder (versión activa por defecto)"""
+        version = version or self.read_pointer().get('version')
+        if version:
+            directory = self.version_path(version)
+            manifest = self._read_manifest_file(directory / MANIFEST_FILE)
+            if manifest is None:
+                raise FileNotFoundError(f"Versión {version} no encontrada")
+        elif self.manifest_path.exists():
+            directory = self.model_path
+            manifest = self._read_manifest_file(self.manifest_path)
+        else:
+            manifest = self._migrate_legacy()
+            directory = self.version_path(manifest.model_version)
+
+        model_file = directory / manifest.model_file
+        if verify_checksum and _sha256(model_file) != manifest.model_sha256:
+            raise ValueError(f"Checksum inválido para {model_file}")
+
+        start = time.perf_counter()
+        model = xgb.XGBRegressor()
+        model.load_model(model_file)
+        encoder = FeatureEncoder.load(directory / manifest.encoder_file,
+                                      expected_version=manifest.model_version)
+        logger.info(f"Modelo {manifest.model_version} cargado en {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        return model, encoder, manifest
+
+    def _migrate_legacy(self) -> ModelManifest:
+        """Convertir pricing_model.joblib (pickle) al formato nativo una sola vez"""
+        legacy_file = self.model_path / LEGACY_MODEL_FILE
+        encoder_file = self.model_path / ENCODER_FILE
+        if not legacy_file.exists() or not encoder_file.exists():
+            raise FileNotFoundError(f"No hay modelo persistido en {self.model_path}")
+
+        import joblib
+
+        logger.info(f"Migrando {legacy_file} al formato nativo de XGBoost...")
+        model = joblib.load(legacy_file)
+        encoder = FeatureEncoder.load(encoder_file)
+        return self.save(model, encoder)
+
+    @staticmethod
+    def _read_manifest_file(path: Path) -> Optional[ModelManifest]:
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return ModelManifest(**json.load(f))
+
+    @staticmethod
+    def _write_json(path: Path, payload: Dict[str, Any]):
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(path)
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
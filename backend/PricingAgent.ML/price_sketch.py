@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+OKLA Price Sketches
+===================
+
+Distribuciones de precio por (make, model, year-bucket, province) con t-digest:
+
+- Sketch de cuantiles streaming y mergeable (merging t-digest, escala k1)
+- Memoria acotada por clave: ~compression centroides (pocos KB) sin importar
+  cuántos listings lleguen
+- Jerarquía de claves: (make, model, bucket, province) -> (make, model, bucket, *)
+  -> (make, model, *, *); la consulta usa la más específica con muestras suficientes
+- Persistencia compacta: centroides en float32, base64 dentro de un JSON
+
+Python puro (sin numpy) para que lo use también el servicio simple.
+
+Autor: OKLA Development Team
+"""
+
+import base64
+import json
+import logging
+import math
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SKETCH_SCHEMA_VERSION = 1
+DEFAULT_COMPRESSION = 100.0
+BUFFER_FACTOR = 5
+YEAR_BUCKET_SIZE = 2
+MIN_SAMPLES = 20
+WILDCARD = '*'
+
+_HEADER = struct.Struct('<fdddI')
+
+SketchKey = Tuple[str, str, str, str]
+
+
+class TDigest:
+    """Merging t-digest para cuantiles aproximados de un stream de precios"""
+
+    __slots__ = ('compression', 'count', 'min', 'max', '_means', '_weights', '_buffer')
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means: List[float] = []
+        self._weights: List[float] = []
+        self._buffer: List[Tuple[float, float]] = []
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= BUFFER_FACTOR * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        other._compress()
+        self._buffer.extend(zip(other._means, other._weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self._means, self._weights)) + self._buffer)
+        self._buffer = []
+
+        means, weights = [], []
+        current_mean, current_weight = points[0]
+        weight_so_far = 0.0
+        k_lower = self._k(0.0)
+
+        for mean, weight in points[1:]:
+            q = (weight_so_far + current_weight + weight) / self.count
+            if self._k(q) - k_lower <= 1.0:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                means.append(current_mean)
+                weights.append(current_weight)
+                weight_so_far += current_weight
+                k_lower = self._k(weight_so_far / self.count)
+                current_mean, current_weight = mean, weight
+
+        means.append(current_mean)
+        weights.append(current_weight)
+        self._means, self._weights = means, weights
+
+    def _centers(self) -> List[float]:
+        centers, cumulative = [], 0.0
+        for weight in self._weights:
+            centers.append(cumulative + weight / 2)
+            cumulative += weight
+        return centers
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Valor aproximado en el cuantil q (0..1)"""
+        self._compress()
+        if not self._means:
+            return None
+        if len(self._means) == 1:
+            return self._means[0]
+
+        target = min(max(q, 0.0), 1.0) * self.count
+        centers = self._centers()
+        if target <= centers[0]:
+            return _lerp(self.min, self._means[0], target / centers[0] if centers[0] else 1.0)
+        if target >= centers[-1]:
+            tail = self.count - centers[-1]
+            return _lerp(self._means[-1], self.max, (target - centers[-1]) / tail if tail else 0.0)
+
+        i = bisect_right(centers, target) - 1
+        span = centers[i + 1] - centers[i]
+        return _lerp(self._means[i], self._means[i + 1], (target - centers[i]) / span if span else 0.0)
+
+    def cdf(self, value: float) -> Optional[float]:
+        """Fracción aproximada de precios <= value (percentil / 100)"""
+        self._compress()
+        if not self._means:
+            return None
+        if value <= self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+
+        centers = self._centers()
+        if value <= self._means[0]:
+            span = self._means[0] - self.min
+            rank = centers[0] * ((value - self.min) / span if span else 1.0)
+        elif value >= self._means[-1]:
+            span = self.max - self._means[-1]
+            rank = centers[-1] + (self.count - centers[-1]) * ((value - self._means[-1]) / span if span else 0.0)
+        else:
+            i = bisect_right(self._means, value) - 1
+            span = self._means[i + 1] - self._means[i]
+            rank = centers[i] + (centers[i + 1] - centers[i]) * ((value - self._means[i]) / span if span else 0.0)
+        return rank / self.count
+
+    def to_bytes(self) -> bytes:
+        self._compress()
+        header = _HEADER.pack(self.compression, self.count, self.min, self.max, len(self._means))
+        return header + array('f', self._means).tobytes() + array('f', self._weights).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TDigest":
+        compression, count, min_value, max_value, n = _HEADER.unpack_from(data)
+        digest = cls(compression)
+        digest.count, digest.min, digest.max = count, min_value, max_value
+        offset = _HEADER.size
+        means, weights = array('f'), array('f')
+        means.frombytes(data[offset:offset + 4 * n])
+        weights.frombytes(data[offset + 4 * n:offset + 8 * n])
+        digest._means, digest._weights = list(means), list(weights)
+        return digest
+
+
+class PriceSketchStore:
+    """Sketches de precio (DOP) por segmento, con persistencia y recarga por mtime"""
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.sketches: Dict[SketchKey, TDigest] = {}
+        self.watermark: Optional[str] = None
+        self._lock = threading.Lock()
+        self._loaded_mtime: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.sketches)
+
+    # ------------------------------------------------------------------
+    # Ingesta
+    # ------------------------------------------------------------------
+    def add(self, make: str, model: str, year: Optional[int], province: Optional[str], price_dop: float):
+        with self._lock:
+            for key in _rollup_keys(make, model, year, province):
+                sketch = self.sketches.get(key)
+                if sketch is None:
+                    sketch = self.sketches[key] = TDigest(self.compression)
+                sketch.add(price_dop)
+
+    def add_listings(self, listings: Iterable[Mapping[str, Any]], usd_to_dop_rate: float) -> int:
+        """
+        Agregar listings nuevos (first_seen posterior al watermark). Un listing re-visto
+        por el scraper no vuelve a contarse.
+        """
+        added = 0
+        watermark = self.watermark
+        for listing in listings:
+            first_seen = listing.get('first_seen')
+            if first_seen is None:
+                continue
+            first_seen = first_seen.isoformat() if hasattr(first_seen, 'isoformat') else str(first_seen)
+            if self.watermark is not None and first_seen <= self.watermark:
+                continue
+
+            price = listing.get('price')
+            if not price or price <= 0:
+                continue
+            price_dop = price * usd_to_dop_rate if listing.get('currency') == 'USD' else price
+
+            province = listing.get('location') or listing.get('province')
+            self.add(listing.get('make'), listing.get('model'), listing.get('year'),
+                     province if isinstance(province, str) else None, float(price_dop))
+            watermark = max(watermark or first_seen, first_seen)
+            added += 1
+
+        self.watermark = watermark
+        return added
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def lookup(self, make: str, model: str, year: Optional[int], province: Optional[str],
+               min_samples: int = MIN_SAMPLES) -> Optional[Tuple[SketchKey, TDigest]]:
+        """Segmento más específico (clave, sketch) con al menos `min_samples` precios"""
+        for key in _rollup_keys(make, model, year, province):
+            sketch = self.sketches.get(key)
+            if sketch is not None and sketch.count >= min_samples:
+                return key, sketch
+        return None
+
+    def percentile(self, make: str, model: str, year: Optional[int], province: Optional[str],
+                   price_dop: float) -> Optional[float]:
+        """Percentil (0-100) de un precio dentro de su segmento"""
+        with self._lock:
+            found = self.lookup(make, model, year, province)
+            return None if found is None else round(found[1].cdf(price_dop) * 100, 1)
+
+    def quantiles(self, make: str, model: str, year: Optional[int], province: Optional[str],
+                  qs: Iterable[float] = (0.25, 0.5, 0.75)) -> Optional[Dict[str, Any]]:
+        """Cuantiles del segmento, o None si no hay muestras suficientes"""
+        with self._lock:
+            found = self.lookup(make, model, year, province)
+            if found is None:
+                return None
+            key, sketch = found
+            return {
+                'segment': key,
+                'count': int(sketch.count),
+                'quantiles': {f"p{round(q * 100)}": sketch.quantile(q) for q in qs}
+            }
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+    def save(self, path: Path):
+        path = Path(path)
+        with self._lock:
+            payload = {
+                'schema_version': SKETCH_SCHEMA_VERSION,
+                'watermark': self.watermark,
+                'saved_at': datetime.now().isoformat(),
+                'sketches': {
+                    '|'.join(key): base64.b64encode(sketch.to_bytes()).decode('ascii')
+                    for key, sketch in self.sketches.items()
+                }
+            }
+        tmp_path = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "PriceSketchStore":
+        store = cls()
+        store.reload_if_changed(path)
+        return store
+
+    def reload_if_changed(self, path: Path) -> bool:
+        """Recargar desde disco si el archivo cambió (consumidores de solo lectura)"""
+        path = Path(path)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return False
+        if mtime == self._loaded_mtime:
+            return False
+
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        if payload.get('schema_version') != SKETCH_SCHEMA_VERSION:
+            raise ValueError(f"Versión de esquema de sketches no soportada: {payload.get('schema_version')}")
+
+        sketches = {
+            tuple(key.split('|')): TDigest.from_bytes(base64.b64decode(encoded))
+            for key, encoded in payload['sketches'].items()
+        }
+        with self._lock:
+            self.sketches = sketches
+            self.watermark = payload.get('watermark')
+            self._loaded_mtime = mtime
+        logger.info(f"Sketches de precio cargados: {len(sketches)} segmentos")
+        return True
+
+
+def _rollup_keys(make: Any, model: Any, year: Optional[int], province: Optional[str]) -> List[SketchKey]:
+    make, model = _norm(make), _norm(model)
+    keys = []
+    if year is not None and year == year:  # NaN desde pandas
+        bucket = str(int(year) // YEAR_BUCKET_SIZE * YEAR_BUCKET_SIZE)
+        if province:
+            keys.append((make, model, bucket, _norm(province)))
+        keys.append((make, model, bucket, WILDCARD))
+    keys.append((make, model, WILDCARD, WILDCARD))
+    return keys
+
+
+def _norm(value: Any) -> str:
+    return str(value).strip().lower().replace('|', '/') if value is not None else ''
+
+
+def _lerp(a: float, b: float, t: float) -> float:
+    return a + (b - a) * t
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+OKLA Shadow Traffic Log
+=======================
+
+Muestra de requests reales de pricing para evaluar modelos candidatos en shadow:
+
+- El servicio registra una fracción de los vehículos consultados (SHADOW_SAMPLE_RATE)
+  en un buffer en memoria; el costo por request es un random() y un append
+- Un flush periódico (fuera del event loop) los agrega a un JSONL acotado
+- El training worker lee las últimas N requests y compara modelo activo vs candidato
+
+Autor: OKLA Development Team
+"""
+
+import json
+import logging
+import random
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Mapping
+
+logger = logging.getLogger(__name__)
+
+SHADOW_FIELDS = ('make', 'model', 'year', 'mileage', 'trim', 'fuel_type',
+                 'transmission', 'condition', 'province', 'asking_price')
+
+
+class ShadowTrafficLog:
+    """Buffer muestreado de requests + archivo JSONL con las últimas `max_records`"""
+
+    def __init__(self, path: Path, sample_rate: float = 0.1, max_records: int = 5000):
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.max_records = max_records
+        self._buffer: deque = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, vehicle: Mapping[str, Any]):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        self._buffer.append({field: vehicle.get(field) for field in SHADOW_FIELDS})
+
+    def flush(self) -> int:
+        """Agregar el buffer al archivo; compactar cuando supera 2x max_records"""
+        records = []
+        while self._buffer:
+            records.append(self._buffer.popleft())
+        if not records:
+            return 0
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+            lines = self._read_lines()
+            if len(lines) > 2 * self.max_records:
+                tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.writelines(lines[-self.max_records:])
+                tmp_path.replace(self.path)
+        return len(records)
+
+    def read_recent(self, limit: int = 2000) -> List[Dict[str, Any]]:
+        """Últimas `limit` requests registradas (más recientes al final)"""
+        with self._lock:
+            lines = self._read_lines()[-limit:]
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # línea truncada por un flush interrumpido
+        return records
+
+    def _read_lines(self) -> List[str]:
+        if not self.path.exists():
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.readlines()
@@ -11,18 +11,27 @@ import json
 import logging
 import os
 import random
+import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import uvicorn
 
+from price_sketch import WILDCARD, PriceSketchStore
+from pricing_cache import LRUCache
+from pricing_tables import (
+    COMPETITOR_SPREAD, LOCATION_FACTORS, MILEAGE_FACTORS, SEASONAL_FACTORS, PricingFactorTable
+)
+
 # Configuración básica
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
 @dataclass
 class VehicleData:
     """Datos de vehículo para análisis de pricing"""
@@ -59,54 +68,101 @@ class SimplePricingEngine:
             'Suzuki': 1200000
         }
         
+        # Distribuciones de mercado por segmento (generadas por el servicio avanzado)
+        self.price_sketch_path = os.getenv('PRICE_SKETCH_PATH', 'data/price_sketches.json')
+        self.price_sketches = PriceSketchStore.load(self.price_sketch_path)
+        self.sketch_reload_seconds = float(os.getenv('SKETCH_RELOAD_SECONDS', '10'))
+        self._next_sketch_check = time.monotonic() + self.sketch_reload_seconds
+        
+        # Factores precalculados del día + cuantiles por segmento ya resueltos
+        self.factor_table = PricingFactorTable(self.base_prices)
+        self.segment_cache = LRUCache(maxsize=int(os.getenv('SEGMENT_CACHE_SIZE', '50000')))
+        
         logger.info("SimplePricingEngine inicializado")
     
+    def _current_table(self) -> PricingFactorTable:
+        """Tablas del día; se reconstruyen al cambiar la fecha"""
+        table = self.factor_table
+        if table.expired:
+            table = self.factor_table = PricingFactorTable(self.base_prices)
+            self.segment_cache.clear()
+        return table
+    
+    def _refresh_sketches(self):
+        """Recargar sketches si el archivo cambió (como máximo cada SKETCH_RELOAD_SECONDS)"""
+        now = time.monotonic()
+        if now < self._next_sketch_check:
+            return
+        self._next_sketch_check = now + self.sketch_reload_seconds
+        if self.price_sketches.reload_if_changed(self.price_sketch_path):
+            self.segment_cache.clear()
+    
+    def _segment(self, vehicle: VehicleData) -> Optional[Dict[str, Any]]:
+        key = (vehicle.make, vehicle.model, vehicle.year, vehicle.province)
+        segment = self.segment_cache.get(key, _MISSING)
+        if segment is _MISSING:
+            segment = self.price_sketches.quantiles(vehicle.make, vehicle.model, vehicle.year, vehicle.province)
+            self.segment_cache.set(key, segment)
+        return segment
+    
     def predict_price(self, vehicle: VehicleData) -> Dict[str, Any]:
-        """Predicción simple basada en reglas"""
-        
-        # Precio base por marca
-        base_price = self.base_prices.get(vehicle.make, 1500000)
-        
-        # Factor de depreciación por año
-        current_year = datetime.now().year
-        age = current_year - vehicle.year
-        depreciation_factor = (0.85 ** age)  # 15% anual
-        
-        # Factor por kilometraje
-        mileage_factor = 1.0
-        if vehicle.mileage:
-            if vehicle.mileage < 50000:
-                mileage_factor = 1.1  # +10% por bajo kilometraje
-            elif vehicle.mileage > 150000:
-                mileage_factor = 0.85  # -15% por alto kilometraje
-        
-        # Factor por condición
-        condition_factors = {
-            'Excelente': 1.15,
-            'Muy Bueno': 1.05,
-            'Bueno': 1.0,
-            'Regular': 0.85,
-            'Malo': 0.7
-        }
-        condition_factor = condition_factors.get(vehicle.condition, 1.0)
-        
-        # Factor por ubicación (ciudades principales)
-        location_factor = 1.1 if vehicle.province in ['Santo Domingo', 'Santiago'] else 1.0
+        """Predicción simple basada en reglas (mediana de mercado si hay datos del segmento)"""
+        self._refresh_sketches()
+        return self._predict(vehicle, self._current_table())
+    
+    def predict_batch(self, vehicles: List[VehicleData]) -> List[Dict[str, Any]]:
+        """Predicciones para N vehículos con las mismas tablas (una sola verificación de fecha/sketches)"""
+        self._refresh_sketches()
+        table = self._current_table()
+        return [self._predict(vehicle, table) for vehicle in vehicles]
+    
+    def _predict(self, vehicle: VehicleData, table: PricingFactorTable) -> Dict[str, Any]:
+        segment = self._segment(vehicle)
+        segment_has_year = segment is not None and segment['segment'][2] != WILDCARD
+        segment_has_province = segment is not None and segment['segment'][3] != WILDCARD
         
-        # Factor estacional (temporada alta Nov-Feb)
-        current_month = datetime.now().month
-        seasonal_factor = 1.05 if current_month in [11, 12, 1, 2] else 1.0
+        make_i, age_i, band, condition_i, location = table.indices(
+            vehicle.make, vehicle.year, vehicle.mileage, vehicle.condition, vehicle.province
+        )
+        if segment_has_province:
+            location = 0  # el segmento ya es de la provincia
         
-        # Calcular precio final
-        final_price_dop = base_price * depreciation_factor * mileage_factor * condition_factor * location_factor * seasonal_factor
+        if segment_has_year:
+            # La mediana del segmento ya refleja marca, modelo y año
+            depreciation_factor = 1.0
+            final_price_dop = segment['quantiles']['p50'] * table.adjustment_factor(band, condition_i, location)
+        else:
+            # Precio base por marca, depreciación por año y ajustes (tabla precalculada)
+            depreciation_factor = table.depreciation[age_i]
+            final_price_dop = table.rule_price(make_i, age_i, band, condition_i, location)
         final_price_usd = final_price_dop / self.usd_to_dop_rate
         
-        # Rango de confianza ±15%
-        price_range_min = final_price_dop * 0.85
-        price_range_max = final_price_dop * 1.15
+        # Rango de confianza: dispersión p25-p75 del segmento, ±15% sin datos
+        if segment is not None and segment['quantiles']['p50']:
+            quantiles = segment['quantiles']
+            price_range_min = final_price_dop * min(max(quantiles['p25'] / quantiles['p50'], 0.6), 0.97)
+            price_range_max = final_price_dop * min(max(quantiles['p75'] / quantiles['p50'], 1.03), 1.4)
+        else:
+            price_range_min = final_price_dop * 0.85
+            price_range_max = final_price_dop * 1.15
+        
+        # Determinar posición de mercado (percentil del precio pedido en el segmento)
+        market_percentile = None
+        if vehicle.asking_price and segment is not None:
+            market_percentile = self.price_sketches.percentile(
+                vehicle.make, vehicle.model, vehicle.year, vehicle.province, vehicle.asking_price
+            )
         
-        # Determinar posición de mercado
-        if vehicle.asking_price:
+        if market_percentile is not None:
+            if market_percentile < 20:
+                market_position = "Precio muy bajo - Oportunidad"
+            elif market_percentile < 40:
+                market_position = "Precio competitivo"
+            elif market_percentile < 65:
+                market_position = "Precio de mercado"
+            else:
+                market_position = "Precio alto"
+        elif vehicle.asking_price:
             ratio = final_price_dop / vehicle.asking_price
             if ratio > 1.1:
                 market_position = "Precio muy bajo - Oportunidad"
@@ -126,13 +182,11 @@ class SimplePricingEngine:
         elif vehicle.make in ['BMW', 'Mercedes-Benz']:
             days_to_sell = 45
         
-        if age > 10:
+        if table.age(vehicle.year) > 10:
             days_to_sell += 15
         
-        # Análisis competitivo simulado
-        competitor_prices = [
-            final_price_dop * (0.9 + random.random() * 0.2) for _ in range(5)
-        ]
+        # Análisis competitivo simulado (determinístico: misma entrada, misma respuesta)
+        competitor_prices = [round(final_price_dop * spread, 0) for spread in COMPETITOR_SPREAD]
         
         return {
             'suggested_price_dop': round(final_price_dop, 0),
@@ -141,22 +195,23 @@ class SimplePricingEngine:
             'price_range_min': round(price_range_min, 0),
             'price_range_max': round(price_range_max, 0),
             'market_position': market_position,
+            'market_percentile': market_percentile,
             'days_to_sell': days_to_sell,
             'market_trend': 'Estable',
             'competitive_analysis': {
-                'competitor_prices': [round(p, 0) for p in competitor_prices],
+                'competitor_prices': competitor_prices,
                 'avg_competitor_price': round(sum(competitor_prices) / len(competitor_prices), 0),
-                'competitors_found': 5,
+                'competitors_found': len(competitor_prices),
                 'price_adjustment': 1.0
             },
             'pricing_factors': {
                 'depreciation': depreciation_factor - 1,
-                'mileage': mileage_factor - 1,
-                'condition': condition_factor - 1,
-                'location': location_factor - 1,
-                'seasonal': seasonal_factor - 1
+                'mileage': MILEAGE_FACTORS[band] - 1,
+                'condition': table.condition_factors[condition_i] - 1,
+                'location': LOCATION_FACTORS[location] - 1,
+                'seasonal': SEASONAL_FACTORS[table.season] - 1
             },
-            'model_version': 'Simple v1.0'
+            'model_version': 'Simple v1.1' if segment is not None else 'Simple v1.0'
         }
 
 # FastAPI App
@@ -175,6 +230,9 @@ class PricingRequest(BaseModel):
     province: Optional[str] = None
     asking_price: Optional[float] = None
 
+class BatchPricingRequest(BaseModel):
+    vehicles: List[PricingRequest] = Field(..., min_length=1, max_length=10000)
+
 @app.get("/api/pricing/health")
 async def health_check():
     """Health check del servicio"""
@@ -199,6 +257,23 @@ async def predict_vehicle_price(request: PricingRequest):
         logger.error(f"Error en predicción: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/pricing/predict/batch")
+async def predict_vehicle_prices_batch(request: BatchPricingRequest):
+    """Endpoint para predecir precios de muchos vehículos en una sola llamada"""
+    try:
+        start_time = time.perf_counter()
+        vehicles = [VehicleData(**item.dict()) for item in request.vehicles]
+        predictions = pricing_engine.predict_batch(vehicles)
+        
+        return {
+            "predictions": predictions,
+            "count": len(predictions),
+            "latency_ms": round((time.perf_counter() - start_time) * 1000, 2)
+        }
+    except Exception as e:
+        logger.error(f"Error en predicción batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/pricing/stats")
 async def get_service_stats():
     """Estadísticas del servicio"""
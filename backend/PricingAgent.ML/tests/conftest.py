@@ -0,0 +1,13 @@
+"""
+Configuración compartida de pytest para PricingAgent.ML
+
+Los módulos del servicio viven en la raíz de PricingAgent.ML (sin paquete),
+así que se agregan al path igual que cuando se ejecutan con `python <modulo>.py`.
+
+Autor: OKLA Development Team
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
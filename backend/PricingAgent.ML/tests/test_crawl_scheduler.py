@@ -0,0 +1,280 @@
+"""
+Tests de CrawlScheduler contra un servidor HTTP local de fixtures
+
+- Token bucket: ritmo sostenido y ráfagas
+- Rate limit por host: cada host tiene su propio bucket
+- Requests condicionales: ETag / 304 re-emiten los listings de la página
+- BrowserPool: nunca más de `size` drivers con renders concurrentes
+
+Autor: OKLA Development Team
+"""
+
+import asyncio
+import threading
+import time
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from bs4 import BeautifulSoup
+
+from crawl_scheduler import BrowserPool, CrawlScheduler, HostRateLimiter, TokenBucket, ValidatorStore
+
+PAGES = 3
+CARS_PER_PAGE = 4
+
+
+class FixtureSite:
+    """Sitio paginado con ETag por página; registra cada request recibida"""
+
+    def __init__(self, pages: int = PAGES, send_validators: bool = True):
+        self.pages = pages
+        self.send_validators = send_validators
+        self.revision = 1
+        self.requests = []
+
+    def etag(self, page: int) -> str:
+        return f'"p{page}-r{self.revision}"'
+
+    def html(self, page: int) -> str:
+        cars = ''.join(
+            f'<li class="car">r{self.revision}-p{page}-c{i}</li>' for i in range(CARS_PER_PAGE)
+        )
+        next_link = f'<a rel="next" href="/autos?page={page + 1}">Siguiente</a>' if page < self.pages else ''
+        return f'<html><body><ul>{cars}</ul>{next_link}</body></html>'
+
+    async def handle(self, request: web.Request) -> web.Response:
+        page = int(request.query.get('page', '1'))
+        self.requests.append({
+            'page': page,
+            'at': time.monotonic(),
+            'if_none_match': request.headers.get('If-None-Match'),
+        })
+        if not self.send_validators:
+            return web.Response(text=self.html(page), content_type='text/html')
+        if request.headers.get('If-None-Match') == self.etag(page):
+            return web.Response(status=304, headers={'ETag': self.etag(page)})
+        return web.Response(text=self.html(page), content_type='text/html', headers={'ETag': self.etag(page)})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/autos', self.handle)
+        return app
+
+
+def parse_cars(html: str, url: str):
+    return [li.get_text() for li in BeautifulSoup(html, 'html.parser').select('li.car')]
+
+
+async def start(site: FixtureSite) -> TestServer:
+    server = TestServer(site.app())
+    await server.start_server()
+    return server
+
+
+@pytest_asyncio.fixture
+async def site():
+    site = FixtureSite()
+    server = await start(site)
+    site.url = str(server.make_url('/autos'))
+    yield site
+    await server.close()
+
+
+@pytest_asyncio.fixture
+async def session():
+    async with aiohttp.ClientSession() as session:
+        yield session
+
+
+def scheduler(session, rate: float = 1000.0, burst: float = 1000.0, store=None, overrides=None) -> CrawlScheduler:
+    return CrawlScheduler(
+        session, HostRateLimiter(rate=rate, burst=burst, overrides=overrides),
+        store or ValidatorStore(), concurrency=8, max_pages=20
+    )
+
+
+# ----------------------------------------------------------------------
+# Token bucket
+# ----------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_token_bucket_paces_sustained_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start_time = time.monotonic()
+    for _ in range(6):
+        await bucket.acquire()
+    elapsed = time.monotonic() - start_time
+
+    # 1 token inicial + 5 más a 20/s = 0.25s
+    assert 0.22 <= elapsed < 0.6
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=10, capacity=3)
+    stamps = []
+    start_time = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+        stamps.append(time.monotonic() - start_time)
+
+    assert stamps[2] < 0.05          # las tres primeras salen en ráfaga
+    assert 0.08 <= stamps[3] < 0.3   # la cuarta espera un token (0.1s a 10/s)
+
+
+# ----------------------------------------------------------------------
+# Rate limit por host
+# ----------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_requests_to_one_host_are_paced(site, session):
+    crawler = scheduler(session, rate=10, burst=1)
+    items = await crawler.crawl('fixture', [site.url], parse_cars)
+
+    assert len(items) == PAGES * CARS_PER_PAGE
+    gaps = [b['at'] - a['at'] for a, b in zip(site.requests, site.requests[1:])]
+    assert all(gap >= 0.08 for gap in gaps), gaps
+
+
+@pytest.mark.asyncio
+async def test_hosts_are_limited_independently(session):
+    sites = [FixtureSite(pages=4), FixtureSite(pages=4)]
+    servers = [await start(s) for s in sites]
+    try:
+        urls = [str(server.make_url('/autos')) for server in servers]
+        slow_host = f'{servers[0].host}:{servers[0].port}'
+        crawler = scheduler(session, rate=1000, burst=1, overrides={slow_host: 10})
+
+        start_time = time.monotonic()
+        items = await crawler.crawl('fixture', urls, parse_cars)
+        elapsed = time.monotonic() - start_time
+    finally:
+        for server in servers:
+            await server.close()
+
+    assert len(items) == 2 * 4 * CARS_PER_PAGE
+    # El host lento marca el ritmo (3 esperas de 0.1s); el rápido no espera por él
+    assert 0.25 <= elapsed < 0.6
+    fast_requests = sites[1].requests
+    assert fast_requests[-1]['at'] - fast_requests[0]['at'] < 0.1
+
+
+# ----------------------------------------------------------------------
+# ETag / 304
+# ----------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_unchanged_pages_return_304_and_reemit_listings(site, session):
+    store = ValidatorStore()
+    first = await scheduler(session, store=store).crawl('fixture', [site.url], parse_cars)
+
+    site.requests.clear()
+    crawler = scheduler(session, store=store)
+    second = await crawler.crawl('fixture', [site.url], parse_cars)
+
+    assert second == first
+    assert [r['if_none_match'] for r in site.requests] == [site.etag(p) for p in range(1, PAGES + 1)]
+    stats = crawler.stats['fixture']
+    assert stats.pages_not_modified == PAGES
+    assert stats.pages_fetched == 0
+    assert stats.listings == PAGES * CARS_PER_PAGE
+
+
+@pytest.mark.asyncio
+async def test_changed_pages_are_downloaded_again(site, session):
+    store = ValidatorStore()
+    await scheduler(session, store=store).crawl('fixture', [site.url], parse_cars)
+
+    site.revision = 2
+    crawler = scheduler(session, store=store)
+    items = await crawler.crawl('fixture', [site.url], parse_cars)
+
+    assert all(item.startswith('r2-') for item in items)
+    assert crawler.stats['fixture'].pages_fetched == PAGES
+    assert store.get(site.url)['etag'] == site.etag(1)
+
+
+@pytest.mark.asyncio
+async def test_no_conditional_request_without_stored_body(site, session):
+    # Validadores sin cuerpo (p. ej. escritos por una versión anterior): un 304
+    # no tendría listings que re-emitir, así que se pide la página completa
+    store = ValidatorStore()
+    store.set(site.url, {'etag': site.etag(1), 'next_url': None})
+
+    items = await scheduler(session, store=store).crawl('fixture', [site.url], parse_cars)
+
+    assert site.requests[0]['if_none_match'] is None
+    assert len(items) == PAGES * CARS_PER_PAGE
+
+
+@pytest.mark.asyncio
+async def test_pages_without_validators_are_not_stored(session):
+    site = FixtureSite(send_validators=False)
+    server = await start(site)
+    try:
+        url = str(server.make_url('/autos'))
+        store = ValidatorStore()
+        await scheduler(session, store=store).crawl('fixture', [url], parse_cars)
+        await scheduler(session, store=store).crawl('fixture', [url], parse_cars)
+    finally:
+        await server.close()
+
+    assert store.get(url) == {}
+    assert all(r['if_none_match'] is None for r in site.requests)
+    assert len(site.requests) == 2 * PAGES
+
+
+# ----------------------------------------------------------------------
+# BrowserPool
+# ----------------------------------------------------------------------
+class FakeBrowserPool(BrowserPool):
+    """Drivers falsos y lentos de crear; los primeros `failures` intentos fallan"""
+
+    def __init__(self, size: int, failures: int = 0):
+        super().__init__(size=size)
+        self.failures = failures
+        self.created = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self._lock = threading.Lock()
+
+    def _create_driver(self):
+        time.sleep(0.05)
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("chrome no arrancó")
+            self.created += 1
+            return object()
+
+    def _render_sync(self, driver, url: str, wait_css: str) -> str:
+        with self._lock:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+        time.sleep(0.01)
+        with self._lock:
+            self.in_use -= 1
+        return url
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_never_grows_past_size():
+    pool = FakeBrowserPool(size=2)
+    pages = await asyncio.gather(*(pool.render(f'https://example.com/{i}', 'li') for i in range(10)))
+
+    assert pages == [f'https://example.com/{i}' for i in range(10)]
+    assert pool.created == len(pool._drivers) == 2
+    assert pool.max_in_use == 2
+
+
+@pytest.mark.asyncio
+async def test_browser_pool_frees_the_slot_when_creation_fails():
+    pool = FakeBrowserPool(size=2, failures=2)
+    results = await asyncio.wait_for(
+        asyncio.gather(*(pool.render(f'https://example.com/{i}', 'li') for i in range(6)), return_exceptions=True),
+        timeout=5
+    )
+
+    assert sum(isinstance(r, RuntimeError) for r in results) == 2
+    assert sum(isinstance(r, str) for r in results) == 4
+    assert pool.created == len(pool._drivers) <= 2
@@ -0,0 +1,67 @@
+"""
+Tests del append al training store de MarketIntelligenceScraper
+
+Autor: OKLA Development Team
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('redis')
+pytest.importorskip('psycopg2')
+
+from listing_loader import batch_fingerprints  # noqa: E402
+from market_intelligence_scraper import MarketIntelligenceScraper  # noqa: E402
+from training_store import TrainingDataStore  # noqa: E402
+
+
+def scraped(url, price=12500.0, scraped_at=datetime(2026, 10, 1, 12, 0)):
+    return dict(source='supercarros', make='Toyota', model='Corolla', year=2018, price=price,
+                currency='USD', mileage=60000, location='Santiago', condition='Bueno',
+                fuel_type='Gasolina', transmission='Automática', url=url, scraped_at=scraped_at)
+
+
+@pytest.fixture
+def scraper(tmp_path):
+    # Sin __init__: no hace falta Redis ni Postgres para mapear y agregar al store
+    scraper = MarketIntelligenceScraper.__new__(MarketIntelligenceScraper)
+    scraper.training_store = TrainingDataStore(tmp_path / 'training_store')
+    scraper.usd_to_dop_rate = 58.5
+    return scraper
+
+
+def test_only_new_or_repriced_listings_reach_the_training_store(scraper):
+    first = pd.DataFrame([scraped('https://supercarros.com/1'), scraped('https://supercarros.com/2')])
+    assert scraper._append_to_training_store(first, set(batch_fingerprints(first))) == 2
+
+    # Segunda corrida: /1 re-visto sin cambios, /2 rebajado, /3 nuevo (el loader reporta /2 y /3)
+    second = pd.DataFrame([
+        scraped('https://supercarros.com/1', scraped_at=datetime(2026, 10, 2)),
+        scraped('https://supercarros.com/2', price=11900.0, scraped_at=datetime(2026, 10, 2)),
+        scraped('https://supercarros.com/3', scraped_at=datetime(2026, 10, 2)),
+    ])
+    changed = set(batch_fingerprints(second.iloc[1:]))
+    assert scraper._append_to_training_store(second, changed) == 2
+
+    stored = scraper.training_store.read()
+    assert len(stored) == 4
+    assert sorted(stored['sale_price'] / 58.5) == [11900.0, 12500.0, 12500.0, 12500.0]
+
+
+def test_unchanged_rerun_appends_nothing(scraper):
+    batch = pd.DataFrame([scraped('https://supercarros.com/1')])
+    scraper._append_to_training_store(batch, set(batch_fingerprints(batch)))
+
+    assert scraper._append_to_training_store(batch, set()) == 0
+    assert scraper.training_store.count() == 1
+
+
+def test_duplicate_rows_in_one_batch_are_appended_once(scraper):
+    batch = pd.DataFrame([scraped('https://supercarros.com/1', price=12000.0),
+                          scraped('https://supercarros.com/1', price=12100.0,
+                                  scraped_at=datetime(2026, 10, 1, 13, 0))])
+
+    assert scraper._append_to_training_store(batch, set(batch_fingerprints(batch))) == 1
+    assert scraper.training_store.read()['sale_price'].tolist() == [12100.0 * 58.5]
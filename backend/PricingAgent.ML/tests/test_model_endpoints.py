@@ -0,0 +1,106 @@
+"""
+Endpoints de versión del modelo (status / rollback / promote)
+
+El puntero y los manifests del ModelStore se leen y escriben en disco: los
+handlers async deben hacerlo fuera del thread del event loop.
+
+Autor: OKLA Development Team
+"""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import advanced_pricing_ml
+
+
+class RecordingStore:
+    """ModelStore mínimo que registra en qué thread se llamó cada método"""
+
+    def __init__(self, history=('v1',), versions=('v1', 'v2')):
+        self.history = list(history)
+        self.versions = set(versions)
+        self.threads = {}
+
+    def _record(self, name):
+        self.threads[name] = threading.get_ident()
+
+    def read_pointer(self):
+        self._record('read_pointer')
+        return {'version': 'v2', 'history': self.history}
+
+    def list_versions(self):
+        self._record('list_versions')
+        return []
+
+    def rollback(self):
+        self._record('rollback')
+        if not self.history:
+            raise ValueError("No hay versión anterior para rollback")
+        return {'version': self.history[0], 'history': self.history[1:]}
+
+    def promote(self, version, reason="manual"):
+        self._record('promote')
+        if version not in self.versions:
+            raise FileNotFoundError(version)
+        return {'version': version}
+
+
+class FakeEngine:
+    model_version = 'v2'
+    training_running = False
+
+    def __init__(self, store):
+        self.model_store = store
+        self.reloads = 0
+
+    async def reload_if_promoted(self, loop=None):
+        self.reloads += 1
+        return True
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = FakeEngine(RecordingStore())
+    monkeypatch.setattr(advanced_pricing_ml, '_pricing_engine', engine)
+    return engine
+
+
+def run_on_loop(handler, *args):
+    """Ejecuta el handler y devuelve (resultado, id del thread del event loop)"""
+    async def main():
+        return await handler(*args), threading.get_ident()
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize('handler, args, methods', [
+    (advanced_pricing_ml.model_status, (), ['read_pointer', 'list_versions']),
+    (advanced_pricing_ml.rollback_model, (), ['rollback']),
+    (advanced_pricing_ml.promote_model, ('v1',), ['promote']),
+])
+def test_model_store_io_runs_off_the_event_loop(engine, handler, args, methods):
+    _, loop_thread = run_on_loop(handler, *args)
+
+    assert sorted(engine.model_store.threads) == sorted(methods)
+    assert all(thread != loop_thread for thread in engine.model_store.threads.values())
+
+
+def test_rollback_and_promote_reload_the_model(engine):
+    result, _ = run_on_loop(advanced_pricing_ml.rollback_model)
+    assert result['history'] == []
+    run_on_loop(advanced_pricing_ml.promote_model, 'v1')
+    assert engine.reloads == 2
+
+
+def test_store_errors_map_to_http_status(engine):
+    engine.model_store.history = []
+    with pytest.raises(HTTPException) as rollback_error:
+        run_on_loop(advanced_pricing_ml.rollback_model)
+    with pytest.raises(HTTPException) as promote_error:
+        run_on_loop(advanced_pricing_ml.promote_model, 'v9')
+
+    assert rollback_error.value.status_code == 409
+    assert promote_error.value.status_code == 404
+    assert engine.reloads == 0
@@ -0,0 +1,119 @@
+"""
+Tests del cache de predicciones base de AdvancedPricingEngine
+
+El precio devuelto no puede depender de lo que se haya ejecutado antes:
+misma clave de cache ⇔ mismas features.
+
+Autor: OKLA Development Team
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from advanced_pricing_ml import ActiveModel, AdvancedPricingEngine, VehicleData
+from feature_encoder import FeatureEncoder, INPUT_FIELDS, normalize_vehicle
+
+CONDITIONS = ['Excelente', 'Muy Bueno', 'Bueno', 'Regular', 'Malo']
+
+# Variantes "sucias" de la misma entrada que llegan desde formularios y scrapers
+DIRTY_VARIANTS = [
+    dict(make='Toyota', model='Corolla', condition='Excelente', province='Santiago'),
+    dict(make='Toyota ', model=' Corolla', condition='Excelente ', province='Santiago '),
+    dict(make=' Toyota', model='Corolla ', condition=' Excelente', province=' Santiago'),
+]
+
+
+@pytest.fixture
+def training_df():
+    rng = np.random.default_rng(42)
+    n = 400
+    condition = rng.choice(CONDITIONS, n)
+    year = rng.integers(2005, 2025, n)
+    mileage = rng.integers(0, 250_000, n)
+    score = pd.Series(condition).map({'Excelente': 1.0, 'Muy Bueno': 0.8, 'Bueno': 0.6,
+                                      'Regular': 0.4, 'Malo': 0.2}).to_numpy()
+    return pd.DataFrame({
+        'make': rng.choice(['Toyota', 'Honda', 'BMW'], n),
+        'model': rng.choice(['Corolla', 'Civic', 'X5'], n),
+        'year': year,
+        'mileage': mileage,
+        'fuel_type': 'Gasolina',
+        'transmission': 'Automática',
+        'condition': condition,
+        'province': rng.choice(['Santiago', 'Moca'], n),
+        # El precio depende fuertemente de la condición
+        'price': 400_000 + (year - 2005) * 25_000 - mileage * 0.5 + score * 300_000,
+    })
+
+
+@pytest.fixture
+def engine(tmp_path, training_df):
+    engine = AdvancedPricingEngine(model_path=str(tmp_path / 'models'), data_path=str(tmp_path / 'data'))
+    encoder = FeatureEncoder.fit(training_df, model_version='test')
+    model = xgb.XGBRegressor(n_estimators=40, max_depth=4, random_state=0)
+    model.fit(encoder.transform(training_df), training_df['price'])
+    engine._active = ActiveModel(model=model, encoder=encoder, version='test')
+    yield engine
+    engine.inference_pool.shutdown()
+
+
+def vehicle(**overrides) -> VehicleData:
+    fields = dict(make='Toyota', model='Corolla', year=2018, mileage=60_000,
+                  fuel_type='Gasolina', transmission='Automática',
+                  condition='Excelente', province='Santiago')
+    fields.update(overrides)
+    return VehicleData(**fields)
+
+
+def cold_price(engine, v: VehicleData) -> float:
+    engine.prediction_cache.clear()
+    prices, _ = engine._predict_base_prices([v])
+    return float(prices[0])
+
+
+@pytest.mark.parametrize('warm_with', range(len(DIRTY_VARIANTS)))
+def test_price_does_not_depend_on_cache_state(engine, warm_with):
+    cold = [cold_price(engine, vehicle(**variant)) for variant in DIRTY_VARIANTS]
+
+    engine.prediction_cache.clear()
+    engine._predict_base_prices([vehicle(**DIRTY_VARIANTS[warm_with])])
+    warm, _ = engine._predict_base_prices([vehicle(**variant) for variant in DIRTY_VARIANTS])
+
+    assert list(warm) == pytest.approx(cold)
+
+
+def test_batch_matches_single_predictions_in_any_order(engine):
+    vehicles = [vehicle(condition=c, mileage=m) for c in CONDITIONS + ['Excelente ', ' Malo']
+                for m in (10_000, 150_000)]
+    singles = [cold_price(engine, v) for v in vehicles]
+
+    engine.prediction_cache.clear()
+    batch, _ = engine._predict_base_prices(vehicles[::-1])
+    assert list(batch[::-1]) == pytest.approx(singles)
+
+
+def test_same_cache_key_means_same_features(engine):
+    encoder = engine._active.encoder
+    vehicles = [vehicle(**variant) for variant in DIRTY_VARIANTS] + [
+        vehicle(condition='Excelente '), vehicle(province=' Moca'), vehicle(condition=None),
+    ]
+    by_key = {}
+    for v in vehicles:
+        row = normalize_vehicle(vars(v))
+        key = engine._feature_cache_key(row, '2026-10', 'test')
+        features = encoder.encode_row(vars(v))
+        if key in by_key:
+            np.testing.assert_array_equal(by_key[key], features)
+        by_key[key] = features
+
+
+def test_training_and_serving_encodings_agree(training_df):
+    dirty = training_df.head(20).copy()
+    dirty['condition'] = dirty['condition'] + ' '
+    dirty['make'] = ' ' + dirty['make']
+    encoder = FeatureEncoder.fit(training_df)
+
+    rows = dirty[list(INPUT_FIELDS)].to_dict('records')
+    np.testing.assert_allclose(encoder.transform(dirty), encoder.encode_rows(rows))
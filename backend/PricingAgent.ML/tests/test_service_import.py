@@ -0,0 +1,42 @@
+"""
+Importar el servicio de pricing no debe tener efectos secundarios
+
+El training worker y los benchmarks importan advanced_pricing_ml solo por la
+clase del engine; el engine del servicio se crea en el primer request.
+
+Autor: OKLA Development Team
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_import_creates_no_engine_or_directories(tmp_path):
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "import advanced_pricing_ml as m, os;"
+        "assert m._pricing_engine is None;"
+        "print(sorted(os.listdir('.')))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code, str(SERVICE_DIR)],
+        cwd=tmp_path, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '[]'
+
+
+def test_engine_is_created_once_on_first_use(tmp_path, monkeypatch):
+    import advanced_pricing_ml
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(advanced_pricing_ml, '_pricing_engine', None)
+    engine = advanced_pricing_ml.get_pricing_engine()
+    try:
+        assert advanced_pricing_ml.get_pricing_engine() is engine
+        assert (tmp_path / 'models').is_dir() and (tmp_path / 'data').is_dir()
+    finally:
+        engine.inference_pool.shutdown()
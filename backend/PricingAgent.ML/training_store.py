@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+OKLA Pricing Training Store
+===========================
+
+Dataset columnar (Parquet) para el entrenamiento del modelo de pricing,
+particionado por fuente y fecha (estilo Hive):
+
+    data/training_store/
+        source=synthetic/date=2026-03-01/part-<uuid>-0.parquet
+        source=supercarros/date=2026-03-02/part-<uuid>-0.parquet
+        ...
+
+- Appends incrementales (el scraper agrega un archivo por corrida, sin reescribir nada)
+- Lecturas por columnas y con filtros de partición (fuente / rango de fechas)
+- Escala a millones de listings sin pasar por CSV
+
+Autor: OKLA Development Team
+"""
+
+import logging
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+logger = logging.getLogger(__name__)
+
+TRAINING_SCHEMA = pa.schema([
+    ('make', pa.string()),
+    ('model', pa.string()),
+    ('year', pa.int16()),
+    ('mileage', pa.int32()),
+    ('fuel_type', pa.string()),
+    ('transmission', pa.string()),
+    ('condition', pa.string()),
+    ('province', pa.string()),
+    ('sale_price', pa.float64()),
+])
+
+PARTITION_SCHEMA = pa.schema([
+    ('source', pa.string()),
+    ('date', pa.string()),
+])
+
+TRAINING_COLUMNS = TRAINING_SCHEMA.names
+
+
+class TrainingDataStore:
+    """Almacén Parquet particionado por source/date para datos de entrenamiento"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._partitioning = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+
+    def has_data(self, source: Optional[str] = None) -> bool:
+        pattern = f"source={source}/*/*.parquet" if source else "source=*/*/*.parquet"
+        return any(self.root.glob(pattern))
+
+    def append(self, df: pd.DataFrame, source: Optional[str] = None,
+               partition_date: Optional[date] = None) -> int:
+        """
+        Agregar registros como archivos nuevos (nunca reescribe particiones existentes).
+
+        La fuente sale de `source` o de la columna 'source'; la fecha de `partition_date`,
+        de la columna 'scraped_at' o del día actual.
+        """
+        if df.empty:
+            return 0
+
+        df = df.copy()
+        if source is not None:
+            df['source'] = source
+        elif 'source' not in df:
+            raise ValueError("Se requiere 'source' para particionar")
+
+        if partition_date is not None:
+            df['date'] = partition_date.isoformat()
+        elif 'scraped_at' in df:
+            df['date'] = pd.to_datetime(df['scraped_at']).dt.strftime('%Y-%m-%d')
+        else:
+            df['date'] = datetime.now().strftime('%Y-%m-%d')
+
+        for col in TRAINING_COLUMNS:
+            if col not in df:
+                df[col] = None
+
+        table = pa.Table.from_pandas(
+            df[TRAINING_COLUMNS + PARTITION_SCHEMA.names],
+            schema=pa.unify_schemas([TRAINING_SCHEMA, PARTITION_SCHEMA]),
+            preserve_index=False
+        )
+
+        ds.write_dataset(
+            table,
+            self.root,
+            format='parquet',
+            partitioning=self._partitioning,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore'
+        )
+
+        logger.info(f"Training store: {len(df)} registros agregados en {self.root}")
+        return len(df)
+
+    def dataset(self) -> ds.Dataset:
+        return ds.dataset(self.root, format='parquet', partitioning=self._partitioning)
+
+    def read(self, columns: Optional[List[str]] = None, sources: Optional[Iterable[str]] = None,
+             since: Optional[date] = None, until: Optional[date] = None) -> pd.DataFrame:
+        """Leer solo las columnas y particiones necesarias"""
+        if not self.has_data():
+            return pd.DataFrame(columns=columns or TRAINING_COLUMNS)
+
+        expression = None
+        if sources is not None:
+            expression = _and(expression, ds.field('source').isin(list(sources)))
+        if since is not None:
+            expression = _and(expression, ds.field('date') >= since.isoformat())
+        if until is not None:
+            expression = _and(expression, ds.field('date') <= until.isoformat())
+
+        table = self.dataset().to_table(columns=columns or TRAINING_COLUMNS, filter=expression)
+        return table.to_pandas()
+
+    def count(self, sources: Optional[Iterable[str]] = None) -> int:
+        if not self.has_data():
+            return 0
+        expression = ds.field('source').isin(list(sources)) if sources is not None else None
+        return self.dataset().count_rows(filter=expression)
+
+
+def _and(left, right):
+    return right if left is None else left & right
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+OKLA Pricing Training Worker
+============================
+
+Reentrenamiento fuera del proceso de la API:
+
+1. Baja su prioridad (nice), limita memoria y threads de XGBoost para no
+   competir con la inferencia en vivo
+2. Entrena un candidato y lo guarda como versión nueva (sin activarla)
+3. Lo compara contra el modelo activo:
+   - MAE sobre el holdout del candidato
+   - Shadow: ambos modelos sobre las últimas requests reales (shadow_traffic.jsonl)
+4. Si pasa, lo promueve reescribiendo current.json; la API detecta el cambio
+   y hace el swap. Rollback: POST /api/pricing/model/rollback
+
+Uso:
+    python training_worker.py [--model-path models/] [--data-path data/] [--no-promote] [--force]
+
+Autor: OKLA Development Team
+"""
+
+import argparse
+import fcntl
+import json
+import logging
+import os
+import resource
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from shadow_traffic import ShadowTrafficLog
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("training_worker")
+
+LOCK_FILE = "training.lock"
+
+
+def lower_priority(niceness: int, max_memory_mb: int):
+    """Prioridad de CPU baja y tope de memoria para el proceso de entrenamiento"""
+    if niceness:
+        os.nice(niceness)
+    if max_memory_mb > 0:
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    logger.info(f"Training worker: nice={os.nice(0)}, memoria máx={max_memory_mb or 'sin límite'} MB")
+
+
+def _mae_ratio(candidate_mae: float, current_mae: float) -> float:
+    return candidate_mae / current_mae - 1 if current_mae > 0 else 0.0
+
+
+def compare_on_holdout(result, current_model, current_encoder) -> Dict[str, float]:
+    """
+    MAE del modelo activo sobre el holdout del candidato. El activo pudo haber visto
+    parte de esas filas al entrenar, así que la comparación favorece al activo.
+    """
+    holdout = result.holdout
+    predicted = current_model.predict(current_encoder.transform(holdout))
+    current_mae = float(np.mean(np.abs(predicted - holdout['sale_price'].to_numpy())))
+    return {
+        'candidate_mae': result.metrics['mae'],
+        'current_mae': current_mae,
+        'mae_regression': _mae_ratio(result.metrics['mae'], current_mae)
+    }
+
+
+def shadow_score(traffic: List[Dict[str, Any]], candidate_model, candidate_encoder,
+                 current_model, current_encoder) -> Dict[str, Any]:
+    """Diferencia relativa entre candidato y activo sobre requests reales"""
+    if not traffic:
+        return {'requests': 0}
+
+    candidate = candidate_model.predict(candidate_encoder.encode_rows(traffic)).astype(np.float64)
+    current = current_model.predict(current_encoder.encode_rows(traffic)).astype(np.float64)
+
+    invalid = int(np.sum(~np.isfinite(candidate) | (candidate <= 0)))
+    valid = np.isfinite(candidate) & np.isfinite(current) & (current > 0)
+    shift = np.abs(candidate[valid] - current[valid]) / current[valid]
+
+    return {
+        'requests': len(traffic),
+        'invalid_predictions': invalid,
+        'median_shift': float(np.median(shift)) if shift.size else 0.0,
+        'p95_shift': float(np.percentile(shift, 95)) if shift.size else 0.0,
+        'mean_ratio': float(np.mean(candidate[valid] / current[valid])) if shift.size else 1.0
+    }
+
+
+def decide(holdout: Dict[str, float], shadow: Dict[str, Any], thresholds: Dict[str, float]) -> Tuple[bool, str]:
+    """Reglas de promoción: sin regresión de MAE y sin cambios bruscos en tráfico real"""
+    if holdout['mae_regression'] > thresholds['max_mae_regression']:
+        return False, f"MAE {holdout['mae_regression']:+.1%} vs modelo activo"
+
+    if shadow['requests'] < thresholds['min_shadow_requests']:
+        return True, f"holdout OK; shadow omitido ({shadow['requests']} requests)"
+    if shadow['invalid_predictions'] > 0:
+        return False, f"{shadow['invalid_predictions']} predicciones inválidas en shadow"
+    if shadow['median_shift'] > thresholds['max_median_shift']:
+        return False, f"cambio mediano en shadow {shadow['median_shift']:.1%}"
+    if shadow['p95_shift'] > thresholds['max_p95_shift']:
+        return False, f"cambio p95 en shadow {shadow['p95_shift']:.1%}"
+    return True, "holdout y shadow OK"
+
+
+def _thresholds() -> Dict[str, float]:
+    return {
+        'max_mae_regression': float(os.getenv('PROMOTION_MAX_MAE_REGRESSION', '0.02')),
+        'min_shadow_requests': int(os.getenv('SHADOW_MIN_REQUESTS', '50')),
+        'max_median_shift': float(os.getenv('PROMOTION_MAX_MEDIAN_SHIFT', '0.10')),
+        'max_p95_shift': float(os.getenv('PROMOTION_MAX_P95_SHIFT', '0.35')),
+    }
+
+
+def run(model_path: str, data_path: str, promote: bool = True, force: bool = False,
+        threads: Optional[int] = None) -> Dict[str, Any]:
+    # Import diferido: las variables de threads/prioridad ya están aplicadas
+    from advanced_pricing_ml import AdvancedPricingEngine
+
+    engine = AdvancedPricingEngine(model_path=model_path, data_path=data_path)
+    store = engine.model_store
+
+    if not engine.training_store.has_data():
+        engine._seed_training_store()
+
+    result = engine.fit_candidate(n_jobs=threads or -1)
+    manifest = store.save_candidate(result.model, result.encoder, metrics=result.metrics)
+    version = manifest.model_version
+    evaluation: Dict[str, Any] = {
+        'version': version,
+        'evaluated_at': datetime.now().isoformat(),
+        'metrics': result.metrics
+    }
+
+    current_version = store.current_version()
+    if current_version is None or force:
+        approved, reason = True, "sin modelo activo" if current_version is None else "promoción forzada"
+    else:
+        current_model, current_encoder, _ = store.load(current_version)
+        traffic = ShadowTrafficLog(
+            os.getenv('SHADOW_TRAFFIC_PATH', str(Path(data_path) / "shadow_traffic.jsonl"))
+        ).read_recent(int(os.getenv('SHADOW_MAX_REQUESTS', '2000')))
+
+        evaluation['baseline_version'] = current_version
+        evaluation['holdout'] = compare_on_holdout(result, current_model, current_encoder)
+        evaluation['shadow'] = shadow_score(traffic, result.model, result.encoder,
+                                            current_model, current_encoder)
+        approved, reason = decide(evaluation['holdout'], evaluation['shadow'], _thresholds())
+
+    evaluation.update({'approved': approved, 'reason': reason, 'promoted': approved and promote})
+    store.save_evaluation(version, evaluation)
+
+    if evaluation['promoted']:
+        store.promote(version, reason=reason)
+        removed = store.prune(keep=int(os.getenv('MODEL_KEEP_VERSIONS', '5')))
+        if removed:
+            logger.info(f"Versiones eliminadas: {', '.join(removed)}")
+    else:
+        logger.info(f"Candidato {version} no promovido: {reason}")
+
+    return evaluation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training worker del servicio de pricing")
+    parser.add_argument('--model-path', default='models/')
+    parser.add_argument('--data-path', default='data/')
+    parser.add_argument('--no-promote', action='store_true', help="Solo entrenar y evaluar el candidato")
+    parser.add_argument('--force', action='store_true', help="Promover sin evaluación shadow")
+    args = parser.parse_args()
+
+    threads = int(os.getenv('TRAINING_THREADS', str(max(1, (os.cpu_count() or 2) // 2))))
+    os.environ.setdefault('OMP_NUM_THREADS', str(threads))
+    lower_priority(int(os.getenv('TRAINING_NICE', '10')), int(os.getenv('TRAINING_MAX_MEMORY_MB', '0')))
+
+    # Un solo entrenamiento a la vez aunque la API corra con varios workers de uvicorn
+    Path(args.model_path).mkdir(parents=True, exist_ok=True)
+    with open(Path(args.model_path) / LOCK_FILE, 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info("Ya hay un entrenamiento en curso, saliendo")
+            return 0
+
+        evaluation = run(args.model_path, args.data_path, promote=not args.no_promote,
+                         force=args.force, threads=threads)
+        print(json.dumps(evaluation, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+OKLA (CarDealer) Synthetic Dataset Generator
+============================================
+
+Genera un dataset sintético, determinístico y consistente (usuarios, dealers,
+vehículos, imágenes y reviews) para seeding a escala y pruebas de carga.
+
+- Misma semilla + misma escala = mismos registros (IDs UUIDv5, RNG por entidad)
+- Las referencias son consistentes: cada dealer pertenece a un usuario Dealer,
+  cada vehículo a un dealer, cada review a un vehículo existente de ese dealer
+- Marcas, modelos y trims salen de TRIM_DATA en scripts/seed-vehiclessale-catalog.py
+- Escritura en streaming (un registro a la vez): NDJSON para seed_database.py
+  (--dataset) o CSV para COPY directo a las tablas de VehiclesSaleService
+  (vehicles y vehicle_images: columnas reales, NOT NULL completas, enums como
+  los guarda EF Core); usuarios, dealers y reviews viven en otros servicios
+  y solo se generan en NDJSON para cargarlos vía API
+
+Autor: Gregory Moreno
+Fecha: Octubre 2026
+Versión: 1.0.0
+
+Uso:
+    python generate_synthetic_dataset.py [--vehicles N] [--seed N] [--format ndjson|csv]
+                                         [--output DIR] [--entities users,dealers,...]
+
+Ejemplos:
+    python generate_synthetic_dataset.py --vehicles 10000
+    python generate_synthetic_dataset.py --vehicles 1000000 --format csv --output /tmp/okla-1m
+    cd /tmp/okla-1m && psql "$VEHICLESSALE_DB" -f load.sql
+    python seed_database.py --dataset ../generated/10000 --only users,dealers,vehicles
+"""
+
+import csv
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import unicodedata
+import importlib.util
+from array import array
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+CATALOG_SCRIPT = REPO_ROOT / "scripts" / "seed-vehiclessale-catalog.py"
+DEFAULT_OUTPUT = Path(__file__).resolve().parent.parent / "generated"
+
+GENERATOR_VERSION = "1.0.0"
+NAMESPACE = uuid.UUID("6f1c2d4e-3b5a-5c7d-9e8f-0a1b2c3d4e5f")
+
+# Proporciones respecto al número de vehículos
+USERS_PER_VEHICLE = 0.5
+VEHICLES_PER_DEALER = 50
+IMAGES_PER_VEHICLE = 5
+REVIEWS_PER_VEHICLE = 0.2
+
+ENTITIES = ("users", "dealers", "vehicles", "vehicleImages", "reviews")
+
+# Tablas destino del modo CSV (base de VehiclesSaleService), en orden de carga por las FKs
+CSV_TABLES = {"vehicles": "vehicles", "vehicleImages": "vehicle_images"}
+
+FIRST_NAMES = ["Carlos", "María", "José", "Ana", "Luis", "Carmen", "Pedro", "Rosa", "Juan", "Laura",
+               "Miguel", "Isabel", "Rafael", "Yolanda", "Francisco", "Altagracia", "Manuel", "Patricia",
+               "Ramón", "Juana", "Héctor", "Mercedes", "Andrés", "Daniela"]
+LAST_NAMES = ["Rodríguez", "Pérez", "Martínez", "García", "Fernández", "Gómez", "Díaz", "Reyes",
+              "Santana", "Jiménez", "Peña", "Castillo", "Almonte", "Batista", "Guzmán", "Féliz",
+              "Mejía", "Núñez", "Tavárez", "Ureña"]
+LOCATIONS = [
+    ("Santo Domingo", "Distrito Nacional", 0.30), ("Santiago", "Santiago", 0.20),
+    ("Santo Domingo Este", "Santo Domingo", 0.12), ("Punta Cana", "La Altagracia", 0.08),
+    ("La Romana", "La Romana", 0.06), ("Puerto Plata", "Puerto Plata", 0.06),
+    ("La Vega", "La Vega", 0.05), ("San Cristóbal", "San Cristóbal", 0.05),
+    ("San Pedro de Macorís", "San Pedro de Macorís", 0.04), ("Moca", "Espaillat", 0.04),
+]
+DEALER_TYPES = ["Independent", "Franchise", "Chain"]
+DEALER_PLANS = ["Free", "Basic", "Pro", "Enterprise"]
+DEALER_WORDS = ["Auto", "Motors", "Cars", "Premium", "Express", "Caribe", "Quisqueya", "Central", "Import"]
+
+BODY_STYLES = {
+    "RAV4": ("SUV", "SUV"), "CR-V": ("SUV", "Crossover"), "Model Y": ("SUV", "Crossover"),
+    "Tacoma": ("Truck", "Pickup"), "F-150": ("Truck", "Pickup"), "Silverado 1500": ("Truck", "Pickup"),
+    "Mustang": ("Car", "Coupe"),
+}
+CONDITIONS = [("Used", 0.80), ("CertifiedPreOwned", 0.12), ("New", 0.08)]
+STATUSES = [("Active", 0.90), ("Reserved", 0.04), ("Sold", 0.04), ("Draft", 0.02)]
+COLORS = ["Blanco", "Negro", "Gris", "Plata", "Azul", "Rojo", "Beige", "Verde"]
+FEATURES = ["Apple CarPlay", "Android Auto", "Backup Camera", "Bluetooth", "Sunroof", "Leather Seats",
+            "Navigation", "Heated Seats", "Blind Spot Monitor", "Lane Assist", "Keyless Entry", "Cruise Control"]
+IMAGE_TYPES = ["Primary", "Exterior", "Exterior", "Interior", "Interior"]
+IMAGE_FOLDERS = 301  # carpetas disponibles en data/vehicle_images/
+
+# Valores tal como los persiste EF Core: enums string (HasConversion<string>) o int
+DB_DRIVE_TYPES = {"4WD": "FourWD"}
+DB_IMAGE_TYPES = {"Primary": 0, "Exterior": 0, "Interior": 1}  # ImageType.Exterior / Interior
+SELLER_TYPE_DEALER, SELLER_TYPE_FRANCHISE = 1, 2
+DOORS_SEATS = {"Coupe": (2, 4)}  # el resto del catálogo: 4 puertas, 5 asientos
+
+REVIEW_TITLES = {
+    5: ["Excelente experiencia de compra", "100% recomendado", "Servicio de primera"],
+    4: ["Muy buena atención", "Buen dealer, precio justo", "Recomendado"],
+    3: ["Experiencia regular", "Cumplieron, pero tardaron", "Aceptable"],
+    2: ["Esperaba más", "Poca comunicación", "Proceso lento"],
+    1: ["Mala experiencia", "No lo recomiendo", "El vehículo no era como en las fotos"],
+}
+REVIEW_RATINGS = [(5, 0.45), (4, 0.30), (3, 0.12), (2, 0.07), (1, 0.06)]
+
+# Año base de las fechas generadas (no datetime.now(): el dataset debe ser reproducible)
+EPOCH = datetime(2026, 1, 1)
+
+# ============================================================================
+# UTILIDADES
+# ============================================================================
+
+def load_catalog() -> List[Tuple[str, str, int, Dict]]:
+    """(make, model, year, trim) de TRIM_DATA del seeder del catálogo de VehiclesSaleService"""
+    spec = importlib.util.spec_from_file_location("seed_vehiclessale_catalog", CATALOG_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return [
+        (make, model, year, trim)
+        for make, models in module.TRIM_DATA.items()
+        for model, years in models.items()
+        for year, trims in years.items()
+        for trim in trims
+    ]
+
+def entity_id(kind: str, seed: int, index: int) -> str:
+    return str(uuid.uuid5(NAMESPACE, f"{kind}:{seed}:{index}"))
+
+def ascii_slug(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return normalized.lower().replace(" ", "")
+
+def weighted(rng: random.Random, options: List[Tuple[Any, float]]) -> Any:
+    return rng.choices([value for value, _ in options], weights=[weight for _, weight in options])[0]
+
+VIN_CHARS = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+VIN_VALUES = {**{str(d): d for d in range(10)},
+              **dict(zip("ABCDEFGH", range(1, 9))), **dict(zip("JKLMN", range(1, 6))), "P": 7, "R": 9,
+              **dict(zip("STUVWXYZ", range(2, 10)))}
+VIN_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+def make_vin(rng: random.Random) -> str:
+    """VIN de 17 caracteres con dígito verificador válido (posición 9)"""
+    chars = [rng.choice(VIN_CHARS) for _ in range(17)]
+    total = sum(VIN_VALUES[c] * w for c, w in zip(chars, VIN_WEIGHTS))
+    chars[8] = "X" if total % 11 == 10 else str(total % 11)
+    return "".join(chars)
+
+# ============================================================================
+# GENERADOR
+# ============================================================================
+
+class SyntheticDataset:
+    """Generadores por entidad; cada uno con su propio RNG derivado de (seed, entidad)"""
+
+    def __init__(self, vehicles: int, seed: int = 42):
+        self.seed = seed
+        self.n_vehicles = vehicles
+        self.n_dealers = max(1, vehicles // VEHICLES_PER_DEALER)
+        self.n_users = max(self.n_dealers + 1, int(vehicles * USERS_PER_VEHICLE))
+        self.n_images = vehicles * IMAGES_PER_VEHICLE
+        self.n_reviews = int(vehicles * REVIEWS_PER_VEHICLE)
+        self.catalog = load_catalog()
+
+        # Inventario por dealer con sesgo (pocos dealers grandes, muchos chicos); se guarda
+        # el dealer de cada vehículo para que las reviews referencien pares existentes
+        rng = self._rng("assignment")
+        dealer_weights = [1.0 / (i + 1) ** 0.6 for i in range(self.n_dealers)]
+        self.vehicle_dealer = array("I", rng.choices(range(self.n_dealers), weights=dealer_weights, k=vehicles))
+        # Ubicación de cada dealer (sus vehículos la heredan)
+        self.dealer_location = array("B", rng.choices(range(len(LOCATIONS)),
+                                                      weights=[loc[2] for loc in LOCATIONS], k=self.n_dealers))
+
+    def counts(self) -> Dict[str, int]:
+        return {"users": self.n_users, "dealers": self.n_dealers, "vehicles": self.n_vehicles,
+                "vehicleImages": self.n_images, "reviews": self.n_reviews}
+
+    def generators(self) -> Dict[str, Callable[[], Iterator[Dict]]]:
+        return {"users": self.users, "dealers": self.dealers, "vehicles": self.vehicles,
+                "vehicleImages": self.vehicle_images, "reviews": self.reviews}
+
+    def _rng(self, entity: str) -> random.Random:
+        return random.Random(f"{self.seed}:{entity}")
+
+    def user_id(self, index: int) -> str:
+        return entity_id("user", self.seed, index)
+
+    def dealer_id(self, index: int) -> str:
+        return entity_id("dealer", self.seed, index)
+
+    def vehicle_id(self, index: int) -> str:
+        return entity_id("vehicle", self.seed, index)
+
+    def users(self) -> Iterator[Dict]:
+        """Los primeros n_dealers usuarios son los dueños de los dealers"""
+        rng = self._rng("users")
+        for i in range(self.n_users):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            city, province, _ = weighted(rng, [(loc, loc[2]) for loc in LOCATIONS])
+            yield {
+                "id": self.user_id(i),
+                "email": f"{ascii_slug(first)}.{ascii_slug(last)}.{i}@synthetic.okla.com.do",
+                "firstName": first,
+                "lastName": last,
+                "phoneNumber": f"+1{rng.choice(['809', '829', '849'])}{rng.randrange(10 ** 7):07d}",
+                "accountType": "Dealer" if i < self.n_dealers else "Individual",
+                "externalAuthProvider": None,
+                "city": city,
+                "province": province,
+            }
+
+    def dealers(self) -> Iterator[Dict]:
+        rng = self._rng("dealers")
+        for i in range(self.n_dealers):
+            name = f"{rng.choice(DEALER_WORDS)} {rng.choice(LAST_NAMES)} {rng.choice(DEALER_WORDS)}"
+            city, province, _ = LOCATIONS[self.dealer_location[i]]
+            slug = f"{ascii_slug(name)}{i}"
+            yield {
+                "id": self.dealer_id(i),
+                "userId": self.user_id(i),
+                "businessName": f"{name} #{i}",
+                "tradeName": name,
+                "legalName": f"{name} SRL",
+                "rnc": f"4{rng.randrange(10 ** 8):08d}",
+                "type": rng.choice(DEALER_TYPES),
+                "status": "Active",
+                "verificationStatus": "Verified" if rng.random() < 0.8 else "Pending",
+                "currentPlan": rng.choice(DEALER_PLANS),
+                "email": f"ventas@{slug}.synthetic.okla.com.do",
+                "phone": f"+1809{rng.randrange(10 ** 7):07d}",
+                "address": f"Calle {rng.randrange(1, 100)} #{rng.randrange(1, 500)}",
+                "city": city,
+                "province": province,
+                "country": "DO",
+                "latitude": round(18.0 + rng.random() * 1.8, 6),
+                "longitude": round(-71.5 + rng.random() * 3.0, 6),
+                "acceptsTradeIns": rng.random() < 0.6,
+                "offersFinancing": rng.random() < 0.5,
+            }
+
+    def vehicles(self) -> Iterator[Dict]:
+        rng = self._rng("vehicles")
+        current_year = EPOCH.year
+        for i in range(self.n_vehicles):
+            make, model, model_year, trim = rng.choice(self.catalog)
+            condition = weighted(rng, CONDITIONS)
+            age = 0 if condition == "New" else rng.randrange(0, 12)
+            year = min(model_year, current_year) - age
+            mileage = 0 if condition == "New" else int(rng.gauss(18000, 6000) * max(age, 0.5))
+            msrp = trim.get("msrp") or 30000
+            price = msrp * 0.87 ** age * rng.uniform(0.9, 1.1)
+            vehicle_type, body_style = BODY_STYLES.get(model, ("Car", "Sedan"))
+            dealer = self.vehicle_dealer[i]
+            city, province, _ = LOCATIONS[self.dealer_location[dealer]]
+            yield {
+                "id": self.vehicle_id(i),
+                "dealerId": self.dealer_id(dealer),
+                "title": f"{make} {model} {trim['name']} {year}",
+                "make": make,
+                "model": model,
+                "trim": trim["name"],
+                "year": year,
+                "price": int(round(price, -2)),
+                "currency": "USD",
+                "mileage": max(mileage, 0),
+                "mileageUnit": "Kilometers",
+                "condition": condition,
+                "vehicleType": vehicle_type,
+                "bodyStyle": body_style,
+                "fuelType": trim.get("fuel", "Gasoline"),
+                "transmission": trim.get("trans", "Automatic"),
+                "driveType": trim.get("drive", "FWD"),
+                "engineSize": trim.get("engine"),
+                "horsepower": trim.get("hp"),
+                "torque": trim.get("torque"),
+                "mpgCity": trim.get("mpg_city"),
+                "mpgHighway": trim.get("mpg_hwy"),
+                "exteriorColor": rng.choice(COLORS),
+                "interiorColor": rng.choice(["Negro", "Gris", "Beige"]),
+                "vin": make_vin(rng),
+                "stockNumber": f"SYN-{dealer:05d}-{i:07d}",
+                "status": weighted(rng, STATUSES),
+                "features": rng.sample(FEATURES, rng.randrange(3, 8)),
+                "city": city,
+                "state": province,
+            }
+
+    def vehicle_images(self) -> Iterator[Dict]:
+        rng = self._rng("vehicleImages")
+        for v in range(self.n_vehicles):
+            folder = rng.randrange(1, IMAGE_FOLDERS + 1)
+            for n in range(IMAGES_PER_VEHICLE):
+                yield {
+                    "id": entity_id("image", self.seed, v * IMAGES_PER_VEHICLE + n),
+                    "vehicleId": self.vehicle_id(v),
+                    "url": f"/vehicle_images/{folder:03d}/image_{n + 1}.jpg",
+                    "type": IMAGE_TYPES[n % len(IMAGE_TYPES)],
+                    "order": n + 1,
+                    "alt": f"Vehículo {v} - foto {n + 1}",
+                }
+
+    def table_rows(self) -> Dict[str, Callable[[], Iterator[Dict]]]:
+        """Filas con las columnas reales de las tablas de CSV_TABLES"""
+        return {"vehicles": self.vehicle_rows, "vehicleImages": self.vehicle_image_rows}
+
+    def vehicle_rows(self) -> Iterator[Dict]:
+        """vehicles: el registro de vehicles() más las columnas NOT NULL que la API rellena sola"""
+        sellers = [(d["userId"], d["tradeName"], d["type"], d["verificationStatus"] == "Verified",
+                    d["phone"], d["email"], d["latitude"], d["longitude"]) for d in self.dealers()]
+        for i, v in enumerate(self.vehicles()):
+            user_id, name, dealer_type, verified, phone, email, lat, lng = sellers[self.vehicle_dealer[i]]
+            doors, seats = DOORS_SEATS.get(v["bodyStyle"], (4, 5))
+            yield {
+                "Id": v["id"],
+                "DealerId": v["dealerId"],
+                "Title": v["title"],
+                "Description": f"{v['title']} en {v['city']}. Vehículo sintético para pruebas de carga.",
+                "Price": v["price"],
+                "Currency": v["currency"],
+                "Status": v["status"],
+                "SellerId": user_id,
+                "SellerName": name,
+                "SellerType": SELLER_TYPE_FRANCHISE if dealer_type == "Franchise" else SELLER_TYPE_DEALER,
+                "SellerPhone": phone,
+                "SellerEmail": email,
+                "SellerVerified": verified,
+                "SellerCity": v["city"],
+                "SellerState": v["state"],
+                "VIN": v["vin"],
+                "StockNumber": v["stockNumber"],
+                "Make": v["make"],
+                "Model": v["model"],
+                "Trim": v["trim"],
+                "Year": v["year"],
+                "VehicleType": v["vehicleType"],
+                "BodyStyle": v["bodyStyle"],
+                "Doors": doors,
+                "Seats": seats,
+                "FuelType": v["fuelType"],
+                "EngineSize": v["engineSize"],
+                "Horsepower": v["horsepower"],
+                "Torque": v["torque"],
+                "Transmission": v["transmission"],
+                "DriveType": DB_DRIVE_TYPES.get(v["driveType"], v["driveType"]),
+                "Mileage": v["mileage"],
+                "MileageUnit": v["mileageUnit"],
+                "Condition": v["condition"],
+                "AccidentHistory": False,
+                "HasCleanTitle": True,
+                "ExteriorColor": v["exteriorColor"],
+                "InteriorColor": v["interiorColor"],
+                "MpgCity": v["mpgCity"],
+                "MpgHighway": v["mpgHighway"],
+                "City": v["city"],
+                "State": v["state"],
+                "Country": "DO",
+                "Latitude": lat,
+                "Longitude": lng,
+                "IsCertified": v["condition"] == "CertifiedPreOwned",
+                "FeaturesJson": v["features"],
+                "ViewCount": 0,
+                "FavoriteCount": 0,
+                "InquiryCount": 0,
+                "CreatedAt": EPOCH.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "UpdatedAt": EPOCH.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "IsDeleted": False,
+                "IsFeatured": False,
+            }
+
+    def vehicle_image_rows(self) -> Iterator[Dict]:
+        """vehicle_images: DealerId desnormalizado, ImageType como int, IsPrimary explícito"""
+        for i, image in enumerate(self.vehicle_images()):
+            yield {
+                "Id": image["id"],
+                "DealerId": self.dealer_id(self.vehicle_dealer[i // IMAGES_PER_VEHICLE]),
+                "VehicleId": image["vehicleId"],
+                "Url": image["url"],
+                "Caption": image["alt"],
+                "ImageType": DB_IMAGE_TYPES[image["type"]],
+                "SortOrder": image["order"],
+                "IsPrimary": image["type"] == "Primary",
+                "MimeType": "image/jpeg",
+            }
+
+    def reviews(self) -> Iterator[Dict]:
+        """Reviews de compradores (usuarios Individual) sobre vehículos existentes de cada dealer"""
+        rng = self._rng("reviews")
+        for i in range(self.n_reviews):
+            vehicle = rng.randrange(self.n_vehicles)
+            rating = weighted(rng, REVIEW_RATINGS)
+            created = EPOCH - timedelta(minutes=rng.randrange(60 * 24 * 730))
+            yield {
+                "id": entity_id("review", self.seed, i),
+                "dealerId": self.dealer_id(self.vehicle_dealer[vehicle]),
+                "buyerId": self.user_id(rng.randrange(self.n_dealers, self.n_users)),
+                "vehicleId": self.vehicle_id(vehicle),
+                "rating": rating,
+                "title": rng.choice(REVIEW_TITLES[rating]),
+                "content": f"Review sintética {i}: calificación {rating} de 5.",
+                "pros": [],
+                "cons": [],
+                "wouldRecommend": rating >= 4,
+                "status": "Approved" if rng.random() < 0.9 else "Pending",
+                "verifiedPurchase": rng.random() < 0.7,
+                "createdAt": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+
+# ============================================================================
+# ESCRITURA
+# ============================================================================
+
+def _csv_value(value: Any) -> Any:
+    """Formato de COPY ... WITH (FORMAT csv, HEADER): NULL = vacío sin comillas, listas como JSON (jsonb)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def write_entity(records: Iterator[Dict], path: Path, fmt: str) -> Tuple[int, List[str]]:
+    """Escribir en streaming; devuelve el número de registros y las columnas (CSV)"""
+    count = 0
+    columns: List[str] = []
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "ndjson":
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+                count += 1
+        else:
+            writer = None
+            for record in records:
+                if writer is None:
+                    writer = csv.writer(f)
+                    columns = list(record.keys())
+                    writer.writerow(columns)
+                writer.writerow([_csv_value(value) for value in record.values()])
+                count += 1
+    return count, columns
+
+def copy_command(table: str, columns: List[str], filename: str) -> str:
+    """HEADER solo salta la primera línea (no mapea por nombre): la lista de columnas va explícita"""
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    return f"\\copy {table} ({column_list}) FROM '{filename}' WITH (FORMAT csv, HEADER)"
+
+def generate(vehicles: int, seed: int, fmt: str, output: Path, entities: List[str]) -> Dict:
+    dataset = SyntheticDataset(vehicles=vehicles, seed=seed)
+    output.mkdir(parents=True, exist_ok=True)
+    generators = dataset.generators() if fmt == "ndjson" else dataset.table_rows()
+    extension = "ndjson" if fmt == "ndjson" else "csv"
+    copy_commands = []
+
+    manifest: Dict[str, Any] = {
+        "generator_version": GENERATOR_VERSION,
+        "seed": seed,
+        "vehicles": vehicles,
+        "format": fmt,
+        "files": {},
+    }
+    for entity in entities:
+        start = time.perf_counter()
+        name = CSV_TABLES[entity] if fmt == "csv" else entity
+        path = output / f"{name}.{extension}"
+        count, columns = write_entity(generators[entity](), path, fmt)
+        elapsed = time.perf_counter() - start
+        manifest["files"][entity] = {"file": path.name, "records": count}
+        if fmt == "csv" and columns:
+            manifest["files"][entity]["table"] = CSV_TABLES[entity]
+            copy_commands.append(copy_command(CSV_TABLES[entity], columns, path.name))
+        print(f"✅ {entity:<14} {count:>10,} registros en {elapsed:6.1f}s ({count / max(elapsed, 1e-9):,.0f}/s) -> {path}")
+
+    with open(output / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    if copy_commands:
+        # Rutas relativas: ejecutar psql desde el directorio de salida
+        with open(output / "load.sql", "w", encoding="utf-8") as f:
+            f.write("\n".join(copy_commands) + "\n")
+        print(f"\n📋 Carga en la base de VehiclesSaleService (desde {output}):")
+        for command in copy_commands:
+            print(f"  {command}")
+        print(f"  (o: cd {output} && psql \"$VEHICLESSALE_DB\" -f load.sql)")
+    return manifest
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generador de dataset sintético para seeding y pruebas de carga",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Carga directa (CSV, solo vehicles y vehicle_images de VehiclesSaleService):
+  python generate_synthetic_dataset.py --vehicles 100000 --format csv --output /tmp/okla
+  cd /tmp/okla && psql "$VEHICLESSALE_DB" -f load.sql   # \\copy con lista de columnas explícita
+
+Seeding vía API (NDJSON):
+  python seed_database.py --dataset ../generated/10000 --only users,dealers,vehicles,media,reviews
+        """
+    )
+    parser.add_argument("--vehicles", type=int, default=10000,
+                        help="Vehículos a generar; el resto escala en proporción (default: 10000)")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla (default: 42)")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="Formato de salida")
+    parser.add_argument("--output", type=Path, help="Directorio de salida (default: data/seeding/generated/<vehicles>)")
+    parser.add_argument("--entities",
+                        help=f"Entidades a generar, separadas por comas (default: {','.join(ENTITIES)}; "
+                             f"con --format csv: {','.join(CSV_TABLES)})")
+    args = parser.parse_args()
+
+    allowed = ENTITIES if args.format == "ndjson" else tuple(CSV_TABLES)
+    entities = [entity.strip() for entity in (args.entities or ",".join(allowed)).split(",") if entity.strip()]
+    unknown = set(entities) - set(allowed)
+    if unknown or args.vehicles < 1:
+        if unknown and args.format == "csv":
+            parser.error(f"--format csv solo cubre {', '.join(CSV_TABLES)} (tablas de VehiclesSaleService); "
+                         f"{', '.join(sorted(unknown))}: usar NDJSON + seed_database.py")
+        parser.error(f"Entidades desconocidas: {sorted(unknown)}" if unknown else "--vehicles debe ser >= 1")
+    if args.format == "csv":
+        entities = [entity for entity in CSV_TABLES if entity in entities]  # orden de las FKs
+
+    output = args.output or DEFAULT_OUTPUT / str(args.vehicles)
+    print(f"🚗 Dataset sintético: {args.vehicles:,} vehículos, semilla {args.seed}, formato {args.format}")
+    generate(args.vehicles, args.seed, args.format, output, entities)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
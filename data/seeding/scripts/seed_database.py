@@ -10,27 +10,48 @@ Autor: Gregory Moreno
 Fecha: Enero 2026
 Versión: 1.0.0
 
+Los grupos de entidades se declaran como un DAG de dependencias: los grupos
+independientes se siembran en paralelo, todas las requests comparten una sesión
+HTTP keep-alive y la concurrencia total está acotada (--concurrency).
+
+Cada entidad creada queda registrada (huella de URL + payload) en un journal
+SQLite local: una re-ejecución omite lo ya creado, reintenta con backoff solo
+lo que falló y --only acepta grupos o entidades (p. ej. reviews.reviewResponses).
+
+Con --dataset DIR las entidades se leen en streaming de DIR/<entidad>.ndjson
+(generate_synthetic_dataset.py); las que el dataset no trae salen de los fixtures.
+
 Uso:
-    python seed_database.py [--env dev|docker|prod] [--dry-run] [--only <service>]
+    python seed_database.py [--env dev|docker|prod] [--dry-run] [--only <grupo|entidad>[,...]]
+                            [--concurrency N] [--parallel-groups N]
+                            [--journal PATH | --no-journal] [--reset-journal] [--max-retries N]
+                            [--dataset DIR]
 
 Ejemplos:
     python seed_database.py                     # Seed desarrollo local
     python seed_database.py --env docker        # Seed ambiente Docker
     python seed_database.py --dry-run           # Ver qué haría sin ejecutar
     python seed_database.py --only vehicles     # Solo seed de vehículos
+    python seed_database.py --only roles.rolePermissions,payments
 """
 
 import os
 import sys
 import json
 import time
+import random
+import sqlite3
+import hashlib
 import argparse
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Any, Set, Tuple
+from dataclasses import dataclass, replace
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 # ============================================================================
 # CONFIGURACIÓN DE AMBIENTES
@@ -129,12 +150,331 @@ class SeedResult:
     success: int
     failed: int
     errors: List[str]
+    skipped: int = 0  # ya creados (journal o HTTP 409)
+    retried: int = 0
+    duration_seconds: float = 0.0
     
     @property
     def success_rate(self) -> float:
         if self.total == 0:
             return 0.0
-        return (self.success / self.total) * 100
+        return ((self.success + self.skipped) / self.total) * 100
+    
+    @property
+    def throughput(self) -> float:
+        """Registros procesados por segundo"""
+        if self.duration_seconds <= 0:
+            return 0.0
+        return self.total / self.duration_seconds
+
+@dataclass
+class SeedTask:
+    """Un POST de seeding"""
+    url: str
+    payload: Dict
+    label: str
+
+@dataclass
+class SeedStage:
+    """Tareas de una entidad que pueden enviarse en paralelo; las etapas de un grupo van en orden"""
+    entity: str
+    tasks: Iterable[SeedTask]  # puede ser un generador (datasets grandes): se consume por bloques
+    # Endpoint de creación masiva (si el servicio lo expone): recibe {"items": [...]}
+    bulk_url: Optional[str] = None
+    bulk_size: int = 100
+
+@dataclass
+class SeedGroup:
+    """Grupo de entidades del DAG de seeding"""
+    name: str
+    service: str
+    entity: str
+    plan: Callable[[], List[SeedStage]]
+    entities: Tuple[str, ...]  # entidades de sus etapas (las que se ejecutan)
+    depends_on: Tuple[str, ...] = ()
+
+# Tareas por bloque al consumir una etapa (acota memoria con datasets de millones de registros)
+STAGE_CHUNK_SIZE = 2000
+
+# Errores que vale la pena reintentar (None = error de conexión / timeout)
+RETRYABLE_STATUS = {None, 408, 425, 429, 500, 502, 503, 504}
+
+def http_status(response: Any) -> Optional[int]:
+    """Código HTTP de un error de SeedClient.post ("HTTP 500: ..."); None si no hubo respuesta"""
+    if isinstance(response, str) and response.startswith("HTTP "):
+        try:
+            return int(response[5:8])
+        except ValueError:
+            return None
+    return None
+
+# ============================================================================
+# JOURNAL DE SEEDING
+# ============================================================================
+
+class SeedJournal:
+    """Journal SQLite de entidades sembradas por ambiente (huella = URL + payload canónico)"""
+    
+    def __init__(self, path: Path, env: str, read_only: bool = False):
+        self.path = Path(path)
+        self.env = env
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seeded (
+                env TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                entity TEXT NOT NULL,
+                label TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (env, fingerprint)
+            )
+        """)
+        self._conn.commit()
+    
+    @staticmethod
+    def fingerprint(task: SeedTask) -> str:
+        canonical = json.dumps(task.payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(f"{task.url}\n{canonical}".encode("utf-8")).hexdigest()
+    
+    def created(self, fingerprints: List[str]) -> Set[str]:
+        """Huellas ya creadas en este ambiente"""
+        found: Set[str] = set()
+        with self._lock:
+            for offset in range(0, len(fingerprints), 500):
+                chunk = fingerprints[offset:offset + 500]
+                rows = self._conn.execute(
+                    f"SELECT fingerprint FROM seeded WHERE env = ? AND status = 'created' "
+                    f"AND fingerprint IN ({','.join('?' * len(chunk))})",
+                    [self.env, *chunk]
+                )
+                found.update(row[0] for row in rows)
+        return found
+    
+    def record(self, entries: List[Tuple[str, str, str, str, int, Optional[str]]]):
+        """Registrar (huella, entidad, label, status, intentos, error) en una transacción"""
+        if self.read_only or not entries:
+            return
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO seeded (env, fingerprint, entity, label, status, attempts, last_error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (env, fingerprint) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = seeded.attempts + excluded.attempts,
+                    last_error = excluded.last_error,
+                    updated_at = excluded.updated_at
+            """, [(self.env, *entry, now) for entry in entries])
+    
+    def reset(self, entities: Optional[Iterable[str]] = None) -> int:
+        """Olvidar lo sembrado (todo el ambiente o solo las entidades dadas)"""
+        with self._lock, self._conn:
+            if entities is None:
+                cursor = self._conn.execute("DELETE FROM seeded WHERE env = ?", (self.env,))
+            else:
+                entities = list(entities)
+                cursor = self._conn.execute(
+                    f"DELETE FROM seeded WHERE env = ? AND entity IN ({','.join('?' * len(entities))})",
+                    [self.env, *entities]
+                )
+        return cursor.rowcount
+    
+    def close(self):
+        self._conn.close()
+
+# ============================================================================
+# CLIENTE HTTP Y MOTOR DE SEEDING
+# ============================================================================
+
+class SeedClient:
+    """Sesión HTTP keep-alive compartida por todos los grupos (thread-safe)"""
+    
+    def __init__(self, pool_size: int, dry_run: bool = False, timeout: Tuple[float, float] = (3.05, 30)):
+        self.dry_run = dry_run
+        self.timeout = timeout
+        self.token: Optional[str] = None
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(ENVIRONMENTS["dev"]["services"]), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+    
+    def post(self, url: str, data: Any, headers: Dict = None) -> tuple[bool, Any]:
+        if self.dry_run:
+            log_info(f"[DRY-RUN] POST {url}")
+            return True, {"id": "dry-run-id"}
+        
+        request_headers = dict(headers or {})
+        if self.token:
+            request_headers.setdefault("Authorization", f"Bearer {self.token}")
+        
+        try:
+            response = self.session.post(url, json=data, headers=request_headers, timeout=self.timeout)
+            
+            if response.status_code in [200, 201, 204]:
+                try:
+                    return True, response.json()
+                except ValueError:
+                    return True, {}
+            else:
+                return False, f"HTTP {response.status_code}: {response.text[:200]}"
+                
+        except requests.exceptions.RequestException as e:
+            return False, str(e)
+    
+    def get(self, url: str, timeout: float = 5) -> requests.Response:
+        return self.session.get(url, timeout=timeout)
+
+class SeedingEngine:
+    """Ejecuta los grupos respetando el DAG; grupos sin dependencias pendientes corren en paralelo"""
+    
+    def __init__(self, client: SeedClient, journal: Optional[SeedJournal] = None, concurrency: int = 16,
+                 parallel_groups: int = 4, max_retries: int = 3, retry_backoff: float = 0.5):
+        self.client = client
+        self.journal = journal
+        self.concurrency = concurrency
+        self.parallel_groups = parallel_groups
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+    
+    @staticmethod
+    def validate(groups: List[SeedGroup]):
+        """Dependencias conocidas y sin ciclos"""
+        names = {group.name for group in groups}
+        for group in groups:
+            unknown = set(group.depends_on) - names
+            if unknown:
+                raise ValueError(f"Grupo '{group.name}' depende de grupos inexistentes: {sorted(unknown)}")
+        
+        pending = {group.name: set(group.depends_on) for group in groups}
+        while pending:
+            ready = [name for name, deps in pending.items() if not deps]
+            if not ready:
+                raise ValueError(f"Ciclo de dependencias entre: {sorted(pending)}")
+            for name in ready:
+                del pending[name]
+            for deps in pending.values():
+                deps.difference_update(ready)
+    
+    def run(self, groups: List[SeedGroup]) -> List[SeedResult]:
+        """Sembrar los grupos seleccionados (dependencias fuera de la selección se asumen listas)"""
+        selected = {group.name for group in groups}
+        pending = {group.name: set(group.depends_on) & selected for group in groups}
+        by_name = {group.name: group for group in groups}
+        results: Dict[str, SeedResult] = {}
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="seed-request") as requests_pool, \
+                ThreadPoolExecutor(max_workers=self.parallel_groups, thread_name_prefix="seed-group") as groups_pool:
+            running: Dict[Future, str] = {}
+            while pending or running:
+                for name in [name for name, deps in pending.items() if not deps]:
+                    del pending[name]
+                    running[groups_pool.submit(self._run_group, by_name[name], requests_pool)] = name
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    for deps in pending.values():
+                        deps.discard(name)
+        
+        return [results[group.name] for group in groups]
+    
+    def _run_group(self, group: SeedGroup, requests_pool: ThreadPoolExecutor) -> SeedResult:
+        log_info(f"▶ {group.entity} ({group.service}) iniciado")
+        start = time.perf_counter()
+        result = SeedResult(service=group.service, entity=group.entity, total=0, success=0, failed=0, errors=[])
+        
+        try:
+            for stage in group.plan():
+                if stage.entity in group.entities:
+                    self._run_stage(f"{group.name}.{stage.entity}", stage, requests_pool, result)
+        except Exception as e:
+            log_error(f"Error en seeder {group.name}: {e}")
+            result.failed += 1
+            result.errors.append(str(e))
+        
+        result.duration_seconds = time.perf_counter() - start
+        log = log_success if result.failed == 0 else log_warning
+        log(f"{group.entity}: {result.success} creados, {result.skipped} omitidos, {result.failed} fallidos "
+            f"de {result.total} en {result.duration_seconds:.2f}s ({result.throughput:.0f} registros/s)")
+        return result
+    
+    def _run_stage(self, entity: str, stage: SeedStage, requests_pool: ThreadPoolExecutor, result: SeedResult):
+        tasks = iter(stage.tasks)
+        while True:
+            chunk = list(islice(tasks, STAGE_CHUNK_SIZE))
+            if not chunk:
+                break
+            self._run_chunk(entity, stage, chunk, requests_pool, result)
+    
+    def _run_chunk(self, entity: str, stage: SeedStage, tasks: List[SeedTask], requests_pool: ThreadPoolExecutor,
+                   result: SeedResult):
+        """Omitir lo que el journal ya tiene, enviar el resto y reintentar solo los fallos transitorios"""
+        result.total += len(tasks)
+        fingerprints = [SeedJournal.fingerprint(task) for task in tasks]
+        done = self.journal.created(fingerprints) if self.journal else set()
+        pending = [(task, fp) for task, fp in zip(tasks, fingerprints) if fp not in done]
+        result.skipped += len(tasks) - len(pending)
+        
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = self.retry_backoff * 2 ** (attempt - 1)
+                time.sleep(delay + random.uniform(0, delay / 2))
+                result.retried += len(pending)
+            
+            # Bulk solo en el primer intento; los reintentos van por entidad
+            responses = self._send(stage, [task for task, _ in pending], requests_pool, bulk=attempt == 0)
+            retry, entries = [], []
+            for (task, fp), (ok, response) in zip(pending, responses):
+                status = None if ok else http_status(response)
+                if ok:
+                    result.success += 1
+                    entries.append((fp, entity, task.label, "created", attempt + 1, None))
+                elif status == 409:
+                    result.skipped += 1  # ya existía en el servicio
+                    entries.append((fp, entity, task.label, "created", attempt + 1, None))
+                elif status in RETRYABLE_STATUS and attempt < self.max_retries:
+                    retry.append((task, fp))
+                else:
+                    result.failed += 1
+                    result.errors.append(f"{task.label}: {response}")
+                    entries.append((fp, entity, task.label, "failed", attempt + 1, str(response)[:500]))
+            
+            if self.journal:
+                self.journal.record(entries)
+            pending = retry
+            if not pending:
+                break
+    
+    def _send(self, stage: SeedStage, tasks: List[SeedTask], requests_pool: ThreadPoolExecutor,
+              bulk: bool) -> List[Tuple[bool, Any]]:
+        if bulk and stage.bulk_url:
+            responses = self._send_bulk(stage, tasks)
+            if responses is not None:
+                return responses
+        
+        futures = [requests_pool.submit(self.client.post, task.url, task.payload) for task in tasks]
+        return [future.result() for future in futures]
+    
+    def _send_bulk(self, stage: SeedStage, tasks: List[SeedTask]) -> Optional[List[Tuple[bool, Any]]]:
+        """Enviar por lotes; None si el endpoint masivo no existe (se usa el individual)"""
+        responses: List[Tuple[bool, Any]] = []
+        for offset in range(0, len(tasks), stage.bulk_size):
+            chunk = tasks[offset:offset + stage.bulk_size]
+            ok, response = self.client.post(stage.bulk_url, {"items": [task.payload for task in chunk]})
+            if not ok and offset == 0 and http_status(response) in (404, 405):
+                return None
+            responses.extend([(ok, response)] * len(chunk))
+        return responses
 
 # ============================================================================
 # CLASE PRINCIPAL DE SEEDING
@@ -143,13 +483,23 @@ class SeedResult:
 class DatabaseSeeder:
     """Clase principal para ejecutar el seeding de la base de datos"""
     
-    def __init__(self, env: str = "dev", dry_run: bool = False):
+    def __init__(self, env: str = "dev", dry_run: bool = False, concurrency: int = 16, parallel_groups: int = 4,
+                 journal_path: Optional[Path] = None, max_retries: int = 3, dataset_dir: Optional[Path] = None):
         self.env = env
         self.dry_run = dry_run
         self.config = ENVIRONMENTS[env]
         self.base_path = Path(__file__).parent.parent
+        self.dataset_dir = Path(dataset_dir) if dataset_dir else None
         self.results: List[SeedResult] = []
-        self.admin_token: Optional[str] = None
+        self.client = SeedClient(pool_size=concurrency, dry_run=dry_run)
+        # En dry-run el journal solo se consulta (muestra qué se omitiría)
+        self.journal = SeedJournal(journal_path, env, read_only=dry_run) if journal_path else None
+        self.engine = SeedingEngine(self.client, journal=self.journal, concurrency=concurrency,
+                                    parallel_groups=parallel_groups, max_retries=max_retries)
+        
+    @property
+    def admin_token(self) -> Optional[str]:
+        return self.client.token
         
     def get_service_url(self, service: str) -> str:
         """Obtiene la URL base de un servicio"""
@@ -165,34 +515,28 @@ class DatabaseSeeder:
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     
+    def records(self, entity: str, *fixture_paths: str) -> Iterable[Dict]:
+        """Registros de una entidad: NDJSON del dataset (streaming) o la lista de los fixtures"""
+        if self.dataset_dir:
+            path = self.dataset_dir / f"{entity}.ndjson"
+            if path.exists():
+                return self.stream_ndjson(path)
+        
+        records: List[Dict] = []
+        for fixture_path in fixture_paths:
+            records.extend(self.load_json(fixture_path).get(entity, []))
+        return records
+    
+    @staticmethod
+    def stream_ndjson(path: Path) -> Iterator[Dict]:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    
     def api_post(self, url: str, data: Dict, headers: Dict = None) -> tuple[bool, Any]:
-        """Realiza un POST a la API"""
-        if self.dry_run:
-            log_info(f"[DRY-RUN] POST {url}")
-            return True, {"id": "dry-run-id"}
-        
-        try:
-            default_headers = {
-                "Content-Type": "application/json",
-            }
-            if self.admin_token:
-                default_headers["Authorization"] = f"Bearer {self.admin_token}"
-            
-            if headers:
-                default_headers.update(headers)
-            
-            response = requests.post(url, json=data, headers=default_headers, timeout=30)
-            
-            if response.status_code in [200, 201, 204]:
-                try:
-                    return True, response.json()
-                except:
-                    return True, {}
-            else:
-                return False, f"HTTP {response.status_code}: {response.text[:200]}"
-                
-        except requests.exceptions.RequestException as e:
-            return False, str(e)
+        """Realiza un POST a la API (sesión keep-alive compartida)"""
+        return self.client.post(url, data, headers)
     
     def authenticate_admin(self) -> bool:
         """Autentica como admin para obtener token"""
@@ -207,7 +551,7 @@ class DatabaseSeeder:
         
         success, result = self.api_post(url, data)
         if success and isinstance(result, dict) and "token" in result:
-            self.admin_token = result["token"]
+            self.client.token = result["token"]
             log_success("Autenticación exitosa")
             return True
         else:
@@ -215,428 +559,226 @@ class DatabaseSeeder:
             return False
     
     # ========================================================================
-    # SEEDERS POR SERVICIO
+    # PLANES POR SERVICIO (etapas de requests; el motor las ejecuta)
     # ========================================================================
     
-    def seed_users(self) -> SeedResult:
-        """Seed de usuarios (AuthService)"""
-        log_header("SEEDING: USUARIOS (AuthService)")
-        
-        data = self.load_json("01_auth/users.json")
-        users = data.get("users", [])
-        
-        service_url = self.get_service_url("auth")
-        errors = []
-        success = 0
+    def seed_groups(self) -> List[SeedGroup]:
+        """DAG de grupos: cada uno depende de las entidades que referencia"""
+        return [
+            SeedGroup("users", "AuthService", "Users", self.plan_users, ("users",)),
+            SeedGroup("roles", "RoleService", "Roles", self.plan_roles,
+                      ("permissions", "roles", "rolePermissions")),
+            SeedGroup("dealers", "DealerManagementService", "Dealers", self.plan_dealers, ("dealers",),
+                      depends_on=("users",)),
+            SeedGroup("notifications", "NotificationService", "Notifications", self.plan_notifications,
+                      ("templates", "notifications"), depends_on=("users",)),
+            SeedGroup("dealer_management", "DealerManagementService", "DealerManagement",
+                      self.plan_dealer_management, ("dealerLocations", "dealerStaff"), depends_on=("dealers",)),
+            SeedGroup("vehicles", "VehiclesSaleService", "Vehicles", self.plan_vehicles, ("vehicles",),
+                      depends_on=("dealers",)),
+            SeedGroup("billing", "BillingService", "Billing", self.plan_billing,
+                      ("subscriptions", "payments"), depends_on=("dealers",)),
+            SeedGroup("contacts", "ContactService", "Contacts", self.plan_contacts,
+                      ("contactRequests", "messages"), depends_on=("vehicles",)),
+            SeedGroup("reviews", "ReviewService", "Reviews", self.plan_reviews,
+                      ("reviews", "dealerBadges", "reviewResponses"), depends_on=("vehicles",)),
+            SeedGroup("media", "MediaService", "Media", self.plan_media,
+                      ("vehicleImages", "userAvatars"), depends_on=("vehicles",)),
+        ]
+    
+    @staticmethod
+    def select_groups(groups: List[SeedGroup], only: str) -> List[SeedGroup]:
+        """
+        Filtrar por --only: nombres de grupo ("reviews"), de entidad ("reviewResponses")
+        o grupo.entidad ("roles.roles"), separados por comas
+        """
+        by_name = {group.name: group for group in groups}
+        selected: Dict[str, Set[str]] = {}
+        
+        for selector in filter(None, (part.strip() for part in only.split(","))):
+            group_name, _, entity = selector.partition(".")
+            if not entity and group_name in by_name:
+                selected[group_name] = set(by_name[group_name].entities)
+                continue
+            
+            if entity:
+                matches = [by_name[group_name]] if entity in getattr(by_name.get(group_name), "entities", ()) else []
+            else:
+                entity = selector
+                matches = [group for group in groups if entity in group.entities]
+            if len(matches) != 1:
+                raise ValueError(f"Grupo o entidad '{selector}' no encontrado")
+            selected.setdefault(matches[0].name, set()).add(entity)
+        
+        return [
+            replace(group, entities=tuple(e for e in group.entities if e in selected[group.name]))
+            for group in groups if group.name in selected
+        ]
+    
+    def plan_users(self) -> List[SeedStage]:
+        """Usuarios (AuthService)"""
+        users = self.records("users", "01_auth/users.json")
+        url = f"{self.get_service_url('auth')}/api/auth/register"
         
-        for user in users:
-            # Preparar datos para registro
-            register_data = {
+        return [SeedStage("users", (
+            SeedTask(url, {
                 "email": user["email"],
                 "password": "Test123!",  # Contraseña por defecto
                 "firstName": user["firstName"],
                 "lastName": user["lastName"],
                 "accountType": user["accountType"],
                 "phoneNumber": user.get("phoneNumber"),
-            }
-            
-            url = f"{service_url}/api/auth/register"
-            ok, result = self.api_post(url, register_data)
-            
-            if ok:
-                success += 1
-                log_success(f"Usuario creado: {user['email']}")
-            else:
-                errors.append(f"{user['email']}: {result}")
-                log_error(f"Error creando usuario {user['email']}: {result}")
-        
-        return SeedResult(
-            service="AuthService",
-            entity="Users",
-            total=len(users),
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
+            }, user["email"])
+            for user in users
+        ))]
     
-    def seed_dealers(self) -> SeedResult:
-        """Seed de dealers (DealerManagementService)"""
-        log_header("SEEDING: DEALERS (DealerManagementService)")
-        
-        data = self.load_json("02_users/dealers.json")
-        dealers = data.get("dealers", [])
-        
-        service_url = self.get_service_url("dealers")
-        errors = []
-        success = 0
-        
-        for dealer in dealers:
-            url = f"{service_url}/api/dealers"
-            ok, result = self.api_post(url, dealer)
-            
-            if ok:
-                success += 1
-                log_success(f"Dealer creado: {dealer['businessName']}")
-            else:
-                errors.append(f"{dealer['businessName']}: {result}")
-                log_error(f"Error creando dealer: {result}")
-        
-        return SeedResult(
-            service="DealerManagementService",
-            entity="Dealers",
-            total=len(dealers),
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
-    
-    def seed_vehicles(self) -> SeedResult:
-        """Seed de vehículos (VehiclesSaleService)"""
-        log_header("SEEDING: VEHÍCULOS (VehiclesSaleService)")
-        
-        # Cargar ambos archivos de vehículos
-        data1 = self.load_json("03_vehicles/vehicles_part1.json")
-        data2 = self.load_json("03_vehicles/vehicles_part2.json")
-        
-        vehicles = data1.get("vehicles", []) + data2.get("vehicles", [])
-        
-        service_url = self.get_service_url("vehicles")
-        errors = []
-        success = 0
-        
-        for vehicle in vehicles:
-            url = f"{service_url}/api/vehicles"
-            ok, result = self.api_post(url, vehicle)
-            
-            if ok:
-                success += 1
-                log_success(f"Vehículo creado: {vehicle['make']} {vehicle['model']} ({vehicle['year']})")
-            else:
-                errors.append(f"{vehicle['make']} {vehicle['model']}: {result}")
-                log_error(f"Error creando vehículo: {result}")
-        
-        return SeedResult(
-            service="VehiclesSaleService",
-            entity="Vehicles",
-            total=len(vehicles),
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
-    
-    def seed_billing(self) -> SeedResult:
-        """Seed de facturación (BillingService)"""
-        log_header("SEEDING: FACTURACIÓN (BillingService)")
-        
+    def plan_dealers(self) -> List[SeedStage]:
+        """Dealers (DealerManagementService)"""
+        dealers = self.records("dealers", "02_users/dealers.json")
+        url = f"{self.get_service_url('dealers')}/api/dealers"
+        return [SeedStage("dealers", (SeedTask(url, dealer, dealer["businessName"]) for dealer in dealers))]
+    
+    def plan_vehicles(self) -> List[SeedStage]:
+        """Vehículos (VehiclesSaleService)"""
+        # Fixtures: ambos archivos de vehículos
+        vehicles = self.records("vehicles", "03_vehicles/vehicles_part1.json", "03_vehicles/vehicles_part2.json")
+        
+        url = f"{self.get_service_url('vehicles')}/api/vehicles"
+        return [SeedStage("vehicles", (
+            SeedTask(url, vehicle, f"{vehicle['make']} {vehicle['model']} ({vehicle['year']})")
+            for vehicle in vehicles
+        ))]
+    
+    def plan_billing(self) -> List[SeedStage]:
+        """Facturación (BillingService): los pagos referencian suscripciones"""
         data = self.load_json("04_billing/billing_data.json")
         service_url = self.get_service_url("billing")
-        errors = []
-        success = 0
-        total = 0
-        
-        # Subscriptions
-        subscriptions = data.get("subscriptions", [])
-        for sub in subscriptions:
-            total += 1
-            url = f"{service_url}/api/billing/subscriptions"
-            ok, result = self.api_post(url, sub)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Subscription {sub.get('id')}: {result}")
-        
-        # Payments
-        payments = data.get("payments", [])
-        for payment in payments:
-            total += 1
-            url = f"{service_url}/api/billing/payments"
-            ok, result = self.api_post(url, payment)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Payment {payment.get('id')}: {result}")
-        
-        log_info(f"Procesados: {success}/{total}")
         
-        return SeedResult(
-            service="BillingService",
-            entity="Billing",
-            total=total,
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
+        return [
+            SeedStage("subscriptions", [
+                SeedTask(f"{service_url}/api/billing/subscriptions", sub, f"Subscription {sub.get('id')}")
+                for sub in data.get("subscriptions", [])
+            ]),
+            SeedStage("payments", [
+                SeedTask(f"{service_url}/api/billing/payments", payment, f"Payment {payment.get('id')}")
+                for payment in data.get("payments", [])
+            ]),
+        ]
     
-    def seed_contacts(self) -> SeedResult:
-        """Seed de contactos (ContactService)"""
-        log_header("SEEDING: CONTACTOS (ContactService)")
-        
+    def plan_contacts(self) -> List[SeedStage]:
+        """Contactos (ContactService): los mensajes referencian solicitudes"""
         data = self.load_json("05_contact/contact_data.json")
         service_url = self.get_service_url("contact")
-        errors = []
-        success = 0
-        total = 0
-        
-        # Contact Requests
-        for request in data.get("contactRequests", []):
-            total += 1
-            url = f"{service_url}/api/contact/requests"
-            ok, result = self.api_post(url, request)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"ContactRequest {request.get('id')}: {result}")
-        
-        # Messages
-        for message in data.get("messages", []):
-            total += 1
-            url = f"{service_url}/api/contact/messages"
-            ok, result = self.api_post(url, message)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Message {message.get('id')}: {result}")
         
-        log_info(f"Procesados: {success}/{total}")
-        
-        return SeedResult(
-            service="ContactService",
-            entity="Contacts",
-            total=total,
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
+        return [
+            SeedStage("contactRequests", [
+                SeedTask(f"{service_url}/api/contact/requests", request, f"ContactRequest {request.get('id')}")
+                for request in data.get("contactRequests", [])
+            ]),
+            SeedStage("messages", [
+                SeedTask(f"{service_url}/api/contact/messages", message, f"Message {message.get('id')}")
+                for message in data.get("messages", [])
+            ]),
+        ]
     
-    def seed_notifications(self) -> SeedResult:
-        """Seed de notificaciones (NotificationService)"""
-        log_header("SEEDING: NOTIFICACIONES (NotificationService)")
-        
+    def plan_notifications(self) -> List[SeedStage]:
+        """Notificaciones (NotificationService): las notificaciones referencian templates"""
         data = self.load_json("06_notifications/notifications_data.json")
         service_url = self.get_service_url("notifications")
-        errors = []
-        success = 0
-        total = 0
-        
-        # Templates
-        for template in data.get("templates", []):
-            total += 1
-            url = f"{service_url}/api/notifications/templates"
-            ok, result = self.api_post(url, template)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Template {template.get('id')}: {result}")
-        
-        # Notifications
-        for notification in data.get("notifications", []):
-            total += 1
-            url = f"{service_url}/api/notifications"
-            ok, result = self.api_post(url, notification)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Notification {notification.get('id')}: {result}")
-        
-        log_info(f"Procesados: {success}/{total}")
-        
-        return SeedResult(
-            service="NotificationService",
-            entity="Notifications",
-            total=total,
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
-    
-    def seed_media(self) -> SeedResult:
-        """Seed de media (MediaService)"""
-        log_header("SEEDING: MEDIA (MediaService)")
-        
-        data = self.load_json("07_media/media_data.json")
-        service_url = self.get_service_url("media")
-        errors = []
-        success = 0
-        total = 0
-        
-        # Solo registrar metadatos (no subir archivos reales en seeding)
-        for image in data.get("vehicleImages", []):
-            total += 1
-            url = f"{service_url}/api/media/register"
-            ok, result = self.api_post(url, image)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Image {image.get('id')}: {result}")
-        
-        for avatar in data.get("userAvatars", []):
-            total += 1
-            url = f"{service_url}/api/media/register"
-            ok, result = self.api_post(url, avatar)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Avatar {avatar.get('id')}: {result}")
-        
-        log_info(f"Procesados: {success}/{total}")
-        
-        return SeedResult(
-            service="MediaService",
-            entity="Media",
-            total=total,
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
+        templates = data.get("notificationTemplates", data.get("templates", []))
+        
+        return [
+            SeedStage("templates", [
+                SeedTask(f"{service_url}/api/notifications/templates", template, f"Template {template.get('id')}")
+                for template in templates
+            ]),
+            SeedStage("notifications", [
+                SeedTask(f"{service_url}/api/notifications", notification,
+                         f"Notification {notification.get('id')}")
+                for notification in data.get("notifications", [])
+            ]),
+        ]
     
-    def seed_dealer_management(self) -> SeedResult:
-        """Seed de gestión de dealers (DealerManagementService)"""
-        log_header("SEEDING: GESTIÓN DE DEALERS")
-        
+    def plan_media(self) -> List[SeedStage]:
+        """Media (MediaService): solo metadatos, no se suben archivos reales"""
+        fixture = "07_media/media_data.json"
+        url = f"{self.get_service_url('media')}/api/media/register"
+        
+        return [
+            SeedStage("vehicleImages", (
+                SeedTask(url, image, f"Image {image.get('id')}")
+                for image in self.records("vehicleImages", fixture)
+            )),
+            SeedStage("userAvatars", (
+                SeedTask(url, avatar, f"Avatar {avatar.get('id')}")
+                for avatar in self.records("userAvatars", fixture)
+            )),
+        ]
+    
+    def plan_dealer_management(self) -> List[SeedStage]:
+        """Gestión de dealers (DealerManagementService)"""
         data = self.load_json("08_dealer_management/dealer_management_data.json")
         service_url = self.get_service_url("dealers")
-        errors = []
-        success = 0
-        total = 0
-        
-        # Locations
-        for location in data.get("dealerLocations", []):
-            total += 1
-            url = f"{service_url}/api/dealers/{location['dealerId']}/locations"
-            ok, result = self.api_post(url, location)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Location {location.get('id')}: {result}")
-        
-        # Staff
-        for staff in data.get("dealerStaff", []):
-            total += 1
-            url = f"{service_url}/api/dealers/{staff['dealerId']}/staff"
-            ok, result = self.api_post(url, staff)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Staff {staff.get('id')}: {result}")
-        
-        log_info(f"Procesados: {success}/{total}")
         
-        return SeedResult(
-            service="DealerManagementService",
-            entity="DealerManagement",
-            total=total,
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
+        return [
+            SeedStage("dealerLocations", [
+                SeedTask(f"{service_url}/api/dealers/{location['dealerId']}/locations", location,
+                         f"Location {location.get('id')}")
+                for location in data.get("dealerLocations", [])
+            ]),
+            SeedStage("dealerStaff", [
+                SeedTask(f"{service_url}/api/dealers/{staff['dealerId']}/staff", staff, f"Staff {staff.get('id')}")
+                for staff in data.get("dealerStaff", [])
+            ]),
+        ]
     
-    def seed_roles(self) -> SeedResult:
-        """Seed de roles y permisos (RoleService)"""
-        log_header("SEEDING: ROLES Y PERMISOS (RoleService)")
-        
+    def plan_roles(self) -> List[SeedStage]:
+        """Roles y permisos (RoleService): permisos -> roles -> asignaciones"""
         data = self.load_json("09_roles/roles_data.json")
         service_url = self.get_service_url("roles")
-        errors = []
-        success = 0
-        total = 0
-        
-        # Permissions primero
-        for permission in data.get("permissions", []):
-            total += 1
-            url = f"{service_url}/api/permissions"
-            ok, result = self.api_post(url, permission)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Permission {permission.get('id')}: {result}")
-        
-        # Roles
-        for role in data.get("roles", []):
-            total += 1
-            url = f"{service_url}/api/roles"
-            ok, result = self.api_post(url, role)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Role {role.get('id')}: {result}")
-        
-        # Role-Permission mappings
-        for mapping in data.get("rolePermissions", []):
-            total += 1
-            url = f"{service_url}/api/roles/{mapping['roleId']}/permissions"
-            ok, result = self.api_post(url, {"permissionIds": mapping["permissionIds"]})
-            if ok:
-                success += 1
-            else:
-                errors.append(f"RolePermission mapping: {result}")
-        
-        log_info(f"Procesados: {success}/{total}")
         
-        return SeedResult(
-            service="RoleService",
-            entity="Roles",
-            total=total,
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
+        return [
+            SeedStage("permissions", [
+                SeedTask(f"{service_url}/api/permissions", permission, f"Permission {permission.get('id')}")
+                for permission in data.get("permissions", [])
+            ]),
+            SeedStage("roles", [
+                SeedTask(f"{service_url}/api/roles", role, f"Role {role.get('id')}")
+                for role in data.get("roles", [])
+            ]),
+            SeedStage("rolePermissions", [
+                SeedTask(f"{service_url}/api/roles/{mapping['roleId']}/permissions",
+                         {"permissionIds": mapping["permissionIds"]}, f"RolePermission {mapping['roleId']}")
+                for mapping in data.get("rolePermissions", [])
+            ]),
+        ]
     
-    def seed_reviews(self) -> SeedResult:
-        """Seed de reviews (ReviewService)"""
-        log_header("SEEDING: REVIEWS (ReviewService)")
-        
+    def plan_reviews(self) -> List[SeedStage]:
+        """Reviews (ReviewService): las respuestas referencian reviews"""
         data = self.load_json("10_reviews/reviews_data.json")
         service_url = self.get_service_url("reviews")
-        errors = []
-        success = 0
-        total = 0
-        
-        # Reviews
-        for review in data.get("reviews", []):
-            total += 1
-            url = f"{service_url}/api/reviews"
-            ok, result = self.api_post(url, review)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Review {review.get('id')}: {result}")
-        
-        # Review Responses
-        for response in data.get("reviewResponses", []):
-            total += 1
-            url = f"{service_url}/api/reviews/{response['reviewId']}/responses"
-            ok, result = self.api_post(url, response)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"ReviewResponse {response.get('id')}: {result}")
-        
-        # Dealer Badges
-        for badge in data.get("dealerBadges", []):
-            total += 1
-            url = f"{service_url}/api/dealers/{badge['dealerId']}/badges"
-            ok, result = self.api_post(url, badge)
-            if ok:
-                success += 1
-            else:
-                errors.append(f"Badge {badge.get('id')}: {result}")
-        
-        log_info(f"Procesados: {success}/{total}")
         
-        return SeedResult(
-            service="ReviewService",
-            entity="Reviews",
-            total=total,
-            success=success,
-            failed=len(errors),
-            errors=errors
-        )
+        return [
+            SeedStage("reviews", (
+                SeedTask(f"{service_url}/api/reviews", review, f"Review {review.get('id')}")
+                for review in self.records("reviews", "10_reviews/reviews_data.json")
+            )),
+            SeedStage("dealerBadges", [
+                SeedTask(f"{service_url}/api/dealers/{badge['dealerId']}/badges", badge, f"Badge {badge.get('id')}")
+                for badge in data.get("dealerBadges", [])
+            ]),
+            SeedStage("reviewResponses", [
+                SeedTask(f"{service_url}/api/reviews/{response['reviewId']}/responses", response,
+                         f"ReviewResponse {response.get('id')}")
+                for response in data.get("reviewResponses", [])
+            ]),
+        ]
     
     # ========================================================================
     # EJECUCIÓN PRINCIPAL
     # ========================================================================
     
-    def run(self, only: Optional[str] = None):
+    def run(self, only: Optional[str] = None, reset_journal: bool = False):
         """Ejecuta el seeding completo o parcial"""
         start_time = datetime.now()
         
@@ -644,12 +786,15 @@ class DatabaseSeeder:
         log_info(f"Ambiente: {self.env}")
         log_info(f"Gateway: {self.config['gateway']}")
         log_info(f"Dry Run: {self.dry_run}")
+        log_info(f"Journal: {self.journal.path if self.journal else 'deshabilitado'}")
+        if self.dataset_dir:
+            log_info(f"Dataset: {self.dataset_dir}")
         log_info(f"Fecha: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         
         # Verificar conectividad
         if not self.dry_run:
             try:
-                response = requests.get(f"{self.config['gateway']}/health", timeout=5)
+                response = self.client.get(f"{self.config['gateway']}/health", timeout=5)
                 if response.status_code == 200:
                     log_success("Gateway conectado")
                 else:
@@ -663,45 +808,33 @@ class DatabaseSeeder:
         if not self.dry_run:
             self.authenticate_admin()
         
-        # Orden de seeding (respetando dependencias)
-        seed_order = [
-            ("users", self.seed_users),
-            ("roles", self.seed_roles),
-            ("dealers", self.seed_dealers),
-            ("dealer_management", self.seed_dealer_management),
-            ("vehicles", self.seed_vehicles),
-            ("billing", self.seed_billing),
-            ("contacts", self.seed_contacts),
-            ("reviews", self.seed_reviews),
-            ("notifications", self.seed_notifications),
-            ("media", self.seed_media),
-        ]
+        # DAG de grupos (los independientes corren en paralelo)
+        groups = self.seed_groups()
+        self.engine.validate(groups)
         
-        # Filtrar si se especificó --only
+        # Filtrar si se especificó --only (sus dependencias se asumen ya sembradas)
         if only:
-            seed_order = [(name, func) for name, func in seed_order if name == only]
-            if not seed_order:
-                log_error(f"Servicio '{only}' no encontrado")
+            try:
+                groups = self.select_groups(groups, only)
+            except ValueError as e:
+                log_error(str(e))
                 return
         
-        # Ejecutar seeders
-        for name, seeder in seed_order:
-            try:
-                result = seeder()
-                self.results.append(result)
-            except Exception as e:
-                log_error(f"Error en seeder {name}: {e}")
-                self.results.append(SeedResult(
-                    service=name,
-                    entity=name,
-                    total=0,
-                    success=0,
-                    failed=1,
-                    errors=[str(e)]
-                ))
+        if reset_journal and self.journal and not self.dry_run:
+            entities = None if not only else [f"{group.name}.{entity}" for group in groups for entity in group.entities]
+            log_warning(f"Journal reiniciado: {self.journal.reset(entities)} entradas eliminadas")
+        
+        log_info("Orden: " + " | ".join(
+            f"{group.name}" + (f" <- {', '.join(group.depends_on)}" if group.depends_on else "")
+            for group in groups
+        ))
+        self.results = self.engine.run(groups)
         
         # Resumen final
         self.print_summary(start_time)
+        
+        if self.journal:
+            self.journal.close()
     
     def print_summary(self, start_time: datetime):
         """Imprime el resumen de la ejecución"""
@@ -712,23 +845,31 @@ class DatabaseSeeder:
         
         total_records = sum(r.total for r in self.results)
         total_success = sum(r.success for r in self.results)
+        total_skipped = sum(r.skipped for r in self.results)
         total_failed = sum(r.failed for r in self.results)
+        total_retried = sum(r.retried for r in self.results)
         
-        print(f"\n{'Servicio':<30} {'Total':<10} {'Éxito':<10} {'Error':<10} {'%':<10}")
-        print("-" * 70)
+        print(f"\n{'Servicio':<26} {'Total':<8} {'Creados':<8} {'Omitid.':<8} {'Error':<8} {'Reint.':<8} "
+              f"{'%':<8} {'Seg':<8} {'Reg/s':<8}")
+        print("-" * 98)
         
         for result in self.results:
             status = f"{result.success_rate:.1f}%"
             color = Colors.GREEN if result.success_rate == 100 else (Colors.YELLOW if result.success_rate > 50 else Colors.RED)
-            print(f"{color}{result.service:<30} {result.total:<10} {result.success:<10} {result.failed:<10} {status:<10}{Colors.ENDC}")
+            print(f"{color}{result.service:<26} {result.total:<8} {result.success:<8} {result.skipped:<8} "
+                  f"{result.failed:<8} {result.retried:<8} {status:<8} "
+                  f"{result.duration_seconds:<8.2f} {result.throughput:<8.0f}{Colors.ENDC}")
         
-        print("-" * 70)
-        overall_rate = (total_success / total_records * 100) if total_records > 0 else 0
-        print(f"{Colors.BOLD}{'TOTAL':<30} {total_records:<10} {total_success:<10} {total_failed:<10} {overall_rate:.1f}%{Colors.ENDC}")
+        print("-" * 98)
+        overall_rate = ((total_success + total_skipped) / total_records * 100) if total_records > 0 else 0
+        print(f"{Colors.BOLD}{'TOTAL':<26} {total_records:<8} {total_success:<8} {total_skipped:<8} "
+              f"{total_failed:<8} {total_retried:<8} {overall_rate:.1f}%{Colors.ENDC}")
         
         print(f"\n⏱️  Tiempo total: {duration:.2f} segundos")
         print(f"📊 Registros procesados: {total_records}")
-        print(f"✅ Exitosos: {total_success}")
+        print(f"✅ Creados: {total_success}")
+        print(f"⏭️  Omitidos (ya sembrados): {total_skipped}")
+        print(f"🔁 Reintentos: {total_retried}")
         print(f"❌ Fallidos: {total_failed}")
         
         if total_failed > 0:
@@ -756,6 +897,8 @@ Ejemplos:
   python seed_database.py --dry-run           # Ver qué haría sin ejecutar
   python seed_database.py --only vehicles     # Solo seed de vehículos
   python seed_database.py --only dealers      # Solo seed de dealers
+  python seed_database.py --only reviews.reviewResponses,payments
+  python seed_database.py --reset-journal     # Volver a sembrar todo
         """
     )
     
@@ -772,11 +915,57 @@ Ejemplos:
         help="Solo mostrar qué haría, sin ejecutar"
     )
     
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Máximo de requests en vuelo entre todos los grupos (default: 16)"
+    )
+    
+    parser.add_argument(
+        "--parallel-groups",
+        type=int,
+        default=4,
+        help="Máximo de grupos de entidades sembrándose a la vez (default: 4)"
+    )
+    
     parser.add_argument(
         "--only",
-        choices=["users", "roles", "dealers", "dealer_management", "vehicles", 
-                 "billing", "contacts", "reviews", "notifications", "media"],
-        help="Solo ejecutar un seeder específico"
+        help="Grupos y/o entidades separados por comas: users, roles, dealers, dealer_management, "
+             "vehicles, billing, contacts, reviews, notifications, media, o una entidad "
+             "(p. ej. payments, reviews.reviewResponses)"
+    )
+    
+    parser.add_argument(
+        "--journal",
+        type=Path,
+        default=Path(__file__).parent.parent / ".seed_journal.sqlite3",
+        help="Journal SQLite de entidades sembradas (default: data/seeding/.seed_journal.sqlite3)"
+    )
+    
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="No consultar ni registrar el journal (envía todo)"
+    )
+    
+    parser.add_argument(
+        "--reset-journal",
+        action="store_true",
+        help="Olvidar lo sembrado para el ambiente (o las entidades de --only) antes de empezar"
+    )
+    
+    parser.add_argument(
+        "--dataset",
+        type=Path,
+        help="Directorio de generate_synthetic_dataset.py (NDJSON) en lugar de los fixtures"
+    )
+    
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="Reintentos con backoff exponencial para errores transitorios (default: 3)"
     )
     
     args = parser.parse_args()
@@ -794,8 +983,11 @@ Ejemplos:
             print("Cancelado.")
             sys.exit(0)
     
-    seeder = DatabaseSeeder(env=args.env, dry_run=args.dry_run)
-    seeder.run(only=args.only)
+    seeder = DatabaseSeeder(env=args.env, dry_run=args.dry_run,
+                            concurrency=args.concurrency, parallel_groups=args.parallel_groups,
+                            journal_path=None if args.no_journal else args.journal,
+                            max_retries=args.max_retries, dataset_dir=args.dataset)
+    seeder.run(only=args.only, reset_journal=args.reset_journal)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Shared data access for the audit scripts (audit_images.py, audit_duplicate_photos.py).
+
+Replaces shelling out to `psql` once per statement and parsing its pipe-delimited
+stdout:
+
+- One psycopg2 connection pool per process; connections are reused across queries
+- Large result sets are streamed through server-side (named) cursors, so rows
+  arrive typed (bool, int, uuid-as-str) and never sit in memory as one big string
+- Writes are batched as `UPDATE ... FROM (VALUES ...)`, one round trip per page
+- `phase()` times fetch / check / update steps; `print_timings()` summarizes them
+
+Connection settings come from DB_DSN, or DB_HOST / DB_PORT / DB_NAME / DB_USER /
+DB_PASSWORD / DB_SSLMODE (defaults point at the production vehiclessaleservice DB;
+the password must be provided via DB_PASSWORD).
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+DB_HOST = os.environ.get("DB_HOST", "okla-db-do-user-31493168-0.g.db.ondigitalocean.com")
+DB_PORT = int(os.environ.get("DB_PORT", "25060"))
+DB_NAME = os.environ.get("DB_NAME", "vehiclessaleservice")
+DB_USER = os.environ.get("DB_USER", "doadmin")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "")
+DB_SSLMODE = os.environ.get("DB_SSLMODE", "require")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+
+STREAM_ITERSIZE = 5000
+UPDATE_PAGE_SIZE = 1000
+
+_pool: Optional[ThreadedConnectionPool] = None
+TIMINGS: Dict[str, float] = {}
+
+
+def dsn() -> str:
+    return os.environ.get("DB_DSN") or (
+        f"host={DB_HOST} port={DB_PORT} dbname={DB_NAME} user={DB_USER} "
+        f"password={DB_PASSWORD} sslmode={DB_SSLMODE}"
+    )
+
+
+def pool() -> ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        _pool = ThreadedConnectionPool(1, DB_POOL_SIZE, dsn(), application_name="okla-audit")
+    return _pool
+
+
+@contextmanager
+def connection():
+    """Pooled connection; commits on success, rolls back on error"""
+    conn = pool().getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool().putconn(conn)
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+
+def stream(sql: str, params: Optional[Sequence[Any]] = None,
+           itersize: int = STREAM_ITERSIZE) -> Iterator[Tuple]:
+    """Yield rows through a server-side cursor, `itersize` rows per network fetch"""
+    with connection() as conn:
+        with conn.cursor(name=f"audit_stream_{time.monotonic_ns()}") as cur:
+            cur.itersize = itersize
+            cur.execute(sql, params)
+            yield from cur
+
+
+def query(sql: str, params: Optional[Sequence[Any]] = None) -> List[Tuple]:
+    """Small result sets (counts, lookups)"""
+    with connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+
+def update_from_values(table: str, key: str, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                       casts: Optional[Dict[str, str]] = None, set_sql: Optional[str] = None,
+                       where: Optional[str] = None, page_size: int = UPDATE_PAGE_SIZE) -> int:
+    """
+    Batched `UPDATE table AS t SET ... FROM (VALUES ...) AS v(key, columns...)
+    WHERE t.key = v.key`. Each row is (key, *columns). `casts` types the VALUES
+    columns (e.g. {"Id": "uuid"}); `set_sql` overrides the default
+    `"col" = v."col"` assignments; `where` adds a condition. Returns rows updated.
+    """
+    casts = casts or {}
+    names = [key, *columns]
+    template = "(" + ", ".join(f"%s::{casts[n]}" if n in casts else "%s" for n in names) + ")"
+    quoted = ", ".join(f'"{n}"' for n in names)
+    assignments = set_sql or ", ".join(f'"{c}" = v."{c}"' for c in columns)
+    sql = (
+        f'UPDATE {table} AS t SET {assignments} FROM (VALUES %s) AS v({quoted}) '
+        f'WHERE t."{key}" = v."{key}"' + (f" AND ({where})" if where else "")
+    )
+
+    rows = list(rows)
+    updated = 0
+    if not rows:
+        return updated
+    with connection() as conn:
+        with conn.cursor() as cur:
+            for i in range(0, len(rows), page_size):
+                page = rows[i:i + page_size]
+                execute_values(cur, sql, page, template=template, page_size=len(page))
+                updated += cur.rowcount
+    return updated
+
+
+@contextmanager
+def phase(name: str):
+    """Time a step of the audit (accumulates if the same phase runs twice)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        TIMINGS[name] = TIMINGS.get(name, 0.0) + elapsed
+        print(f"  ⏱  {name}: {elapsed:.2f}s", flush=True)
+
+
+def print_timings():
+    if not TIMINGS:
+        return
+    print("\nTimings:")
+    for name, seconds in TIMINGS.items():
+        print(f"  {name:12s}: {seconds:.2f}s")
+    print(f"  {'total':12s}: {sum(TIMINGS.values()):.2f}s")
@@ -2,26 +2,19 @@
 """
 Audit: Find vehicles sharing Unsplash photo IDs.
 A vehicle listing page should never show the same stock photo used by other listings.
+
+--phash       also catch re-uploaded / resized copies (S3, CDN) by perceptual hash
+              (photo_hash.py); photos are grouped by near-identical pHash instead
+              of by Unsplash ID
+--radius N    max pHash Hamming distance for "same photo" (default 6 of 64 bits)
 """
-import subprocess, re, urllib.request, urllib.error
+import re, sys
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-DB_DSN = (
-    "host=okla-db-do-user-31493168-0.g.db.ondigitalocean.com "
-    "port=25060 dbname=vehiclessaleservice user=doadmin "
-    "sslmode=require password=REDACTED_USE_DB_PASSWORD_ENV"
-)
-PSQL = "/opt/homebrew/opt/libpq/bin/psql"
-PSQL_ENV = {"PGPASSWORD": "REDACTED_USE_DB_PASSWORD_ENV",
-             "PATH": "/opt/homebrew/opt/libpq/bin:/usr/bin:/bin"}
-
-def psql(sql: str) -> str:
-    r = subprocess.run([PSQL, DB_DSN, "-t", "-A", "-c", sql],
-                       capture_output=True, text=True, env=PSQL_ENV)
-    if r.returncode != 0:
-        raise RuntimeError(r.stderr[:300])
-    return r.stdout.strip()
+
+from audit_db import close_pool, phase, print_timings, stream
+
+PHASH = "--phash" in sys.argv
+RADIUS = int(sys.argv[sys.argv.index("--radius") + 1]) if "--radius" in sys.argv else None
 
 def extract_photo_id(url: str) -> str | None:
     """Extract Unsplash photo ID from URL."""
@@ -29,36 +22,47 @@ def extract_photo_id(url: str) -> str | None:
     return m.group(0) if m else None
 
 # ── Pull all images ──────────────────────────────────────────────────────────
-rows_raw = psql("""
-SELECT vi."VehicleId", vi."Id", vi."Url", vi."IsPrimary"::text, vi."SortOrder"::text,
-       v."Make", v."Model", v."Year"::text, v."BodyStyle"
-FROM vehicle_images vi
-JOIN vehicles v ON vi."VehicleId" = v."Id"
-WHERE v."Status" = 'Active' AND v."IsDeleted" = false
-ORDER BY vi."VehicleId", vi."IsPrimary" DESC, vi."SortOrder"
-""")
-
-# Parse
 images = []
-for line in rows_raw.splitlines():
-    parts = line.split("|")
-    if len(parts) < 9:
-        continue
-    vid, img_id, url, is_primary, sort, make, model, year, body = parts[:9]
-    photo_id = extract_photo_id(url) if "unsplash" in url else None
-    images.append({
-        "vehicle_id": vid, "img_id": img_id, "url": url,
-        "is_primary": is_primary == "t",
-        "sort": int(sort) if sort.isdigit() else 0,
-        "make": make, "model": model, "year": year, "body": body,
-        "photo_id": photo_id,
-        "label": f"{year} {make} {model} ({body})",
-    })
+with phase("fetch"):
+    for vid, img_id, url, is_primary, sort, make, model, year, body in stream("""
+        SELECT vi."VehicleId", vi."Id", vi."Url", vi."IsPrimary", vi."SortOrder",
+               v."Make", v."Model", v."Year", v."BodyStyle"
+        FROM vehicle_images vi
+        JOIN vehicles v ON vi."VehicleId" = v."Id"
+        WHERE v."Status" = 'Active' AND v."IsDeleted" = false
+        ORDER BY vi."VehicleId", vi."IsPrimary" DESC, vi."SortOrder"
+    """):
+        photo_id = extract_photo_id(url) if "unsplash" in url else None
+        images.append({
+            "vehicle_id": vid, "img_id": img_id, "url": url,
+            "is_primary": is_primary,
+            "sort": sort or 0,
+            "make": make, "model": model, "year": year, "body": body,
+            "photo_id": photo_id,
+            "label": f"{year} {make} {model} ({body})",
+        })
+close_pool()
 
 print(f"Total images: {len(images)}")
 print(f"Unique vehicles: {len({i['vehicle_id'] for i in images})}")
 print(f"Unsplash images: {sum(1 for i in images if i['photo_id'])}")
 
+# ── Perceptual hashing: photo key = near-duplicate cluster ──────────────────
+if PHASH:
+    from photo_hash import DEFAULT_RADIUS, cluster, hash_urls, print_progress
+
+    failed: dict[str, str] = {}
+    with phase("hash"):
+        hashes = hash_urls([i["url"] for i in images], progress=print_progress, errors=failed)
+    with phase("cluster"):
+        groups = cluster({u: h.phash for u, h in hashes.items()}, DEFAULT_RADIUS if RADIUS is None else RADIUS)
+    cluster_key = {u: f"phash:{hashes[group[0]].phash:016x}" for group in groups for u in group}
+    for img in images:
+        # Images that could not be fetched/decoded keep their Unsplash ID (if any)
+        img["photo_id"] = cluster_key.get(img["url"], img["photo_id"])
+    print(f"Hashed images: {len(hashes)} ({sum(1 for h in hashes.values() if h.cached)} from index), "
+          f"failed: {len(failed)}, near-duplicate groups: {sum(1 for g in groups if len(g) > 1)}")
+
 # ── Group by photo_id → list of (vehicle_id, label, is_primary) ─────────────
 photo_to_vehicles: dict[str, list[dict]] = defaultdict(list)
 for img in images:
@@ -73,7 +77,8 @@ multi_vehicle_photos = {
 }
 
 print(f"\n{'='*70}")
-print("DUPLICATE UNSPLASH PHOTO IDs ACROSS VEHICLES")
+print("DUPLICATE PHOTOS (PERCEPTUAL HASH) ACROSS VEHICLES" if PHASH
+      else "DUPLICATE UNSPLASH PHOTO IDs ACROSS VEHICLES")
 print(f"{'='*70}")
 print(f"Photos used by 2+ vehicles: {len(multi_vehicle_photos)}")
 
@@ -84,7 +89,6 @@ total_affected_rows = 0
 for photo_id, rows in sorted(multi_vehicle_photos.items(),
                               key=lambda x: -len({r['vehicle_id'] for r in x[1]})):
     vids = list(dict.fromkeys(r["vehicle_id"] for r in rows))  # preserve insertion order, unique
-    labels = [rows[[r["vehicle_id"] for r in rows].index(v)]["label"] for v in vids]
     print(f"\n  📷 {photo_id} — used by {len(vids)} vehicles:")
     for row in rows:
         prim = "★ PRIMARY" if row["is_primary"] else "  img"
@@ -113,3 +117,5 @@ for vid, imgs in vehicle_images_map.items():
 for v in sorted(all_shared_vehicles):
     print(f"  ⚠ {v}")
 print(f"  Total: {len(all_shared_vehicles)}")
+
+print_timings()
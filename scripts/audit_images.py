@@ -2,122 +2,54 @@
 """
 Audit: All published vehicle image URLs.
 - Fetches every image row for Active+non-deleted vehicles
-- Checks each URL concurrently (HEAD then GET fallback)
+- Checks each URL concurrently (HEAD then GET fallback, see url_health.py)
 - Reports broken URLs per vehicle
 - Updates HasBrokenImages + BrokenImagesDetectedAt in DB
 """
-import subprocess, json, sys, urllib.request, urllib.error
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime, timezone
-
-DB_DSN = (
-    "host=okla-db-do-user-31493168-0.g.db.ondigitalocean.com "
-    "port=25060 dbname=vehiclessaleservice user=doadmin "
-    "sslmode=require password=REDACTED_USE_DB_PASSWORD_ENV"
-)
-PSQL = "/opt/homebrew/opt/libpq/bin/psql"
-
-def psql(sql: str) -> str:
-    r = subprocess.run(
-        [PSQL, DB_DSN, "-t", "-A", "-c", sql],
-        capture_output=True, text=True,
-        env={"PGPASSWORD": "REDACTED_USE_DB_PASSWORD_ENV",
-             "PATH": "/opt/homebrew/opt/libpq/bin:/usr/bin:/bin"}
-    )
-    if r.returncode != 0:
-        raise RuntimeError(r.stderr[:300])
-    return r.stdout.strip()
-
-def psql_exec(sql: str):
-    r = subprocess.run(
-        [PSQL, DB_DSN, "-c", sql],
-        capture_output=True, text=True,
-        env={"PGPASSWORD": "REDACTED_USE_DB_PASSWORD_ENV",
-             "PATH": "/opt/homebrew/opt/libpq/bin:/usr/bin:/bin"}
-    )
-    return r.returncode == 0
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 Chrome/122 Safari/537.36",
-    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
-}
-
-def check_url(url: str) -> tuple[str, bool, str]:
-    """Returns (url, is_ok, reason)"""
-    # Strip expired S3 pre-signed query params — test the base path
-    base_url = url.split("?")[0] if "X-Amz-" in url else url
-    try:
-        req = urllib.request.Request(base_url, headers=HEADERS, method="HEAD")
-        req.get_method = lambda: "HEAD"
-        with urllib.request.urlopen(req, timeout=10) as r:
-            if r.status < 400:
-                return (url, True, f"HEAD {r.status}")
-            return (url, False, f"HEAD {r.status}")
-    except urllib.error.HTTPError as e:
-        if e.code == 403 and "amazonaws.com" in base_url:
-            # S3 HEAD 403 is normal for presigned URLs — try GET with range
-            try:
-                req2 = urllib.request.Request(base_url, headers={**HEADERS, "Range": "bytes=0-1023"})
-                with urllib.request.urlopen(req2, timeout=10) as r2:
-                    return (url, True, f"GET-range {r2.status}")
-            except Exception as e2:
-                return (url, False, f"S3-GET {e2}")
-        if e.code == 405:
-            # HEAD not allowed — try GET
-            try:
-                req3 = urllib.request.Request(base_url, headers={**HEADERS, "Range": "bytes=0-0"})
-                with urllib.request.urlopen(req3, timeout=10) as r3:
-                    return (url, True, f"GET {r3.status}")
-            except Exception as e3:
-                return (url, False, f"GET-fallback {e3}")
-        return (url, False, f"HTTP {e.code}")
-    except Exception as e:
-        return (url, False, str(e)[:80])
+import sys
+from datetime import datetime
+
+from audit_db import close_pool, phase, print_timings, stream, update_from_values
+from url_health import check_urls, print_progress
+
+# --incremental: revalidate stale OK URLs with conditional requests (ETag / Last-Modified)
+# --no-cache:    ignore the local URL-health cache entirely
+INCREMENTAL = "--incremental" in sys.argv
+USE_CACHE = "--no-cache" not in sys.argv
 
 # ── Pull all images for active vehicles ─────────────────────────────────────
 print("Fetching image records from DB...", flush=True)
-rows_raw = psql("""
-SELECT vi."VehicleId", vi."Id", vi."Url", vi."IsPrimary", vi."SortOrder",
-       v."Make", v."Model", v."Year", v."BodyStyle"
-FROM vehicle_images vi
-JOIN vehicles v ON vi."VehicleId" = v."Id"
-WHERE v."Status" = 'Active' AND v."IsDeleted" = false
-ORDER BY vi."VehicleId", vi."SortOrder"
-""")
-
-if not rows_raw:
+images = []
+with phase("fetch"):
+    for vid, img_id, url, is_primary, sort, make, model, year, body in stream("""
+        SELECT vi."VehicleId", vi."Id", vi."Url", vi."IsPrimary", vi."SortOrder",
+               v."Make", v."Model", v."Year", v."BodyStyle"
+        FROM vehicle_images vi
+        JOIN vehicles v ON vi."VehicleId" = v."Id"
+        WHERE v."Status" = 'Active' AND v."IsDeleted" = false
+        ORDER BY vi."VehicleId", vi."SortOrder"
+    """):
+        images.append({"vehicle_id": vid, "img_id": img_id, "url": url,
+                       "primary": is_primary, "sort": sort,
+                       "label": f"{year} {make} {model} ({body})"})
+
+if not images:
     print("No image rows found.")
     sys.exit(0)
 
-# Parse pipe-delimited rows
-images = []
-for line in rows_raw.splitlines():
-    parts = line.split("|")
-    if len(parts) < 9:
-        continue
-    vid, img_id, url, is_primary, sort, make, model, year, body = parts
-    images.append({"vehicle_id": vid, "img_id": img_id, "url": url,
-                   "primary": is_primary == "t", "sort": sort,
-                   "label": f"{year} {make} {model} ({body})"})
-
 total_imgs = len(images)
 unique_vehicles = len({i["vehicle_id"] for i in images})
 print(f"Found {total_imgs} images across {unique_vehicles} vehicles. Checking URLs...", flush=True)
 
 # ── Concurrent URL check ─────────────────────────────────────────────────────
-url_results: dict[str, tuple[bool, str]] = {}
 unique_urls = list({i["url"] for i in images})
 print(f"Unique URLs to check: {len(unique_urls)}", flush=True)
 
-with ThreadPoolExecutor(max_workers=30) as pool:
-    futures = {pool.submit(check_url, url): url for url in unique_urls}
-    done = 0
-    for fut in as_completed(futures):
-        url, ok, reason = fut.result()
-        url_results[url] = (ok, reason)
-        done += 1
-        if done % 50 == 0 or done == len(unique_urls):
-            print(f"  Checked {done}/{len(unique_urls)} URLs...", flush=True)
+with phase("check"):
+    checked = check_urls(unique_urls, incremental=INCREMENTAL, use_cache=USE_CACHE,
+                         progress=print_progress)
+url_results: dict[str, tuple[bool, str]] = {u: (r.ok, r.reason) for u, r in checked.items()}
+print(f"  {sum(1 for r in checked.values() if r.cached)} of {len(checked)} URLs from cache", flush=True)
 
 # ── Aggregate broken images per vehicle ──────────────────────────────────────
 from collections import defaultdict
@@ -175,37 +107,22 @@ else:
 print(f"\n{'─'*70}")
 print("Updating HasBrokenImages in database...")
 
-# Get all active vehicle IDs that currently exist
-all_vehicle_ids = list(vehicle_label.keys())
-
-# Reset ALL to false first (batch)
-id_list = "', '".join(all_vehicle_ids)
-reset_sql = f"""
-UPDATE vehicles
-SET "HasBrokenImages" = false,
-    "UpdatedAt" = NOW()
-WHERE "Id" IN ('{id_list}')
-  AND "HasBrokenImages" = true;
-"""
-if psql_exec(reset_sql):
-    print(f"  Reset HasBrokenImages=false for previously broken vehicles.")
-
-# Set broken vehicles to true
-if vehicle_broken:
-    broken_ids = "', '".join(vehicle_broken.keys())
-    now_ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S+00")
-    mark_sql = f"""
-UPDATE vehicles
-SET "HasBrokenImages" = true,
-    "BrokenImagesDetectedAt" = '{now_ts}',
-    "UpdatedAt" = NOW()
-WHERE "Id" IN ('{broken_ids}');
-"""
-    if psql_exec(mark_sql):
-        print(f"  Marked {total_broken_vehicles} vehicles as HasBrokenImages=true.")
-    else:
-        print("  WARNING: Could not update HasBrokenImages in DB.")
-else:
-    print("  No broken vehicles to mark.")
+# One batched UPDATE ... FROM (VALUES (id, broken)) for every audited vehicle:
+# broken ones are (re)stamped, previously broken ones that are now OK are reset
+with phase("update"):
+    updated = update_from_values(
+        "vehicles", "Id", ["HasBrokenImages"],
+        [(vid, vid in vehicle_broken) for vid in vehicle_label],
+        casts={"Id": "uuid", "HasBrokenImages": "boolean"},
+        set_sql='''"HasBrokenImages" = v."HasBrokenImages",
+                   "BrokenImagesDetectedAt" = CASE WHEN v."HasBrokenImages" THEN NOW()
+                                                   ELSE t."BrokenImagesDetectedAt" END,
+                   "UpdatedAt" = NOW()''',
+        where='v."HasBrokenImages" OR t."HasBrokenImages" = true',
+    )
+print(f"  Updated {updated} vehicles "
+      f"({total_broken_vehicles} marked HasBrokenImages=true, rest reset to false).")
 
+close_pool()
+print_timings()
 print("\nAudit complete.")
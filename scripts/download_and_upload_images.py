@@ -10,27 +10,46 @@ Este script:
 3. Las sube a AWS S3 bucket: okla-images-2026
 4. Actualiza la base de datos con las URLs de S3
 
+Pipeline en streaming de tres etapas conectadas por colas acotadas:
+    descarga (N workers, Session con keep-alive)
+      → upload S3 (M workers, multipart, se omite si el hash SHA-256 ya coincide)
+      → escritura en DB (un writer, una conexión, upsert idempotente por lotes)
+Las imágenes de un vehículo ya no esperan a las del anterior.
+
 Autor: Gregory Moreno
 Fecha: Enero 2026
 
 Uso:
     python3 scripts/download_and_upload_images.py
+    python3 scripts/download_and_upload_images.py --fetch-workers 16 --upload-workers 16
+    python3 scripts/download_and_upload_images.py --local-s3 /tmp/fake-s3 --limit 20   # sin AWS
 
 Requisitos:
     pip install boto3 requests psycopg2-binary
 ===============================================================================
 """
 
+import argparse
+import hashlib
+import json
 import os
+import shutil
 import sys
+import threading
 import time
 import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Queue
+from typing import Dict, List, Optional
+
 import requests
 import boto3
-from botocore.exceptions import ClientError
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import BotoCoreError, ClientError
 import psycopg2
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from pathlib import Path
+from psycopg2.extras import execute_values
+from requests.adapters import HTTPAdapter
 
 # ===============================================================================
 # CONFIGURACIÓN
@@ -41,6 +60,8 @@ S3_ACCESS_KEY = os.environ.get("AWS_ACCESS_KEY_ID", "")
 S3_SECRET_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY", "")
 S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME", "okla-images-2026")
 S3_REGION = os.environ.get("S3_REGION", "us-east-2")
+# Endpoint compatible con S3 (MinIO / LocalStack) para pruebas locales
+S3_ENDPOINT_URL = os.environ.get("S3_ENDPOINT_URL") or None
 
 # PostgreSQL
 DB_HOST = os.environ.get("DB_HOST", "localhost")
@@ -72,6 +93,14 @@ IMAGE_CAPTIONS = [
 
 IMAGE_TYPES = [0, 0, 1, 2, 3]  # 0=Exterior, 1=Interior, 2=Detail, 3=Engine
 
+# Pipeline
+FETCH_WORKERS = 8
+UPLOAD_WORKERS = 8
+DB_BATCH_VEHICLES = 50
+QUEUE_SIZE = 64
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+NO_DEALER_ID = '00000000-0000-0000-0000-000000000000'
+
 # ===============================================================================
 # FUNCIONES
 # ===============================================================================
@@ -87,163 +116,426 @@ def get_db_connection():
     )
 
 def get_s3_client():
-    """Crea cliente de AWS S3"""
+    """Crea cliente de AWS S3 (o del endpoint S3_ENDPOINT_URL si está definido)"""
     return boto3.client(
         's3',
         aws_access_key_id=S3_ACCESS_KEY,
         aws_secret_access_key=S3_SECRET_KEY,
-        region_name=S3_REGION
+        region_name=S3_REGION,
+        endpoint_url=S3_ENDPOINT_URL
     )
 
-def get_all_vehicles():
+def get_http_session(pool_size: int) -> requests.Session:
+    """Session compartida por los workers de descarga (keep-alive + pool)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=2)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def public_url(s3_key: str) -> str:
+    """URL pública de un objeto del bucket"""
+    if S3_ENDPOINT_URL:
+        return f"{S3_ENDPOINT_URL.rstrip('/')}/{S3_BUCKET_NAME}/{s3_key}"
+    return f"https://{S3_BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com/{s3_key}"
+
+def get_all_vehicles(conn):
     """Obtiene todos los vehículos de la base de datos"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute('SELECT "Id", "DealerId", "Title" FROM vehicles ORDER BY "CreatedAt"')
-    vehicles = cur.fetchall()
-    cur.close()
-    conn.close()
+    with conn.cursor() as cur:
+        cur.execute('SELECT "Id", "DealerId", "Title" FROM vehicles ORDER BY "CreatedAt"')
+        vehicles = cur.fetchall()
+    conn.commit()
     return vehicles
 
-def download_image(vehicle_id: str, image_index: int) -> tuple:
-    """Descarga una imagen de Picsum y la guarda localmente"""
-    width, height = IMAGE_DIMENSIONS[image_index]
-    
+
+class LocalS3Client:
+    """
+    Stand-in de S3 sobre un directorio, para probar el pipeline sin AWS.
+    Implementa solo lo que usa este script: head_bucket, head_object, upload_file.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def head_bucket(self, Bucket):
+        (self.root / Bucket).mkdir(parents=True, exist_ok=True)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not path.exists():
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+        meta_path = path.with_name(path.name + '.meta.json')
+        metadata = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        return {'ContentLength': path.stat().st_size, 'Metadata': metadata}
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Config=None):
+        path = self._path(Bucket, Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(Filename, path)
+        meta_path = path.with_name(path.name + '.meta.json')
+        meta_path.write_text(json.dumps((ExtraArgs or {}).get('Metadata', {})))
+
+
+@dataclass
+class ImageJob:
+    """Una imagen de un vehículo a lo largo del pipeline"""
+    vehicle_id: str
+    dealer_id: Optional[str]
+    title: str
+    index: int
+    local_path: str = ""
+    file_size: int = 0
+    sha256: str = ""
+    s3_url: str = ""
+    uploaded: bool = False
+    error: str = ""
+
+    @property
+    def s3_key(self) -> str:
+        return f"vehicles/{self.vehicle_id}/image_{self.index + 1}.jpg"
+
+
+class PipelineStats:
+    """Contadores por etapa (thread-safe) para el reporte de throughput"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.downloaded = 0
+        self.reused_local = 0
+        self.downloaded_bytes = 0
+        self.uploaded = 0
+        self.skipped_uploads = 0
+        self.uploaded_bytes = 0
+        self.vehicles_written = 0
+        self.images_written = 0
+        self.vehicle_errors = 0
+        self.db_batches = 0
+
+    def add(self, **counters):
+        with self.lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.time() - self.started, 1e-9)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def download_image(session: requests.Session, job: ImageJob, stats: PipelineStats, redownload: bool = False):
+    """Descarga una imagen de Picsum a data/vehicle_images (calculando su SHA-256 al vuelo)"""
+    width, height = IMAGE_DIMENSIONS[job.index]
+
     # Generar URL de Picsum con seed para consistencia
-    seed = f"{vehicle_id}-{image_index + 1}"
+    seed = f"{job.vehicle_id}-{job.index + 1}"
     picsum_url = f"https://picsum.photos/seed/{seed}/{width}/{height}"
-    
-    # Crear directorio del vehículo
-    vehicle_dir = LOCAL_IMAGES_PATH / vehicle_id
+
+    vehicle_dir = LOCAL_IMAGES_PATH / job.vehicle_id
     vehicle_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Nombre del archivo local
-    filename = f"image_{image_index + 1}.jpg"
-    local_path = vehicle_dir / filename
-    
+    local_path = vehicle_dir / f"image_{job.index + 1}.jpg"
+    job.local_path = str(local_path)
+
+    # La seed es determinística: una descarga previa completa es la misma imagen
+    if not redownload and local_path.exists() and local_path.stat().st_size > 0:
+        job.file_size = local_path.stat().st_size
+        job.sha256 = sha256_file(local_path)
+        stats.add(reused_local=1)
+        return
+
     try:
-        response = requests.get(picsum_url, timeout=30, stream=True)
-        response.raise_for_status()
-        
-        with open(local_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
-        file_size = local_path.stat().st_size
-        return (True, str(local_path), file_size, width, height)
-    
+        digest = hashlib.sha256()
+        tmp_path = local_path.with_suffix('.part')
+        with session.get(picsum_url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    f.write(chunk)
+                    digest.update(chunk)
+        os.replace(tmp_path, local_path)
+        job.file_size = local_path.stat().st_size
+        job.sha256 = digest.hexdigest()
+        stats.add(downloaded=1, downloaded_bytes=job.file_size)
     except Exception as e:
-        return (False, str(e), 0, width, height)
+        job.error = f"Error descarga: {e}"
+
+def upload_to_s3(s3_client, transfer_config: TransferConfig, job: ImageJob, stats: PipelineStats):
+    """Sube una imagen a S3, salvo que el objeto ya tenga el mismo SHA-256"""
+    job.s3_url = public_url(job.s3_key)
+    try:
+        head = s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=job.s3_key)
+        if head.get('Metadata', {}).get('sha256') == job.sha256:
+            stats.add(skipped_uploads=1)
+            return
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+            job.error = f"Error S3: {e}"
+            return
+    except BotoCoreError as e:
+        job.error = f"Error S3: {e}"
+        return
 
-def upload_to_s3(s3_client, local_path: str, vehicle_id: str, image_index: int) -> tuple:
-    """Sube una imagen a S3 y retorna la URL pública"""
-    s3_key = f"vehicles/{vehicle_id}/image_{image_index + 1}.jpg"
-    
     try:
         # Sin ACL - el bucket tiene Block Public Access habilitado
         # Las imágenes serán servidas con CloudFront o presigned URLs
         s3_client.upload_file(
-            local_path,
+            job.local_path,
             S3_BUCKET_NAME,
-            s3_key,
+            job.s3_key,
             ExtraArgs={
-                'ContentType': 'image/jpeg'
-            }
+                'ContentType': 'image/jpeg',
+                'Metadata': {'sha256': job.sha256}
+            },
+            Config=transfer_config
         )
-        
-        # Generar URL de S3 (será accesible si el bucket tiene policy pública o via CloudFront)
-        s3_url = f"https://{S3_BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com/{s3_key}"
-        return (True, s3_url)
-    
-    except ClientError as e:
-        return (False, str(e))
-
-def update_database(vehicle_id: str, dealer_id: str, images_data: list):
-    """Actualiza la base de datos con las URLs de S3"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    # Primero eliminar imágenes existentes del vehículo
-    cur.execute('DELETE FROM vehicle_images WHERE "VehicleId" = %s', (vehicle_id,))
-    
-    # Insertar nuevas imágenes
-    for idx, img_data in enumerate(images_data):
-        s3_url, file_size, width, height = img_data
-        
-        # Generar URL de thumbnail
-        thumbnail_url = s3_url.replace('/image_', '/thumb_')
-        
-        cur.execute('''
-            INSERT INTO vehicle_images 
-            ("Id", "DealerId", "VehicleId", "Url", "ThumbnailUrl", "Caption", 
-             "ImageType", "SortOrder", "IsPrimary", "FileSize", "MimeType", 
+        job.uploaded = True
+        stats.add(uploaded=1, uploaded_bytes=job.file_size)
+    except (ClientError, BotoCoreError, OSError) as e:
+        job.error = f"Error S3: {e}"
+
+def image_id(vehicle_id: str, index: int) -> str:
+    """Id determinístico de la imagen: el mismo vehículo y posición dan siempre el mismo Id"""
+    return str(uuid.uuid5(uuid.UUID(vehicle_id), str(index)))
+
+def image_rows(vehicles: List[List[ImageJob]]) -> List[tuple]:
+    """Filas de vehicle_images para un lote de vehículos"""
+    rows = []
+    for jobs in vehicles:
+        for job in jobs:
+            width, height = IMAGE_DIMENSIONS[job.index]
+            rows.append((
+                image_id(job.vehicle_id, job.index),
+                job.dealer_id if job.dealer_id else NO_DEALER_ID,
+                job.vehicle_id,
+                job.s3_url,
+                job.s3_url.replace('/image_', '/thumb_'),
+                IMAGE_CAPTIONS[job.index],
+                IMAGE_TYPES[job.index],
+                job.index,
+                job.index == 0,  # Primera imagen es primary
+                job.file_size,
+                'image/jpeg',
+                width,
+                height
+            ))
+    return rows
+
+def write_batch(conn, vehicles: List[List[ImageJob]], stats: PipelineStats):
+    """
+    Upsert de las imágenes de un lote de vehículos en una sola transacción.
+    Los Ids salen de (vehículo, posición), así que re-ejecutar el script
+    actualiza las mismas filas y no rompe las referencias a ellas; solo se
+    borran las filas del vehículo que no corresponden a una posición actual
+    (p. ej. las que dejaron corridas anteriores con Ids aleatorios).
+    """
+    rows = image_rows(vehicles)
+
+    with conn.cursor() as cur:
+        execute_values(cur, '''
+            INSERT INTO vehicle_images
+            ("Id", "DealerId", "VehicleId", "Url", "ThumbnailUrl", "Caption",
+             "ImageType", "SortOrder", "IsPrimary", "FileSize", "MimeType",
              "Width", "Height", "CreatedAt")
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-        ''', (
-            str(uuid.uuid4()),
-            dealer_id if dealer_id else '00000000-0000-0000-0000-000000000000',
-            vehicle_id,
-            s3_url,
-            thumbnail_url,
-            IMAGE_CAPTIONS[idx],
-            IMAGE_TYPES[idx],
-            idx,
-            idx == 0,  # Primera imagen es primary
-            file_size,
-            'image/jpeg',
-            width,
-            height
-        ))
-    
+            VALUES %s
+            ON CONFLICT ("Id") DO UPDATE SET
+                "DealerId" = EXCLUDED."DealerId", "VehicleId" = EXCLUDED."VehicleId",
+                "Url" = EXCLUDED."Url", "ThumbnailUrl" = EXCLUDED."ThumbnailUrl",
+                "Caption" = EXCLUDED."Caption", "ImageType" = EXCLUDED."ImageType",
+                "SortOrder" = EXCLUDED."SortOrder", "IsPrimary" = EXCLUDED."IsPrimary",
+                "FileSize" = EXCLUDED."FileSize", "MimeType" = EXCLUDED."MimeType",
+                "Width" = EXCLUDED."Width", "Height" = EXCLUDED."Height"
+        ''', rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())",
+            page_size=1000)
+        cur.execute('DELETE FROM vehicle_images WHERE "VehicleId" = ANY(%s::uuid[]) AND "Id" <> ALL(%s::uuid[])',
+                    ([jobs[0].vehicle_id for jobs in vehicles], [row[0] for row in rows]))
     conn.commit()
-    cur.close()
-    conn.close()
-
-def process_vehicle(s3_client, vehicle_id: str, dealer_id: str, vehicle_title: str, vehicle_num: int, total: int):
-    """Procesa un vehículo: descarga imágenes, sube a S3, actualiza DB"""
-    print(f"   [{vehicle_num}/{total}] {vehicle_title[:40]}...", end=" ", flush=True)
-    
-    images_data = []
-    
-    for i in range(IMAGES_PER_VEHICLE):
-        # 1. Descargar imagen
-        success, result, file_size, width, height = download_image(vehicle_id, i)
-        if not success:
-            print(f"❌ Error descarga: {result}")
-            return False
-        
-        local_path = result
-        
-        # 2. Subir a S3
-        success, s3_url = upload_to_s3(s3_client, local_path, vehicle_id, i)
-        if not success:
-            print(f"❌ Error S3: {s3_url}")
-            return False
-        
-        images_data.append((s3_url, file_size, width, height))
-    
-    # 3. Actualizar base de datos
-    update_database(vehicle_id, dealer_id, images_data)
-    
-    print(f"✅ {IMAGES_PER_VEHICLE} imágenes")
-    return True
+    stats.add(vehicles_written=len(vehicles), images_written=len(rows), db_batches=1)
+
+
+class ImagePipeline:
+    """descarga → upload → DB, cada etapa con sus workers y colas acotadas entre ellas"""
+
+    def __init__(self, s3_client, conn, fetch_workers: int = FETCH_WORKERS,
+                 upload_workers: int = UPLOAD_WORKERS, db_batch: int = DB_BATCH_VEHICLES,
+                 redownload: bool = False, writer=write_batch):
+        self.s3_client = s3_client
+        self.conn = conn
+        self.fetch_workers = fetch_workers
+        self.upload_workers = upload_workers
+        self.db_batch = db_batch
+        self.redownload = redownload
+        self.writer = writer
+        self.session = get_http_session(fetch_workers)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_THRESHOLD,
+            max_concurrency=4
+        )
+        self.stats = PipelineStats()
+        self.fetch_q: Queue = Queue(maxsize=QUEUE_SIZE)
+        self.upload_q: Queue = Queue(maxsize=QUEUE_SIZE)
+        self.db_q: Queue = Queue(maxsize=QUEUE_SIZE)
+
+    def run(self, vehicles) -> PipelineStats:
+        self.total_vehicles = len(vehicles)
+        fetchers = [threading.Thread(target=self._fetch_worker, daemon=True) for _ in range(self.fetch_workers)]
+        uploaders = [threading.Thread(target=self._upload_worker, daemon=True) for _ in range(self.upload_workers)]
+        db_writer = threading.Thread(target=self._db_worker, daemon=True)
+        for thread in fetchers + uploaders + [db_writer]:
+            thread.start()
+
+        for vehicle_id, dealer_id, title in vehicles:
+            for i in range(IMAGES_PER_VEHICLE):
+                self.fetch_q.put(ImageJob(str(vehicle_id), dealer_id and str(dealer_id), title or "", i))
+
+        # Cierre ordenado: un centinela por worker, etapa por etapa
+        self._drain(self.fetch_q, fetchers)
+        self._drain(self.upload_q, uploaders)
+        self._drain(self.db_q, [db_writer])
+        return self.stats
+
+    @staticmethod
+    def _drain(queue: Queue, workers: List[threading.Thread]):
+        for _ in workers:
+            queue.put(None)
+        for thread in workers:
+            thread.join()
+
+    # Un error inesperado marca la imagen como fallida; un worker muerto dejaría
+    # el pipeline bloqueado en una cola llena
+    def _fetch_worker(self):
+        while (job := self.fetch_q.get()) is not None:
+            try:
+                download_image(self.session, job, self.stats, self.redownload)
+            except Exception as e:
+                job.error = f"Error descarga: {e}"
+            (self.db_q if job.error else self.upload_q).put(job)
+
+    def _upload_worker(self):
+        while (job := self.upload_q.get()) is not None:
+            try:
+                upload_to_s3(self.s3_client, self.transfer_config, job, self.stats)
+            except Exception as e:
+                job.error = f"Error S3: {e}"
+            self.db_q.put(job)
+
+    def _db_worker(self):
+        pending: Dict[str, List[ImageJob]] = {}
+        batch: List[List[ImageJob]] = []
+        done = 0
+
+        while (job := self.db_q.get()) is not None:
+            jobs = pending.setdefault(job.vehicle_id, [])
+            jobs.append(job)
+            if len(jobs) < IMAGES_PER_VEHICLE:
+                continue
+            del pending[job.vehicle_id]
+            done += 1
+            jobs.sort(key=lambda j: j.index)
+            errors = [j.error for j in jobs if j.error]
+            if errors:
+                self.stats.add(vehicle_errors=1)
+                print(f"   [{done}/{self.total_vehicles}] {jobs[0].title[:40]}... ❌ {errors[0]}", flush=True)
+                continue
+
+            skipped = sum(1 for j in jobs if not j.uploaded)
+            note = f" ({skipped} ya en S3)" if skipped else ""
+            print(f"   [{done}/{self.total_vehicles}] {jobs[0].title[:40]}... ✅ {IMAGES_PER_VEHICLE} imágenes{note}",
+                  flush=True)
+            batch.append(jobs)
+            if len(batch) >= self.db_batch:
+                self._flush(batch)
+                batch = []
+            if done % 100 == 0:
+                self.print_progress()
+
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: List[List[ImageJob]]):
+        try:
+            self.writer(self.conn, batch, self.stats)
+        except Exception as e:
+            try:
+                self.conn.rollback()
+            except Exception:
+                pass
+            self.stats.add(vehicle_errors=len(batch))
+            print(f"   ❌ Error DB en lote de {len(batch)} vehículos: {e}", flush=True)
+
+    def print_progress(self):
+        s = self.stats
+        print(f"   ⏱  {s.elapsed:.0f}s · descargadas {s.downloaded + s.reused_local} · "
+              f"subidas {s.uploaded} (+{s.skipped_uploads} omitidas) · "
+              f"vehículos en DB {s.vehicles_written} · {s.images_written / s.elapsed:.1f} img/s", flush=True)
+
+
+def print_summary(stats: PipelineStats):
+    elapsed = stats.elapsed
+    mb = 1024 * 1024
+    print()
+    print("=" * 70)
+    print("📊 RESUMEN")
+    print("=" * 70)
+    print(f"   • Vehículos procesados: {stats.vehicles_written}")
+    print(f"   • Errores: {stats.vehicle_errors}")
+    print(f"   • Imágenes descargadas: {stats.downloaded} ({stats.downloaded_bytes / mb:.1f} MB)"
+          f" + {stats.reused_local} reutilizadas del disco")
+    print(f"   • Imágenes subidas: {stats.uploaded} ({stats.uploaded_bytes / mb:.1f} MB)"
+          f" + {stats.skipped_uploads} omitidas (mismo SHA-256 en S3)")
+    print(f"   • Imágenes en DB: {stats.images_written} en {stats.db_batches} lotes")
+    print(f"   • Tiempo total: {elapsed:.1f} segundos")
+    print(f"   • Velocidad: {stats.images_written / elapsed:.1f} imágenes/seg"
+          f" · descarga {stats.downloaded_bytes / mb / elapsed:.1f} MB/s"
+          f" · upload {stats.uploaded_bytes / mb / elapsed:.1f} MB/s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Descarga imágenes de vehículos y las sube a S3")
+    parser.add_argument('--fetch-workers', type=int, default=FETCH_WORKERS,
+                        help=f"Descargas concurrentes (default {FETCH_WORKERS})")
+    parser.add_argument('--upload-workers', type=int, default=UPLOAD_WORKERS,
+                        help=f"Uploads concurrentes a S3 (default {UPLOAD_WORKERS})")
+    parser.add_argument('--db-batch', type=int, default=DB_BATCH_VEHICLES,
+                        help=f"Vehículos por transacción en DB (default {DB_BATCH_VEHICLES})")
+    parser.add_argument('--limit', type=int, help="Procesar solo los primeros N vehículos")
+    parser.add_argument('--redownload', action='store_true',
+                        help="Descargar aunque la imagen ya exista en data/vehicle_images")
+    parser.add_argument('--local-s3', metavar='DIR',
+                        help="Usar un directorio como stand-in de S3 (pruebas sin AWS)")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+
     print("=" * 70)
     print("🖼️  OKLA Motors - Descarga y Upload de Imágenes a AWS S3")
     print("=" * 70)
     print()
-    
+
     # Crear directorio local si no existe
     LOCAL_IMAGES_PATH.mkdir(parents=True, exist_ok=True)
     print(f"📁 Directorio local: {LOCAL_IMAGES_PATH}")
-    print(f"☁️  Bucket S3: s3://{S3_BUCKET_NAME}/vehicles/")
+    if args.local_s3:
+        print(f"🧪 S3 local: {args.local_s3}/{S3_BUCKET_NAME}/vehicles/")
+    else:
+        print(f"☁️  Bucket S3: s3://{S3_BUCKET_NAME}/vehicles/")
     print()
-    
+
     # Verificar conexión a S3
     print("🔌 Verificando conexión a AWS S3...", end=" ")
     try:
-        s3_client = get_s3_client()
+        s3_client = LocalS3Client(Path(args.local_s3)) if args.local_s3 else get_s3_client()
         s3_client.head_bucket(Bucket=S3_BUCKET_NAME)
         print("✅")
     except ClientError as e:
@@ -255,23 +547,24 @@ def main():
         else:
             print(f"❌ Error: {e}")
         sys.exit(1)
-    
-    # Verificar conexión a PostgreSQL
+
+    # Verificar conexión a PostgreSQL (la misma conexión se usa todo el proceso)
     print("🔌 Verificando conexión a PostgreSQL...", end=" ")
     try:
         conn = get_db_connection()
-        conn.close()
         print("✅")
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
-    
+
     # Obtener vehículos
     print()
     print("📋 Obteniendo lista de vehículos...")
-    vehicles = get_all_vehicles()
+    vehicles = get_all_vehicles(conn)
+    if args.limit:
+        vehicles = vehicles[:args.limit]
     print(f"   Encontrados: {len(vehicles)} vehículos")
-    
+
     total_images = len(vehicles) * IMAGES_PER_VEHICLE
     print()
     print(f"📊 Plan de ejecución:")
@@ -279,44 +572,25 @@ def main():
     print(f"   • Imágenes por vehículo: {IMAGES_PER_VEHICLE}")
     print(f"   • Total imágenes: {total_images}")
     print(f"   • Almacenamiento estimado: ~{total_images * 0.5:.0f} MB")
+    print(f"   • Workers: {args.fetch_workers} descarga / {args.upload_workers} upload / "
+          f"lotes de {args.db_batch} vehículos en DB")
     print()
-    
+
     # Modo automático - sin confirmación
     print("🚀 Iniciando proceso automáticamente...")
     print()
-    
-    start_time = time.time()
-    success_count = 0
-    error_count = 0
-    
-    for idx, (vehicle_id, dealer_id, title) in enumerate(vehicles, 1):
-        try:
-            if process_vehicle(s3_client, vehicle_id, dealer_id, title, idx, len(vehicles)):
-                success_count += 1
-            else:
-                error_count += 1
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            error_count += 1
-        
-        # Rate limiting para no sobrecargar Picsum
-        if idx % 10 == 0:
-            time.sleep(1)
-    
-    elapsed = time.time() - start_time
-    
-    print()
-    print("=" * 70)
-    print("📊 RESUMEN")
-    print("=" * 70)
-    print(f"   • Vehículos procesados: {success_count}")
-    print(f"   • Errores: {error_count}")
-    print(f"   • Imágenes subidas: {success_count * IMAGES_PER_VEHICLE}")
-    print(f"   • Tiempo total: {elapsed:.1f} segundos")
-    print(f"   • Velocidad: {(success_count * IMAGES_PER_VEHICLE) / elapsed:.1f} imágenes/seg")
+
+    pipeline = ImagePipeline(s3_client, conn, args.fetch_workers, args.upload_workers,
+                             args.db_batch, args.redownload)
+    try:
+        stats = pipeline.run(vehicles)
+    finally:
+        conn.close()
+
+    print_summary(stats)
     print()
     print(f"📁 Imágenes locales: {LOCAL_IMAGES_PATH}")
-    print(f"☁️  Imágenes S3: https://{S3_BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com/vehicles/")
+    print(f"☁️  Imágenes S3: {public_url('vehicles/')}")
     print()
     print("✅ Proceso completado!")
 
@@ -5,8 +5,9 @@ Fix broken image URLs in vehicle_images:
 - For non-primary broken rows of vehicles that have OTHER working images: delete
 - Resets HasBrokenImages=false for fixed vehicles
 """
-import subprocess, json, sys, urllib.request, urllib.error
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import subprocess, json, sys
+
+from url_health import check_urls
 
 DB_DSN = (
     "host=okla-db-do-user-31493168-0.g.db.ondigitalocean.com "
@@ -33,28 +34,6 @@ def psql_exec(sql: str) -> bool:
         print(f"  SQL ERROR: {r.stderr[:200]}")
     return r.returncode == 0
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 AppleWebKit/537.36 Chrome/122 Safari/537.36",
-    "Accept": "image/avif,image/webp,image/*,*/*;q=0.8",
-}
-
-def url_ok(url: str) -> bool:
-    try:
-        req = urllib.request.Request(url, headers=HEADERS, method="HEAD")
-        with urllib.request.urlopen(req, timeout=8) as r:
-            return r.status < 400
-    except urllib.error.HTTPError as e:
-        if e.code == 405:
-            try:
-                req2 = urllib.request.Request(url, headers={**HEADERS, "Range": "bytes=0-0"})
-                with urllib.request.urlopen(req2, timeout=8) as r2:
-                    return r2.status < 400
-            except Exception:
-                return False
-        return False
-    except Exception:
-        return False
-
 # ── Candidate replacement URLs per body style ──────────────────────────────
 # Each list is in priority order; first verified working one will be used.
 CANDIDATES = {
@@ -127,14 +106,10 @@ CANDIDATES = {
 print("Pre-testing candidate replacement URLs...", flush=True)
 all_candidates = list({u for lst in CANDIDATES.values() for u in lst})
 cand_results: dict[str, bool] = {}
-with ThreadPoolExecutor(max_workers=20) as pool:
-    futures = {pool.submit(url_ok, u): u for u in all_candidates}
-    for fut in as_completed(futures):
-        u = futures[fut]
-        ok = fut.result()
-        cand_results[u] = ok
-        if not ok:
-            print(f"  WARN: candidate down → {u}")
+for u, res in check_urls(all_candidates).items():
+    cand_results[u] = res.ok
+    if not res.ok:
+        print(f"  WARN: candidate down → {u}")
 
 # Build verified candidates per body style
 def get_replacement(body_style: str) -> str | None:
@@ -298,13 +273,12 @@ ORDER BY v."Make"
 s3_fix_count = 0
 if s3_check.strip():
     print("\nChecking remaining primary images on HasBrokenImages vehicles...", flush=True)
-    for line in s3_check.splitlines():
-        parts = line.split("|")
-        if len(parts) < 7:
-            continue
-        img_id, vid, url, make, model, year, body = parts[:7]
-        ok = url_ok(url if "X-Amz-" not in url else url.split("?")[0])
-        if not ok:
+    primaries = [line.split("|") for line in s3_check.splitlines()]
+    primaries = [parts[:7] for parts in primaries if len(parts) >= 7]
+    # Re-check every primary, never trusting a cached OK: these vehicles are flagged broken
+    primary_ok = check_urls([parts[2] for parts in primaries], use_cache=False)
+    for img_id, vid, url, make, model, year, body in primaries:
+        if not primary_ok[url].ok:
             replacement = get_replacement(body)
             if replacement:
                 safe_url = replacement.replace("'", "''")
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+===============================================================================
+OKLA Motors - Carga del Catálogo de Vehículos vía COPY
+===============================================================================
+
+Carga marcas, modelos y trims en la base de VehiclesSaleService sin generar
+archivos SQL con un INSERT por fila:
+
+1. Las filas se serializan a CSV en streaming y entran con COPY a tablas
+   temporales de staging (una transacción)
+2. Un INSERT ... SELECT ... ON CONFLICT por tabla hace upsert contra
+   vehicle_makes, vehicle_models y vehicle_trims sobre sus índices únicos
+   ("Name", ("MakeId", "Name") y ("ModelId", "Year", "Name"), como
+   seed_catalog.sql); los padres se resuelven por nombre, así que funciona
+   aunque la base ya tenga filas con otros Ids
+3. Los Ids de las filas nuevas son UUIDv5 derivados de los slugs (catalog_id
+   de seed-vehiclessale-catalog.py): cargar dos veces no duplica ni cambia nada
+
+Fuentes: TRIM_DATA / MAKES_INFO (curados) y, opcionalmente, las marcas y
+modelos descargados de NHTSA por seed-vehicle-catalog.py (--nhtsa).
+
+Autor: Gregory Moreno
+Fecha: Octubre 2026
+
+Uso:
+    python3 scripts/load_vehicle_catalog.py [--nhtsa [PATH]] [--dsn DSN] [--dry-run]
+
+Requisitos:
+    pip install psycopg2-binary
+===============================================================================
+"""
+
+import os
+import io
+import csv
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).parent
+NHTSA_CATALOG = SCRIPT_DIR / "vehicle-data" / "processed" / "vehicle_catalog_nhtsa.json"
+
+# Base de datos - Variables de entorno (DATABASE_URL tiene prioridad)
+DB_HOST = os.environ.get("DB_HOST", "localhost")
+DB_PORT = int(os.environ.get("DB_PORT", "5433"))
+DB_NAME = os.environ.get("DB_NAME", "vehiclessaleservice")
+DB_USER = os.environ.get("DB_USER", "postgres")
+DB_PASSWORD = os.environ.get("DB_PASSWORD", "password")
+
+
+def load_catalog_module():
+    """seed-vehiclessale-catalog.py (nombre con guiones: se carga por ruta)"""
+    spec = importlib.util.spec_from_file_location(
+        "seed_vehiclessale_catalog", SCRIPT_DIR / "seed-vehiclessale-catalog.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+catalog = load_catalog_module()
+slugify = catalog.slugify
+catalog_id = catalog.catalog_id
+
+
+# ========================================
+# FILAS DE STAGING
+# ========================================
+
+MAKE_COLUMNS = ("id", "name", "slug", "country", "is_popular", "sort_order")
+MODEL_COLUMNS = ("id", "make_name", "name", "slug", "vehicle_type", "start_year", "is_popular")
+TRIM_COLUMNS = ("id", "make_name", "model_name", "name", "slug", "year", "engine_size", "horsepower",
+                "torque", "fuel_type", "transmission", "drive_type", "mpg_city", "mpg_highway", "base_msrp")
+
+
+class CatalogRows:
+    """Filas deduplicadas por slug; los datos curados ganan sobre NHTSA
+
+    Las filas hijas llevan el nombre de su padre tal como queda en la base
+    (el de la fila de marca/modelo que ganó), que es la clave del JOIN.
+    """
+
+    def __init__(self):
+        self.makes: Dict[str, Tuple] = {}
+        self.models: Dict[Tuple[str, str], Tuple] = {}
+        self.trims: Dict[Tuple[str, str, int, str], Tuple] = {}
+
+    def add_curated(self):
+        for make_name, info in catalog.MAKES_INFO.items():
+            make_slug = slugify(make_name)
+            self.makes[make_slug] = (catalog_id("make", make_slug), make_name, make_slug,
+                                     info["country"], info["popular"], info["order"])
+
+        for make_name, models in catalog.TRIM_DATA.items():
+            make_slug = slugify(make_name)
+            if make_slug not in self.makes:
+                continue
+            make_name = self.makes[make_slug][1]
+            for model_name, years in models.items():
+                model_slug = slugify(model_name)
+                self.models[(make_slug, model_slug)] = (
+                    catalog_id("model", make_slug, model_slug), make_name, model_name, model_slug,
+                    "Car", min(years), True
+                )
+                for year, trims in years.items():
+                    for trim in trims:
+                        trim_slug = slugify(trim["name"])
+                        fuel, trans, drive = catalog.map_trim_enums(trim)
+                        self.trims[(make_slug, model_slug, year, trim_slug)] = (
+                            catalog_id("trim", make_slug, model_slug, year, trim_slug), make_name, model_name,
+                            trim["name"], trim_slug, year, trim.get("engine", ""), trim.get("hp"),
+                            trim.get("torque"), fuel, trans, drive, trim.get("mpg_city"),
+                            trim.get("mpg_hwy"), trim.get("msrp")
+                        )
+
+    def add_nhtsa(self, path: Path):
+        """Marcas y modelos del catálogo NHTSA que no estén ya en los datos curados"""
+        with open(path, "r", encoding="utf-8") as f:
+            nhtsa = json.load(f)
+
+        first_year: Dict[Tuple[str, str], int] = {}
+        for year, makes in nhtsa.get("models_by_year", {}).items():
+            for make_name, model_names in makes.items():
+                for model_name in model_names:
+                    key = (slugify(make_name), slugify(model_name))
+                    first_year[key] = min(first_year.get(key, int(year)), int(year))
+
+        next_order = max((row[5] for row in self.makes.values()), default=0) + 1
+        for make_name in nhtsa.get("makes", []):
+            make_slug = slugify(make_name)
+            if make_slug not in self.makes:
+                self.makes[make_slug] = (catalog_id("make", make_slug), make_name, make_slug, None, False, next_order)
+                next_order += 1
+
+        for make_name, models in nhtsa.get("models_by_make", {}).items():
+            make_slug = slugify(make_name)
+            if make_slug in self.makes:
+                make_name = self.makes[make_slug][1]
+            for model in models:
+                model_name = (model.get("model_name") or "").strip()
+                if not model_name:
+                    continue
+                key = (make_slug, slugify(model_name))
+                if key not in self.models:
+                    self.models[key] = (catalog_id("model", *key), make_name, model_name, key[1], "Car",
+                                        first_year.get(key, datetime.now().year), False)
+
+
+class CsvRowStream:
+    """Objeto tipo archivo para COPY FROM STDIN: serializa filas a CSV a medida que se leen"""
+
+    def __init__(self, rows: Iterable[Tuple]):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.count = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)  # None -> campo vacío = NULL en COPY csv
+            self.count += 1
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+        if size < 0:
+            chunk, self._pending = self._pending, ""
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+# ========================================
+# STAGING + UPSERT
+# ========================================
+
+STAGING_DDL = """
+CREATE TEMP TABLE stage_makes (
+    id uuid, name text, slug text, country text, is_popular boolean, sort_order integer
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_models (
+    id uuid, make_name text, name text, slug text, vehicle_type text, start_year integer, is_popular boolean
+) ON COMMIT DROP;
+CREATE TEMP TABLE stage_trims (
+    id uuid, make_name text, model_name text, name text, slug text, year integer, engine_size text,
+    horsepower integer, torque integer, fuel_type text, transmission text, drive_type text,
+    mpg_city integer, mpg_highway integer, base_msrp numeric
+) ON COMMIT DROP;
+"""
+
+# Cada upsert devuelve (insertadas, actualizadas); las filas sin cambios no se tocan
+UPSERT_MAKES = """
+WITH upserted AS (
+    INSERT INTO vehicle_makes ("Id", "Name", "Slug", "Country", "IsPopular", "SortOrder", "IsActive", "CreatedAt", "UpdatedAt")
+    SELECT id, name, slug, country, is_popular, sort_order, true, NOW(), NOW() FROM stage_makes
+    ON CONFLICT ("Name") DO UPDATE SET
+        "Country" = EXCLUDED."Country", "IsPopular" = EXCLUDED."IsPopular",
+        "SortOrder" = EXCLUDED."SortOrder", "UpdatedAt" = NOW()
+    WHERE (vehicle_makes."Country", vehicle_makes."IsPopular", vehicle_makes."SortOrder")
+        IS DISTINCT FROM (EXCLUDED."Country", EXCLUDED."IsPopular", EXCLUDED."SortOrder")
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+UPSERT_MODELS = """
+WITH upserted AS (
+    INSERT INTO vehicle_models ("Id", "MakeId", "Name", "Slug", "VehicleType", "StartYear", "IsPopular", "IsActive", "CreatedAt", "UpdatedAt")
+    SELECT s.id, mk."Id", s.name, s.slug, s.vehicle_type, s.start_year, s.is_popular, true, NOW(), NOW()
+    FROM stage_models s
+    JOIN vehicle_makes mk ON mk."Name" = s.make_name
+    ON CONFLICT ("MakeId", "Name") DO UPDATE SET
+        "StartYear" = EXCLUDED."StartYear", "UpdatedAt" = NOW()
+    WHERE vehicle_models."StartYear" IS DISTINCT FROM EXCLUDED."StartYear"
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+UPSERT_TRIMS = """
+WITH upserted AS (
+    INSERT INTO vehicle_trims (
+        "Id", "ModelId", "Name", "Slug", "Year", "EngineSize", "Horsepower", "Torque",
+        "FuelType", "Transmission", "DriveType", "MpgCity", "MpgHighway", "BaseMSRP", "IsActive", "CreatedAt", "UpdatedAt")
+    SELECT s.id, m."Id", s.name, s.slug, s.year, s.engine_size, s.horsepower, s.torque,
+           s.fuel_type, s.transmission, s.drive_type, s.mpg_city, s.mpg_highway, s.base_msrp, true, NOW(), NOW()
+    FROM stage_trims s
+    JOIN vehicle_makes mk ON mk."Name" = s.make_name
+    JOIN vehicle_models m ON m."MakeId" = mk."Id" AND m."Name" = s.model_name
+    ON CONFLICT ("ModelId", "Year", "Name") DO UPDATE SET
+        "EngineSize" = EXCLUDED."EngineSize", "Horsepower" = EXCLUDED."Horsepower", "Torque" = EXCLUDED."Torque",
+        "FuelType" = EXCLUDED."FuelType", "Transmission" = EXCLUDED."Transmission",
+        "DriveType" = EXCLUDED."DriveType", "MpgCity" = EXCLUDED."MpgCity",
+        "MpgHighway" = EXCLUDED."MpgHighway", "BaseMSRP" = EXCLUDED."BaseMSRP", "UpdatedAt" = NOW()
+    WHERE (vehicle_trims."EngineSize", vehicle_trims."Horsepower", vehicle_trims."Torque",
+           vehicle_trims."FuelType", vehicle_trims."Transmission", vehicle_trims."DriveType",
+           vehicle_trims."MpgCity", vehicle_trims."MpgHighway", vehicle_trims."BaseMSRP")
+        IS DISTINCT FROM (EXCLUDED."EngineSize", EXCLUDED."Horsepower", EXCLUDED."Torque",
+           EXCLUDED."FuelType", EXCLUDED."Transmission", EXCLUDED."DriveType",
+           EXCLUDED."MpgCity", EXCLUDED."MpgHighway", EXCLUDED."BaseMSRP")
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted
+"""
+
+TABLES = (
+    ("vehicle_makes", "stage_makes", MAKE_COLUMNS, UPSERT_MAKES),
+    ("vehicle_models", "stage_models", MODEL_COLUMNS, UPSERT_MODELS),
+    ("vehicle_trims", "stage_trims", TRIM_COLUMNS, UPSERT_TRIMS),
+)
+
+
+def get_db_connection(dsn: Optional[str] = None):
+    import psycopg2
+
+    dsn = dsn or os.environ.get("DATABASE_URL")
+    if dsn:
+        return psycopg2.connect(dsn)
+    return psycopg2.connect(
+        host=DB_HOST, port=DB_PORT, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD
+    )
+
+
+def load(conn, rows: CatalogRows) -> List[Dict]:
+    """COPY a staging + upsert, todo en una transacción; devuelve estadísticas por tabla"""
+    row_sets = (rows.makes.values(), rows.models.values(), rows.trims.values())
+    stats = []
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(STAGING_DDL)
+            for (table, stage, columns, upsert_sql), table_rows in zip(TABLES, row_sets):
+                start = time.perf_counter()
+                stream = CsvRowStream(table_rows)
+                cur.copy_expert(f"COPY {stage} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", stream)
+                copied = time.perf_counter()
+
+                cur.execute(upsert_sql)
+                inserted, updated = cur.fetchone()
+                done = time.perf_counter()
+                stats.append({
+                    "table": table, "rows": stream.count, "inserted": inserted, "updated": updated,
+                    "unchanged": stream.count - inserted - updated,
+                    "copy_seconds": copied - start, "upsert_seconds": done - copied
+                })
+    return stats
+
+
+def print_stats(stats: List[Dict], elapsed: float):
+    print(f"\n{'Tabla':<16} {'Filas':>8} {'Nuevas':>8} {'Actual.':>8} {'Igual':>8} {'COPY filas/s':>14} {'Upsert s':>9}")
+    print("-" * 78)
+    for s in stats:
+        rate = s["rows"] / s["copy_seconds"] if s["copy_seconds"] > 0 else 0
+        print(f"{s['table']:<16} {s['rows']:>8} {s['inserted']:>8} {s['updated']:>8} {s['unchanged']:>8} "
+              f"{rate:>14,.0f} {s['upsert_seconds']:>9.2f}")
+    total = sum(s["rows"] for s in stats)
+    print("-" * 78)
+    print(f"✅ {total} filas en {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} filas/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga el catálogo de vehículos en VehiclesSaleService vía COPY + upsert")
+    parser.add_argument("--nhtsa", nargs="?", const=NHTSA_CATALOG, type=Path,
+                        help=f"Incluir marcas/modelos del catálogo NHTSA (default: {NHTSA_CATALOG})")
+    parser.add_argument("--dsn", help="DSN de PostgreSQL (default: DATABASE_URL o DB_HOST/DB_PORT/...)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo construir las filas, sin tocar la base")
+    args = parser.parse_args()
+
+    rows = CatalogRows()
+    rows.add_curated()
+    if args.nhtsa:
+        if not args.nhtsa.exists():
+            print(f"❌ Archivo no encontrado: {args.nhtsa}")
+            print("   Ejecuta primero: python seed-vehicle-catalog.py --download")
+            return 1
+        rows.add_nhtsa(args.nhtsa)
+
+    print("🚗 Carga del catálogo de vehículos (COPY + upsert)")
+    print("=" * 55)
+    print(f"   - {len(rows.makes)} marcas, {len(rows.models)} modelos, {len(rows.trims)} trims")
+
+    if args.dry_run:
+        print("\n[DRY-RUN] No se conectó a la base de datos")
+        return 0
+
+    start = time.perf_counter()
+    conn = get_db_connection(args.dsn)
+    try:
+        stats = load(conn, rows)
+    finally:
+        conn.close()
+    print_stats(stats, time.perf_counter() - start)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,12 +16,11 @@ Steps:
 5. Run full HTTP verification of all images
 """
 import psycopg2
-import urllib.request
 import urllib.parse
-import urllib.error
-import concurrent.futures
 import sys
 
+from url_health import check_urls
+
 DSN = "host=okla-db-do-user-31493168-0.g.db.ondigitalocean.com port=25060 dbname=vehiclessaleservice user=doadmin sslmode=require password=REDACTED_USE_DB_PASSWORD_ENV"
 
 DRY_RUN = "--dry-run" in sys.argv
@@ -35,20 +34,6 @@ def to_permanent_url(url: str) -> str | None:
     parsed = urllib.parse.urlparse(url)
     return urllib.parse.urlunparse(parsed._replace(query="", fragment=""))
 
-def check_url(url: str) -> bool:
-    """Return True if URL is reachable (HTTP 200)."""
-    try:
-        req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"}, method="HEAD")
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            return 200 <= resp.status < 300
-    except Exception:
-        try:
-            req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                return 200 <= resp.status < 300
-        except Exception:
-            return False
-
 def main():
     conn = psycopg2.connect(DSN)
     conn.autocommit = False
@@ -104,8 +89,9 @@ def main():
     print(f"\nVerifying sample of {min(10, len(updates))} permanent URLs...")
     sample = updates[:10]
     sample_urls = [u[2] for u in sample]
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        results = list(executor.map(check_url, sample_urls))
+    # Fresh check (no cache): this gates the DB update
+    checked = check_urls(sample_urls, use_cache=False)
+    results = [checked[url].ok for url in sample_urls]
 
     for url, ok in zip(sample_urls, results):
         status = "✅" if ok else "❌"
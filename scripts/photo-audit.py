@@ -16,6 +16,8 @@ import urllib.request
 import urllib.error
 import sys
 
+from url_health import check_urls
+
 PROD_URL = "https://okla.com.do"
 
 ACCOUNTS = {
@@ -99,20 +101,6 @@ def api_post(path, data, token, csrf_token):
         print(f"  [POST ERR] {path}: {ex}", file=sys.stderr)
         return None
 
-def check_image_url(url: str) -> bool:
-    if not url or url.startswith("blob:") or url.startswith("data:"):
-        return False
-    try:
-        req = urllib.request.Request(
-            url, method="HEAD",
-            headers={"User-Agent": "Mozilla/5.0 OKLA-Audit/1.0"}
-        )
-        with urllib.request.urlopen(req, timeout=7) as r:
-            ct = r.headers.get("Content-Type", "")
-            return r.status < 400 and ("image" in ct or "octet" in ct)
-    except Exception:
-        return False
-
 def do_login(key):
     acc = ACCOUNTS[key]
     url = f"{PROD_URL}/api/auth/login"
@@ -192,6 +180,7 @@ def main():
     no_images = []
     broken = []
     ok = []
+    primaries = []
 
     for v in all_vehicles:
         vid = v.get("id", "?")
@@ -210,8 +199,12 @@ def main():
             continue
 
         primary = sorted(real, key=lambda i: (0 if i.get("isPrimary") else 1, i.get("sortOrder", 99)))[0]
-        url = primary["url"]
-        if check_image_url(url):
+        primaries.append((v, vid, title, primary["url"]))
+
+    # All primary URLs in one concurrent pass (must answer with an image content type)
+    checked = check_urls([url for _, _, _, url in primaries], require_image=True)
+    for v, vid, title, url in primaries:
+        if checked[url].ok:
             ok.append(v)
         else:
             print(f"  [BROKEN] {vid[:8]} {title}  \u2192  {url[:65]}...")
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Perceptual-hash duplicate photo engine for the vehicle inventory.
+
+Used by audit_duplicate_photos.py (--phash) to find the same photo across
+listings even when it was re-uploaded to S3, resized or re-encoded, which the
+Unsplash photo-ID regex can't see:
+
+- Every image is downloaded once over a pooled aiohttp session and reduced to
+  two 64-bit hashes: pHash (DCT of a 32x32 grayscale) and dHash (9x8 gradient)
+- Hashes live in a local SQLite index keyed by URL with the response ETag; on
+  later runs entries younger than the TTL are reused as-is and older ones are
+  revalidated with If-None-Match (304 = hash still valid, no body transferred)
+- Near-duplicates are found with multi-index hashing over the distinct hashes:
+  each Hamming-radius lookup probes a few small buckets instead of the whole
+  catalog, so clustering is ~O(n log n) instead of all-pairs O(n²). (A BK-tree
+  degrades to a near-full scan on 64-bit hashes, whose distances bunch around 32)
+
+Usage:
+    from photo_hash import hash_urls, cluster
+    hashes = hash_urls(urls)                          # {url: PhotoHash}
+    groups = cluster({u: h.phash for u, h in hashes.items()}, radius=6)
+"""
+import asyncio
+import io
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Callable, Dict, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+import aiohttp
+import numpy as np
+from PIL import Image
+
+from url_health import HEADERS, check_target
+
+DEFAULT_INDEX_PATH = Path(os.getenv(
+    "PHOTO_HASH_INDEX", Path(__file__).resolve().parent / ".photo_hash_index.sqlite3"))
+DEFAULT_TTL_SECONDS = int(os.getenv("PHOTO_HASH_TTL_SECONDS", str(7 * 24 * 3600)))
+DEFAULT_CONCURRENCY = 64
+DEFAULT_PER_HOST = 16
+DEFAULT_TIMEOUT = 30
+# pHash distance up to ~6/64 bits: same photo after resize / recompression / light crop
+DEFAULT_RADIUS = 6
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+K = TypeVar("K", bound=Hashable)
+
+
+@dataclass
+class PhotoHash:
+    url: str
+    phash: int
+    dhash: int
+    width: int
+    height: int
+    etag: Optional[str] = None
+    hashed_at: float = 0.0
+    cached: bool = False
+
+
+# ── Hashes ───────────────────────────────────────────────────────────────────
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m
+
+
+_DCT = _dct_matrix(DCT_SIZE)
+_BIT_WEIGHTS = np.left_shift(np.uint64(1), np.arange(HASH_SIZE * HASH_SIZE - 1, -1, -1, dtype=np.uint64))
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int(np.sum(_BIT_WEIGHTS[bits.ravel()], dtype=np.uint64))
+
+
+def phash(gray: Image.Image) -> int:
+    """64-bit DCT hash: low 8x8 frequencies above/below their median"""
+    pixels = np.asarray(gray.resize((DCT_SIZE, DCT_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    return _bits_to_int(low > np.median(low))
+
+
+def dhash(gray: Image.Image) -> int:
+    """64-bit difference hash: is each pixel brighter than its right neighbour"""
+    pixels = np.asarray(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def hash_image_bytes(data: bytes) -> Tuple[int, int, int, int]:
+    """(phash, dhash, width, height) of an encoded image"""
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+        # JPEG: let libjpeg decode at 1/2..1/8 scale, the hash only needs 32x32
+        img.draft("L", (DCT_SIZE * 4, DCT_SIZE * 4))
+        gray = img.convert("L")
+    return phash(gray), dhash(gray), width, height
+
+
+# ── Multi-index hashing ──────────────────────────────────────────────────────
+
+class MultiIndexHash(Generic[K]):
+    """
+    Hamming-radius index over 64-bit hashes (multi-index hashing): the hash is
+    split into 4 chunks of 16 bits with an exact-match table per chunk. Two
+    hashes within distance r differ by at most r // 4 bits in at least one
+    chunk (pigeonhole), so a query only probes each chunk's small bit
+    neighbourhood and verifies those candidates, instead of scanning everything.
+    """
+
+    CHUNKS = 4
+    CHUNK_BITS = 16
+
+    def __init__(self, radius: int = DEFAULT_RADIUS):
+        self.radius = radius
+        sub_radius = radius // self.CHUNKS
+        self._masks = [sum(1 << b for b in bits)
+                       for k in range(sub_radius + 1)
+                       for bits in combinations(range(self.CHUNK_BITS), k)]
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(self.CHUNKS)]
+        self._items: Dict[int, List[K]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._items.values())
+
+    def _chunks(self, value: int) -> Iterable[Tuple[Dict[int, List[int]], int]]:
+        mask = (1 << self.CHUNK_BITS) - 1
+        for c, table in enumerate(self._tables):
+            yield table, (value >> (c * self.CHUNK_BITS)) & mask
+
+    def add(self, value: int, item: K):
+        items = self._items.get(value)
+        if items is not None:
+            items.append(item)
+            return
+        self._items[value] = [item]
+        for table, key in self._chunks(value):
+            table.setdefault(key, []).append(value)
+
+    def search(self, value: int) -> List[Tuple[int, K]]:
+        """Every (distance, item) within the index radius of `value`"""
+        candidates = set()
+        for table, key in self._chunks(value):
+            for mask in self._masks:
+                bucket = table.get(key ^ mask)
+                if bucket:
+                    candidates.update(bucket)
+        found: List[Tuple[int, K]] = []
+        for other in candidates:
+            d = hamming(value, other)
+            if d <= self.radius:
+                found.extend((d, item) for item in self._items[other])
+        return found
+
+
+def cluster(hashes: Dict[K, int], radius: int = DEFAULT_RADIUS) -> List[List[K]]:
+    """Groups of keys whose hashes are within `radius` (transitively), largest first"""
+    by_value: Dict[int, List[K]] = {}
+    for key, value in hashes.items():
+        by_value.setdefault(value, []).append(key)
+
+    index: MultiIndexHash[int] = MultiIndexHash(radius)
+    for value in by_value:
+        index.add(value, value)
+
+    parent: Dict[int, int] = {value: value for value in by_value}
+
+    def find(v: int) -> int:
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    if radius > 0:
+        for value in by_value:
+            for _, other in index.search(value):
+                a, b = find(value), find(other)
+                if a != b:
+                    parent[b] = a
+
+    groups: Dict[int, List[K]] = {}
+    for value, keys in by_value.items():
+        groups.setdefault(find(value), []).extend(keys)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+# ── Incremental index ────────────────────────────────────────────────────────
+
+def _to_signed(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class PhotoHashIndex:
+    """URL -> (ETag, pHash, dHash, size) in a local SQLite file"""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS photo_hash (
+                url       TEXT PRIMARY KEY,
+                etag      TEXT,
+                phash     INTEGER NOT NULL,
+                dhash     INTEGER NOT NULL,
+                width     INTEGER NOT NULL,
+                height    INTEGER NOT NULL,
+                hashed_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, PhotoHash]:
+        urls = list(urls)
+        found: Dict[str, PhotoHash] = {}
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            rows = self.conn.execute(
+                "SELECT url, etag, phash, dhash, width, height, hashed_at FROM photo_hash "
+                f"WHERE url IN ({','.join('?' * len(chunk))})", chunk)
+            for url, etag, p, d, width, height, hashed_at in rows:
+                found[url] = PhotoHash(url, _to_unsigned(p), _to_unsigned(d), width, height,
+                                       etag, hashed_at, cached=True)
+        return found
+
+    def put_many(self, hashes: Iterable[PhotoHash]):
+        self.conn.executemany("""
+            INSERT INTO photo_hash (url, etag, phash, dhash, width, height, hashed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET
+                etag = excluded.etag, phash = excluded.phash, dhash = excluded.dhash,
+                width = excluded.width, height = excluded.height, hashed_at = excluded.hashed_at
+        """, [(h.url, h.etag, _to_signed(h.phash), _to_signed(h.dhash), h.width, h.height, h.hashed_at)
+              for h in hashes])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+# ── Fetch + hash ─────────────────────────────────────────────────────────────
+
+class PhotoHasher:
+    """Download images concurrently (pooled keep-alive session) and hash them off the event loop"""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, per_host: int = DEFAULT_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT, workers: Optional[int] = None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.workers = workers or os.cpu_count() or 4
+        self.errors: Dict[str, str] = {}
+
+    async def hash_many(self, urls: Iterable[str], previous: Optional[Dict[str, PhotoHash]] = None,
+                        progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, PhotoHash]:
+        urls = list(dict.fromkeys(urls))
+        previous = previous or {}
+        results: Dict[str, PhotoHash] = {}
+        if not urls:
+            return results
+
+        loop = asyncio.get_running_loop()
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        done = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+                async def run(url: str):
+                    nonlocal done
+                    result = await self._hash(session, loop, pool, url, previous.get(url))
+                    if result is not None:
+                        results[url] = result
+                    done += 1
+                    if progress:
+                        progress(done, len(urls))
+
+                await asyncio.gather(*(run(url) for url in urls))
+        return results
+
+    async def _hash(self, session: aiohttp.ClientSession, loop: asyncio.AbstractEventLoop,
+                    pool: ThreadPoolExecutor, url: str, previous: Optional[PhotoHash]) -> Optional[PhotoHash]:
+        headers = {}
+        if previous is not None and previous.etag:
+            headers["If-None-Match"] = previous.etag
+        try:
+            async with session.get(check_target(url), headers=headers) as r:
+                if r.status == 304 and previous is not None:
+                    return PhotoHash(url, previous.phash, previous.dhash, previous.width, previous.height,
+                                     previous.etag, time.time())
+                if r.status >= 400:
+                    self.errors[url] = f"HTTP {r.status}"
+                    return None
+                data = await r.read()
+                etag = r.headers.get("ETag")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.errors[url] = str(e)[:80] or type(e).__name__
+            return None
+
+        try:
+            p, d, width, height = await loop.run_in_executor(pool, hash_image_bytes, data)
+        except Exception as e:  # not an image / truncated
+            self.errors[url] = f"decode: {str(e)[:60]}"
+            return None
+        return PhotoHash(url, p, d, width, height, etag, time.time())
+
+
+def hash_urls(urls: Iterable[str], *, index_path: Path = DEFAULT_INDEX_PATH, use_index: bool = True,
+              ttl_seconds: int = DEFAULT_TTL_SECONDS, concurrency: int = DEFAULT_CONCURRENCY,
+              per_host: int = DEFAULT_PER_HOST, timeout: float = DEFAULT_TIMEOUT,
+              progress: Optional[Callable[[int, int], None]] = None,
+              errors: Optional[Dict[str, str]] = None) -> Dict[str, PhotoHash]:
+    """
+    Hash every URL (sync entry point for the scripts). Indexed hashes younger
+    than `ttl_seconds` are reused without a request; older ones are revalidated
+    by ETag. URLs that fail to download/decode are left out (reasons go to `errors`).
+    """
+    urls = list(dict.fromkeys(urls))
+    index = PhotoHashIndex(index_path) if use_index else None
+    try:
+        known = index.get_many(urls) if index else {}
+        now = time.time()
+        results: Dict[str, PhotoHash] = {}
+        pending = []
+        for url in urls:
+            hit = known.get(url)
+            if hit is not None and now - hit.hashed_at < ttl_seconds:
+                results[url] = hit
+            else:
+                pending.append(url)
+
+        hasher = PhotoHasher(concurrency, per_host, timeout)
+        fresh = asyncio.run(hasher.hash_many(pending, previous=known, progress=progress))
+        results.update(fresh)
+        if index:
+            index.put_many(fresh.values())
+        if errors is not None:
+            errors.update(hasher.errors)
+        return results
+    finally:
+        if index:
+            index.close()
+
+
+def print_progress(done: int, total: int):
+    if done % 500 == 0 or done == total:
+        print(f"  Hashed {done}/{total} images...", flush=True)
+
+
+if __name__ == "__main__":
+    # python scripts/photo_hash.py URL [URL ...]   (or URLs on stdin)
+    targets = sys.argv[1:] or [line.strip() for line in sys.stdin if line.strip()]
+    started = time.perf_counter()
+    failed: Dict[str, str] = {}
+    hashed = hash_urls(targets, progress=print_progress, errors=failed)
+    for group in cluster({u: h.phash for u, h in hashed.items()}):
+        if len(group) < 2:
+            break
+        print(f"\n📷 {len(group)} near-identical images:")
+        for u in group:
+            print(f"   {hashed[u].phash:016x} {u[:100]}")
+    for u, reason in failed.items():
+        print(f"❌ {reason:24s} {u[:100]}")
+    print(f"\n{len(hashed)} images hashed in {time.perf_counter() - started:.1f}s")
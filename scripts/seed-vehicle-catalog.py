@@ -9,28 +9,40 @@ Fuentes de datos:
 1. NHTSA vPIC API (oficial del gobierno de EE.UU.)
 2. Kaggle datasets (opcional, requiere descarga manual)
 
+Las respuestas de la API se cachean en disco (vehicle-data/http-cache, TTL de
+7 días por defecto) y las descargas corren en paralelo con rate limit.
+
 Uso:
     python seed-vehicle-catalog.py --download    # Descargar datos
     python seed-vehicle-catalog.py --seed        # Insertar en DB
     python seed-vehicle-catalog.py --all         # Todo
+    python seed-vehicle-catalog.py --decode-vins vins.txt   # Decodificar VINs por lotes
 """
 
 import json
 import os
 import sys
 import time
+import hashlib
 import argparse
+import threading
 import requests
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configuración
 SCRIPT_DIR = Path(__file__).parent
 DATA_DIR = SCRIPT_DIR / "vehicle-data"
 OUTPUT_DIR = DATA_DIR / "processed"
+CACHE_DIR = DATA_DIR / "http-cache"
 
-NHTSA_BASE_URL = "https://vpic.nhtsa.dot.gov/api/vehicles"
+NHTSA_BASE_URL = os.environ.get("NHTSA_BASE_URL", "https://vpic.nhtsa.dot.gov/api/vehicles")
+CACHE_TTL_SECONDS = int(os.environ.get("NHTSA_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
 
 # Crear directorios
 DATA_DIR.mkdir(exist_ok=True)
@@ -38,79 +50,221 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 
 
 class NHTSAClient:
-    """Cliente para NHTSA vPIC API"""
+    """
+    Cliente para NHTSA vPIC API
+    
+    - Cache de respuestas en disco por URL con TTL (DATA_DIR/http-cache): una
+      re-descarga del catálogo solo pide lo vencido o lo nuevo
+    - Descargas concurrentes acotadas (max_workers) con rate limit global
+      (requests_per_second) y reintentos con backoff ante 429/5xx
+    - Decodificación de VINs por lotes (DecodeVINValuesBatch, 50 por request)
+    """
     
-    def __init__(self):
+    VIN_BATCH_SIZE = 50
+    
+    def __init__(self, base_url: str = NHTSA_BASE_URL, cache_dir: Optional[Path] = CACHE_DIR,
+                 ttl_seconds: int = CACHE_TTL_SECONDS, max_workers: int = 4,
+                 requests_per_second: float = 5.0, refresh: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max_workers
+        self.refresh = refresh
+        self.stats = {"hits": 0, "fetched": 0, "errors": 0}
+        
+        self._min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_request_at = 0.0
+        self._rate_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        
         self.session = requests.Session()
         self.session.headers.update({
             "Accept": "application/json",
             "User-Agent": "CarDealer-Seeder/1.0"
         })
+        retry = Retry(total=4, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "POST"}), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    # ========================================
+    # CACHE + RATE LIMIT
+    # ========================================
+    
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _cache_path(self, key: str) -> Optional[Path]:
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+    
+    def _cache_get(self, key: str):
+        path = self._cache_path(key)
+        if self.refresh or not path or not path.exists():
+            return None
+        if time.time() - path.stat().st_mtime > self.ttl_seconds:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["body"]
+        except (OSError, ValueError, KeyError):
+            return None  # entrada corrupta: se vuelve a pedir
+    
+    def _cache_put(self, key: str, body):
+        path = self._cache_path(key)
+        if not path:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "fetched_at": datetime.now().isoformat(), "body": body}, f)
+        os.replace(tmp_path, path)
+    
+    def _wait_turn(self):
+        """Rate limit global entre threads: un request cada _min_interval segundos"""
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self._min_interval
+        if wait > 0:
+            time.sleep(wait)
+    
+    def _get(self, path: str, timeout: int = 15) -> dict:
+        """GET cacheado (clave = URL); lanza requests.RequestException si falla"""
+        url = f"{self.base_url}/{path}"
+        cached = self._cache_get(url)
+        if cached is not None:
+            self._count("hits")
+            return cached
+        
+        self._wait_turn()
+        response = self.session.get(url, timeout=timeout)
+        response.raise_for_status()
+        body = response.json()
+        self._count("fetched")
+        self._cache_put(url, body)
+        return body
+    
+    def _results(self, path: str, label: str) -> list:
+        try:
+            return self._get(path).get("Results", [])
+        except (requests.RequestException, ValueError) as e:
+            self._count("errors")
+            print(f"   ⚠️ Error obteniendo {label}: {e}")
+            return []
+    
+    def map_concurrent(self, fn, items: list) -> list:
+        """fn(item) para cada item con max_workers threads; resultados en el orden de items"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fn, items))
+    
+    # ========================================
+    # ENDPOINTS
+    # ========================================
     
     def get_all_makes(self) -> list:
         """Obtiene todas las marcas de vehículos"""
         print("📥 Descargando lista de marcas...")
-        url = f"{NHTSA_BASE_URL}/GetAllMakes?format=json"
-        response = self.session.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        makes = data.get("Results", [])
+        makes = self._get("GetAllMakes?format=json", timeout=30).get("Results", [])
         print(f"   ✅ {len(makes)} marcas encontradas")
         return makes
     
     def get_makes_for_vehicle_type(self, vehicle_type: str = "car") -> list:
         """Obtiene marcas por tipo de vehículo"""
         print(f"📥 Descargando marcas para tipo: {vehicle_type}...")
-        url = f"{NHTSA_BASE_URL}/GetMakesForVehicleType/{vehicle_type}?format=json"
-        response = self.session.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        makes = data.get("Results", [])
+        makes = self._get(f"GetMakesForVehicleType/{quote(vehicle_type)}?format=json", timeout=30).get("Results", [])
         print(f"   ✅ {len(makes)} marcas encontradas")
         return makes
     
     def get_models_for_make(self, make_name: str) -> list:
         """Obtiene modelos para una marca"""
-        url = f"{NHTSA_BASE_URL}/GetModelsForMake/{make_name}?format=json"
-        try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("Results", [])
-        except Exception as e:
-            print(f"   ⚠️ Error obteniendo modelos para {make_name}: {e}")
-            return []
+        return self._results(f"GetModelsForMake/{quote(make_name)}?format=json", f"modelos para {make_name}")
     
     def get_models_for_make_year(self, make_name: str, year: int) -> list:
         """Obtiene modelos para una marca y año específico"""
-        url = f"{NHTSA_BASE_URL}/GetModelsForMakeYear/make/{make_name}/modelyear/{year}?format=json"
-        try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("Results", [])
-        except Exception as e:
-            print(f"   ⚠️ Error obteniendo modelos para {make_name} {year}: {e}")
-            return []
+        return self._results(
+            f"GetModelsForMakeYear/make/{quote(make_name)}/modelyear/{year}?format=json",
+            f"modelos para {make_name} {year}"
+        )
+    
+    def get_models_for_makes(self, make_names: list) -> dict:
+        """{marca: modelos} descargando en paralelo"""
+        return dict(zip(make_names, self.map_concurrent(self.get_models_for_make, make_names)))
+    
+    def get_models_for_makes_years(self, make_names: list, years: list) -> dict:
+        """{(marca, año): modelos} descargando en paralelo"""
+        pairs = [(make_name, year) for year in years for make_name in make_names]
+        results = self.map_concurrent(lambda pair: self.get_models_for_make_year(*pair), pairs)
+        return dict(zip(pairs, results))
     
     def decode_vin(self, vin: str) -> dict:
         """Decodifica un VIN para obtener especificaciones completas"""
-        url = f"{NHTSA_BASE_URL}/DecodeVin/{vin}?format=json"
         try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            # Convertir lista de resultados a diccionario
-            results = {}
-            for item in data.get("Results", []):
-                variable = item.get("Variable", "")
-                value = item.get("Value", "")
-                if value and value.strip():
-                    results[variable] = value
-            return results
-        except Exception as e:
+            data = self._get(f"DecodeVin/{quote(vin)}?format=json")
+        except (requests.RequestException, ValueError) as e:
+            self._count("errors")
             print(f"   ⚠️ Error decodificando VIN {vin}: {e}")
             return {}
+        # Convertir lista de resultados a diccionario
+        results = {}
+        for item in data.get("Results", []):
+            variable = item.get("Variable", "")
+            value = item.get("Value", "")
+            if value and value.strip():
+                results[variable] = value
+        return results
+    
+    def decode_vins(self, vins: list) -> dict:
+        """
+        {VIN: specs} con DecodeVINValuesBatch (lotes de 50, en paralelo). Cada VIN
+        se cachea por separado, así que lotes distintos reutilizan lo ya decodificado.
+        """
+        vins = list(dict.fromkeys(vin.strip().upper() for vin in vins if vin and vin.strip()))
+        decoded, missing = {}, []
+        for vin in vins:
+            cached = self._cache_get(self._vin_key(vin))
+            if cached is not None:
+                self._count("hits")
+                decoded[vin] = cached
+            else:
+                missing.append(vin)
+        
+        batches = [missing[i:i + self.VIN_BATCH_SIZE] for i in range(0, len(missing), self.VIN_BATCH_SIZE)]
+        for batch_result in self.map_concurrent(self._decode_vin_batch, batches):
+            decoded.update(batch_result)
+        return {vin: decoded[vin] for vin in vins if vin in decoded}
+    
+    def _vin_key(self, vin: str) -> str:
+        return f"{self.base_url}/DecodeVINValuesBatch#{vin}"
+    
+    def _decode_vin_batch(self, vins: list) -> dict:
+        self._wait_turn()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/DecodeVINValuesBatch/",
+                data={"format": "json", "data": ";".join(vins)},
+                timeout=60
+            )
+            response.raise_for_status()
+            rows = response.json().get("Results", [])
+        except (requests.RequestException, ValueError) as e:
+            self._count("errors")
+            print(f"   ⚠️ Error decodificando lote de {len(vins)} VINs: {e}")
+            return {}
+        
+        self._count("fetched")
+        results = {}
+        for row in rows:
+            vin = (row.get("VIN") or "").strip().upper()
+            if vin:
+                specs = {key: value for key, value in row.items() if value not in (None, "")}
+                results[vin] = specs
+                self._cache_put(self._vin_key(vin), specs)
+        return results
 
 
 # Marcas populares para priorizar (más comunes en EE.UU./LatAm)
@@ -127,15 +281,18 @@ PRIORITY_MAKES = [
 YEARS_RANGE = range(1995, 2031)
 
 
-def download_vehicle_catalog(priority_only: bool = True, years: Optional[list] = None):
+def download_vehicle_catalog(priority_only: bool = True, years: Optional[list] = None,
+                             client: Optional[NHTSAClient] = None):
     """
     Descarga el catálogo completo de vehículos de NHTSA.
     
     Args:
         priority_only: Solo descargar marcas prioritarias (más rápido)
         years: Lista de años específicos (default: últimos 10)
+        client: Cliente configurado (cache, concurrencia); por defecto uno nuevo
     """
-    client = NHTSAClient()
+    client = client or NHTSAClient()
+    start = time.perf_counter()
     
     if years is None:
         current_year = datetime.now().year
@@ -159,15 +316,14 @@ def download_vehicle_catalog(priority_only: bool = True, years: Optional[list] =
     
     catalog["makes"] = [m.get("Make_Name", m) if isinstance(m, dict) else m for m in makes_to_process]
     
-    # 2. Obtener modelos por marca
+    # 2. Obtener modelos por marca (en paralelo)
     print(f"\n📥 Descargando modelos para {len(makes_to_process)} marcas...")
+    models_by_make = client.get_models_for_makes(catalog["makes"])
     
-    for i, make_info in enumerate(makes_to_process):
-        make_name = make_info.get("Make_Name") if isinstance(make_info, dict) else make_info
+    for i, make_name in enumerate(catalog["makes"]):
+        models = models_by_make[make_name]
         print(f"   [{i+1}/{len(makes_to_process)}] {make_name}...", end=" ")
         
-        models = client.get_models_for_make(make_name)
-        
         if models:
             catalog["models_by_make"][make_name] = [
                 {
@@ -182,24 +338,20 @@ def download_vehicle_catalog(priority_only: bool = True, years: Optional[list] =
         else:
             catalog["models_by_make"][make_name] = []
             print("⚠️ sin modelos")
-        
-        # Rate limiting
-        time.sleep(0.2)
     
-    # 3. Obtener modelos por año (para marcas prioritarias)
+    # 3. Obtener modelos por año (para marcas prioritarias, en paralelo)
     print(f"\n📅 Descargando modelos por año ({years[0]}-{years[-1]})...")
     
+    top_makes = PRIORITY_MAKES[:20]  # Top 20 marcas por año
+    models_by_make_year = client.get_models_for_makes_years(top_makes, years)
     for year in years:
-        print(f"\n   Año {year}:")
         catalog["models_by_year"][str(year)] = {}
-        
-        for make_name in PRIORITY_MAKES[:20]:  # Top 20 marcas por año
-            models = client.get_models_for_make_year(make_name, year)
+        for make_name in top_makes:
+            models = models_by_make_year[(make_name, year)]
             if models:
                 catalog["models_by_year"][str(year)][make_name] = [
                     m.get("Model_Name") for m in models
                 ]
-            time.sleep(0.1)
     
     # Guardar catálogo
     output_file = OUTPUT_DIR / "vehicle_catalog_nhtsa.json"
@@ -214,10 +366,29 @@ def download_vehicle_catalog(priority_only: bool = True, years: Optional[list] =
     print(f"   - Marcas: {len(catalog['makes'])}")
     print(f"   - Modelos totales: {total_models}")
     print(f"   - Años con datos: {len(catalog['models_by_year'])}")
+    print(f"   - Requests: {client.stats['fetched']} a la API, {client.stats['hits']} desde cache, "
+          f"{client.stats['errors']} errores ({time.perf_counter() - start:.1f}s)")
     
     return catalog
 
 
+def decode_vins_file(vins_file: Path, client: NHTSAClient) -> Path:
+    """Decodifica los VINs de un archivo (uno por línea) y guarda {VIN: specs} en JSON"""
+    with open(vins_file, "r", encoding="utf-8") as f:
+        vins = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    
+    print(f"\n🔎 Decodificando {len(vins)} VINs...")
+    decoded = client.decode_vins(vins)
+    
+    output_file = OUTPUT_DIR / "vin_decodes.json"
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(decoded, f, indent=2, ensure_ascii=False)
+    
+    print(f"   ✅ {len(decoded)}/{len(set(v.upper() for v in vins))} VINs decodificados -> {output_file}")
+    print(f"   - Requests: {client.stats['fetched']} lotes a la API, {client.stats['hits']} desde cache")
+    return output_file
+
+
 def generate_sql_seed(catalog_file: Path = None):
     """
     Genera scripts SQL para insertar el catálogo en la base de datos.
@@ -424,6 +595,10 @@ def main():
     parser.add_argument("--types", action="store_true", help="Generar tipos TypeScript")
     parser.add_argument("--all", action="store_true", help="Ejecutar todo")
     parser.add_argument("--full", action="store_true", help="Descargar TODAS las marcas (lento)")
+    parser.add_argument("--decode-vins", type=Path, metavar="FILE", help="Decodificar VINs (uno por línea)")
+    parser.add_argument("--refresh", action="store_true", help="Ignorar el cache HTTP y volver a pedir todo")
+    parser.add_argument("--workers", type=int, default=4, help="Requests concurrentes a NHTSA (default: 4)")
+    parser.add_argument("--rps", type=float, default=5.0, help="Máximo de requests por segundo (default: 5)")
     
     args = parser.parse_args()
     
@@ -432,7 +607,7 @@ def main():
         args.sql = True
         args.types = True
     
-    if not any([args.download, args.sql, args.types]):
+    if not any([args.download, args.sql, args.types, args.decode_vins]):
         parser.print_help()
         print("\n💡 Ejemplo rápido:")
         print("   python seed-vehicle-catalog.py --all")
@@ -441,8 +616,13 @@ def main():
     print("🚗 Vehicle Catalog Seeder")
     print("=" * 50)
     
+    client = NHTSAClient(max_workers=args.workers, requests_per_second=args.rps, refresh=args.refresh)
+    
     if args.download:
-        download_vehicle_catalog(priority_only=not args.full)
+        download_vehicle_catalog(priority_only=not args.full, client=client)
+    
+    if args.decode_vins:
+        decode_vins_file(args.decode_vins, client)
     
     if args.sql:
         generate_sql_seed()
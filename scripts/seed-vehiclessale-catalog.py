@@ -32,6 +32,9 @@ OUTPUT_DIR = DATA_DIR / "vehiclessale"
 
 NHTSA_BASE_URL = "https://vpic.nhtsa.dot.gov/api/vehicles"
 
+# Namespace de los UUIDv5 del catálogo: mismas marcas/modelos/trims = mismos Ids
+CATALOG_NAMESPACE = uuid.UUID("3d8f6c2a-9b1e-5f47-8a6d-2c4e7b9f1a30")
+
 # Crear directorios
 DATA_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
@@ -240,14 +243,38 @@ MAKES_INFO = {
 }
 
 
-def generate_uuid():
-    return str(uuid.uuid4())
+def catalog_id(kind: str, *slugs) -> str:
+    """Id determinístico (UUIDv5) a partir de los slugs: make / make+model / make+model+año+trim"""
+    return str(uuid.uuid5(CATALOG_NAMESPACE, f"{kind}:" + "/".join(str(slug) for slug in slugs)))
 
 
 def slugify(text: str) -> str:
     return text.lower().replace(" ", "-").replace("'", "").replace("/", "-")
 
 
+def map_trim_enums(trim: Dict) -> tuple:
+    """(FuelType, Transmission, DriveType) con los valores de los enums de VehiclesSaleService"""
+    # Mapear FuelType al enum
+    fuel_type_map = {
+        "Gasoline": "Gasoline",
+        "Hybrid": "Hybrid",
+        "Electric": "Electric",
+        "PlugInHybrid": "PlugInHybrid",
+        "Diesel": "Diesel"
+    }
+    fuel = fuel_type_map.get(trim.get("fuel", "Gasoline"), "Gasoline")
+    
+    # Mapear Transmission
+    trans = trim.get("trans", "Automatic")
+    if trans not in ("CVT", "Manual"):
+        trans = "Automatic"
+    
+    # Mapear DriveType
+    drive_map = {"FWD": "FWD", "AWD": "AWD", "RWD": "RWD", "4WD": "FourWD"}
+    drive = drive_map.get(trim.get("drive", "FWD"), "FWD")
+    return fuel, trans, drive
+
+
 def generate_sql():
     """Genera SQL para insertar el catálogo en VehiclesSaleService."""
     
@@ -272,7 +299,7 @@ def generate_sql():
     
     # Generar marcas
     for make_name, make_info in MAKES_INFO.items():
-        make_id = generate_uuid()
+        make_id = catalog_id("make", slugify(make_name))
         make_ids[make_name] = make_id
         
         sql_lines.append(
@@ -289,7 +316,7 @@ def generate_sql():
             continue
             
         for model_name in models.keys():
-            model_id = generate_uuid()
+            model_id = catalog_id("model", slugify(make_name), slugify(model_name))
             model_ids[(make_name, model_name)] = model_id
             
             years = list(models[model_name].keys())
@@ -314,31 +341,10 @@ def generate_sql():
             
             for year, trims in years.items():
                 for trim in trims:
-                    trim_id = generate_uuid()
+                    trim_id = catalog_id("trim", slugify(make_name), slugify(model_name), year, slugify(trim['name']))
                     trim_count += 1
                     
-                    # Mapear FuelType al enum
-                    fuel_type_map = {
-                        "Gasoline": "Gasoline",
-                        "Hybrid": "Hybrid",
-                        "Electric": "Electric",
-                        "PlugInHybrid": "PlugInHybrid",
-                        "Diesel": "Diesel"
-                    }
-                    fuel = fuel_type_map.get(trim.get("fuel", "Gasoline"), "Gasoline")
-                    
-                    # Mapear Transmission
-                    trans = trim.get("trans", "Automatic")
-                    if trans == "CVT":
-                        trans = "CVT"
-                    elif trans == "Manual":
-                        trans = "Manual"
-                    else:
-                        trans = "Automatic"
-                    
-                    # Mapear DriveType
-                    drive_map = {"FWD": "FWD", "AWD": "AWD", "RWD": "RWD", "4WD": "FourWD"}
-                    drive = drive_map.get(trim.get("drive", "FWD"), "FWD")
+                    fuel, trans, drive = map_trim_enums(trim)
                     
                     sql_lines.append(
                         f"INSERT INTO \"VehicleTrims\" ("
@@ -454,6 +460,7 @@ def main():
     print("\n✅ Completado!")
     print("\n📋 Próximo paso: Ejecutar SQL en VehiclesSaleService DB:")
     print("   docker exec -i vehiclessaleservice-db psql -U postgres -d vehiclessaleservice < scripts/vehicle-data/vehiclessale/vehicle_catalog_vehiclessale.sql")
+    print("   (o cargarlo directo con COPY + upsert: python scripts/load_vehicle_catalog.py)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+"""
+Tests del pipeline de download_and_upload_images.py sin AWS ni Picsum
+
+- S3 es un LocalS3Client sobre tmp_path; Picsum es un adapter HTTP falso
+- Re-ejecutar el pipeline omite los uploads (mismo SHA-256) y conserva los Ids
+- Con SCRIPTS_TEST_DATABASE_URL=postgresql://... se prueba además el upsert
+  real de write_batch (cada test usa un schema propio)
+
+Uso:
+    python -m pytest scripts/tests -q
+"""
+
+import io
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("boto3")
+psycopg2 = pytest.importorskip("psycopg2")
+requests = pytest.importorskip("requests")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import download_and_upload_images as pipeline_module  # noqa: E402
+from download_and_upload_images import (  # noqa: E402
+    IMAGES_PER_VEHICLE, ImagePipeline, LocalS3Client, S3_BUCKET_NAME, image_rows, write_batch,
+)
+
+DATABASE_URL = os.getenv("SCRIPTS_TEST_DATABASE_URL")
+postgres = pytest.mark.skipif(not DATABASE_URL, reason="SCRIPTS_TEST_DATABASE_URL no configurada")
+
+VEHICLES = [(uuid.UUID(int=i + 1), uuid.UUID(int=100), f"Toyota Corolla {i}") for i in range(3)]
+
+
+class FakePicsumAdapter(requests.adapters.BaseAdapter):
+    """Responde cada URL con bytes derivados de la URL (la seed de Picsum es determinística)"""
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+
+    def send(self, request, **kwargs):
+        self.urls.append(request.url)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response.raw = io.BytesIO(b"\xff\xd8" + request.url.encode("utf-8") * 64)
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def run_pipeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "LOCAL_IMAGES_PATH", tmp_path / "vehicle_images")
+    s3 = LocalS3Client(tmp_path / "s3")
+    adapter = FakePicsumAdapter()
+
+    def run(conn=None, writer=write_batch, **kwargs):
+        pipeline = ImagePipeline(s3, conn, fetch_workers=2, upload_workers=2, db_batch=2,
+                                 writer=writer, **kwargs)
+        pipeline.session.mount("https://", adapter)
+        return pipeline.run(VEHICLES)
+
+    run.adapter = adapter
+    run.s3_root = tmp_path / "s3" / S3_BUCKET_NAME
+    return run
+
+
+def recording_writer(written):
+    def writer(conn, vehicles, stats):
+        written.extend(image_rows(vehicles))
+        stats.add(vehicles_written=len(vehicles), images_written=sum(len(jobs) for jobs in vehicles))
+    return writer
+
+
+def test_rerun_skips_uploads_and_keeps_ids(run_pipeline):
+    first, second = [], []
+    stats = run_pipeline(writer=recording_writer(first))
+    assert stats.uploaded == len(VEHICLES) * IMAGES_PER_VEHICLE
+    assert len(list(run_pipeline.s3_root.rglob("*.jpg"))) == len(VEHICLES) * IMAGES_PER_VEHICLE
+
+    stats = run_pipeline(writer=recording_writer(second), redownload=True)
+    assert stats.uploaded == 0
+    assert stats.skipped_uploads == len(VEHICLES) * IMAGES_PER_VEHICLE
+    assert len(run_pipeline.adapter.urls) == 2 * len(VEHICLES) * IMAGES_PER_VEHICLE
+
+    assert sorted(first) == sorted(second)
+    assert len({row[0] for row in first}) == len(first)
+
+
+def test_image_ids_depend_on_vehicle_and_position(run_pipeline):
+    rows = []
+    run_pipeline(writer=recording_writer(rows))
+
+    for row in rows:
+        image_id, vehicle_id, sort_order = row[0], row[2], row[7]
+        assert image_id == str(uuid.uuid5(uuid.UUID(vehicle_id), str(sort_order)))
+
+
+# ----------------------------------------------------------------------
+# write_batch contra Postgres
+# ----------------------------------------------------------------------
+@pytest.fixture
+def conn():
+    schema = f"t_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(DATABASE_URL)
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE SCHEMA {schema}")
+    conn = psycopg2.connect(DATABASE_URL, options=f"-csearch_path={schema}")
+    with conn.cursor() as cur:
+        cur.execute('''
+            CREATE TABLE vehicle_images (
+                "Id" uuid PRIMARY KEY, "DealerId" uuid NOT NULL, "VehicleId" uuid NOT NULL,
+                "Url" text NOT NULL, "ThumbnailUrl" text, "Caption" text, "ImageType" int NOT NULL,
+                "SortOrder" int NOT NULL, "IsPrimary" boolean NOT NULL, "FileSize" bigint,
+                "MimeType" text, "Width" int, "Height" int, "CreatedAt" timestamptz NOT NULL
+            )
+        ''')
+    conn.commit()
+    yield conn
+    conn.close()
+    admin.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+    admin.close()
+
+
+def image_ids(conn):
+    with conn.cursor() as cur:
+        cur.execute('SELECT "VehicleId", "SortOrder", "Id", "CreatedAt" FROM vehicle_images ORDER BY 1, 2')
+        return cur.fetchall()
+
+
+@postgres
+def test_write_batch_upserts_the_same_rows(run_pipeline, conn):
+    run_pipeline(conn)
+    first = image_ids(conn)
+    assert len(first) == len(VEHICLES) * IMAGES_PER_VEHICLE
+
+    stats = run_pipeline(conn)
+    assert stats.uploaded == 0
+    assert image_ids(conn) == first
+
+
+@postgres
+def test_write_batch_replaces_rows_from_older_runs(run_pipeline, conn):
+    legacy = str(uuid.uuid4())
+    with conn.cursor() as cur:
+        cur.execute('''
+            INSERT INTO vehicle_images ("Id", "DealerId", "VehicleId", "Url", "ImageType", "SortOrder",
+                                        "IsPrimary", "CreatedAt")
+            VALUES (%s, %s, %s, 'https://old/image_1.jpg', 0, 0, true, NOW())
+        ''', (legacy, str(VEHICLES[0][1]), str(VEHICLES[0][0])))
+    conn.commit()
+
+    run_pipeline(conn)
+    rows = image_ids(conn)
+    assert len(rows) == len(VEHICLES) * IMAGES_PER_VEHICLE
+    assert legacy not in {str(row[2]) for row in rows}
@@ -0,0 +1,267 @@
+"""
+Tests de NHTSAClient (scripts/seed-vehicle-catalog.py) contra un servidor vPIC local
+
+- Cache en disco: hit/miss, vencimiento por TTL y --refresh
+- Rate limit global entre threads y reintento ante 429
+- DecodeVINValuesBatch: lotes de 50 que reutilizan los VINs ya cacheados
+
+Uso:
+    python -m pytest scripts/tests -q
+"""
+
+import functools
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "seed-vehicle-catalog.py"
+
+
+def load_seeder():
+    """seed-vehicle-catalog.py (nombre con guiones: se carga por ruta)"""
+    spec = importlib.util.spec_from_file_location("seed_vehicle_catalog", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+seeder = load_seeder()
+
+
+class StubVPIC:
+    """Servidor vPIC mínimo; registra cada request y puede responder errores antes de los 200"""
+
+    def __init__(self):
+        self.requests = []
+        self.revision = 1
+        self.fail_with = []  # status a devolver en los próximos requests (p. ej. [429])
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.handle(self, "GET", None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                stub.handle(self, "POST", parse_qs(self.rfile.read(length).decode("utf-8")))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/vehicles"
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05},
+                                       daemon=True)
+
+    def handle(self, handler, method, form):
+        path = unquote(urlparse(handler.path).path).replace("/api/vehicles/", "", 1)
+        with self._lock:
+            self.requests.append({"method": method, "path": path, "at": time.monotonic(), "form": form})
+            status = self.fail_with.pop(0) if self.fail_with else 200
+
+        if status != 200:
+            body = {"Message": f"HTTP {status}"}
+        elif path.startswith("DecodeVINValuesBatch"):
+            vins = form["data"][0].split(";")
+            body = {"Results": [{"VIN": vin, "Make": "TOYOTA", "ModelYear": "2020", "Trim": ""} for vin in vins]}
+        elif path.startswith("GetModelsForMake"):
+            make = path.split("/")[-1] if "modelyear" not in path else path.split("/")[2]
+            body = {"Results": [{"Make_Name": make, "Model_Name": f"{make} r{self.revision}"}]}
+        else:
+            status, body = 404, {"Message": "Not Found"}
+
+        payload = json.dumps(body).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            handler.send_header("Retry-After", "0")
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def paths(self, method="GET"):
+        return [r["path"] for r in self.requests if r["method"] == method]
+
+
+@pytest.fixture
+def stub():
+    stub = StubVPIC()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+@pytest.fixture
+def make_client(stub, tmp_path):
+    def make(**kwargs):
+        kwargs.setdefault("requests_per_second", 0)
+        return seeder.NHTSAClient(base_url=stub.url, cache_dir=tmp_path / "http-cache", **kwargs)
+    return make
+
+
+def age_cache(cache_dir: Path, seconds: float):
+    for path in cache_dir.rglob("*.json"):
+        stat = path.stat()
+        os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+def test_second_request_is_served_from_cache(stub, make_client):
+    client = make_client()
+    first = client.get_models_for_make("Toyota")
+    second = make_client().get_models_for_make("Toyota")  # cliente nuevo: el cache es el de disco
+
+    assert first == second == [{"Make_Name": "Toyota", "Model_Name": "Toyota r1"}]
+    assert stub.paths() == ["GetModelsForMake/Toyota"]
+    assert client.stats == {"hits": 0, "fetched": 1, "errors": 0}
+
+
+def test_cache_is_keyed_by_url(stub, make_client):
+    client = make_client()
+    client.get_models_for_make("Toyota")
+    client.get_models_for_make("Honda")
+    client.get_models_for_make_year("Toyota", 2020)
+
+    assert len(stub.requests) == 3
+    assert client.stats["hits"] == 0
+
+
+def test_expired_entries_are_fetched_again(stub, make_client, tmp_path):
+    make_client(ttl_seconds=60).get_models_for_make("Toyota")
+    stub.revision = 2
+
+    age_cache(tmp_path / "http-cache", 30)
+    assert make_client(ttl_seconds=60).get_models_for_make("Toyota")[0]["Model_Name"] == "Toyota r1"
+
+    age_cache(tmp_path / "http-cache", 60)
+    client = make_client(ttl_seconds=60)
+    assert client.get_models_for_make("Toyota")[0]["Model_Name"] == "Toyota r2"
+    assert client.stats["fetched"] == 1
+    assert len(stub.requests) == 2
+
+
+def test_refresh_ignores_cache_and_rewrites_it(stub, make_client):
+    make_client().get_models_for_make("Toyota")
+    stub.revision = 2
+
+    refreshed = make_client(refresh=True)
+    assert refreshed.get_models_for_make("Toyota")[0]["Model_Name"] == "Toyota r2"
+    assert refreshed.stats["hits"] == 0
+
+    # Lo re-descargado queda en cache para la próxima corrida normal
+    assert make_client().get_models_for_make("Toyota")[0]["Model_Name"] == "Toyota r2"
+    assert len(stub.requests) == 2
+
+
+def test_refresh_flag_reaches_the_client(stub, tmp_path, monkeypatch):
+    vins_file = tmp_path / "vins.txt"
+    vins_file.write_text("1HGCM82633A004352\n", encoding="utf-8")
+    monkeypatch.setattr(seeder, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(seeder, "NHTSAClient", functools.partial(
+        seeder.NHTSAClient, base_url=stub.url, cache_dir=tmp_path / "http-cache"))
+
+    for argv in (["--decode-vins", str(vins_file)], ["--decode-vins", str(vins_file)],
+                 ["--decode-vins", str(vins_file), "--refresh"]):
+        monkeypatch.setattr(sys, "argv", ["seed-vehicle-catalog.py", *argv])
+        seeder.main()
+
+    assert len(stub.paths("POST")) == 2
+    assert json.loads((tmp_path / "vin_decodes.json").read_text())["1HGCM82633A004352"]["Make"] == "TOYOTA"
+
+
+def test_failed_requests_are_not_cached(stub, make_client):
+    stub.fail_with = [404]
+    client = make_client()
+    assert client.get_models_for_make("Toyota") == []
+    assert client.stats["errors"] == 1
+
+    assert make_client().get_models_for_make("Toyota") != []
+    assert len(stub.requests) == 2
+
+
+# ----------------------------------------------------------------------
+# Rate limit
+# ----------------------------------------------------------------------
+def test_concurrent_requests_are_paced_globally(stub, make_client):
+    makes = [f"Make{i}" for i in range(6)]
+    client = make_client(max_workers=4, requests_per_second=20)
+
+    start = time.monotonic()
+    models = client.get_models_for_makes(makes)
+    elapsed = time.monotonic() - start
+
+    assert list(models) == makes
+    stamps = sorted(r["at"] for r in stub.requests)
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    assert all(gap >= 0.04 for gap in gaps), gaps  # 1 request cada 0.05s aunque haya 4 threads
+    assert elapsed >= 0.24
+
+
+def test_cache_hits_do_not_wait_for_the_rate_limit(stub, make_client):
+    makes = [f"Make{i}" for i in range(6)]
+    make_client(max_workers=4, requests_per_second=20).get_models_for_makes(makes)
+
+    start = time.monotonic()
+    make_client(max_workers=4, requests_per_second=1).get_models_for_makes(makes)
+    assert time.monotonic() - start < 0.5
+    assert len(stub.requests) == len(makes)
+
+
+def test_429_is_retried(stub, make_client):
+    stub.fail_with = [429]
+    client = make_client()
+
+    assert client.get_models_for_make("Toyota")[0]["Model_Name"] == "Toyota r1"
+    assert stub.paths() == ["GetModelsForMake/Toyota"] * 2
+    assert client.stats["errors"] == 0
+
+
+# ----------------------------------------------------------------------
+# VINs por lotes
+# ----------------------------------------------------------------------
+def vin(i: int) -> str:
+    return f"1HGCM8263{i:08d}"
+
+
+def test_vins_are_decoded_in_batches_of_50(stub, make_client):
+    vins = [vin(i) for i in range(60)]
+    decoded = make_client(max_workers=2).decode_vins(vins + [v.lower() for v in vins[:5]] + ["", "  "])
+
+    assert list(decoded) == vins
+    batches = sorted((r["form"]["data"][0].split(";") for r in stub.requests), key=len, reverse=True)
+    assert [len(batch) for batch in batches] == [50, 10]
+    assert sorted(batches[0] + batches[1]) == vins
+    assert decoded[vin(0)] == {"VIN": vin(0), "Make": "TOYOTA", "ModelYear": "2020"}
+
+
+def test_vin_batches_reuse_cached_vins(stub, make_client):
+    make_client().decode_vins([vin(i) for i in range(60)])
+    stub.requests.clear()
+
+    client = make_client()
+    decoded = client.decode_vins([vin(i) for i in range(55, 65)])
+
+    assert list(decoded) == [vin(i) for i in range(55, 65)]
+    assert [r["form"]["data"][0].split(";") for r in stub.requests] == [[vin(i) for i in range(60, 65)]]
+    assert client.stats == {"hits": 5, "fetched": 1, "errors": 0}
+
+
+def test_fully_cached_vins_make_no_requests(stub, make_client):
+    vins = [vin(i) for i in range(10)]
+    make_client().decode_vins(vins)
+    stub.requests.clear()
+
+    assert list(make_client().decode_vins(vins)) == vins
+    assert stub.requests == []
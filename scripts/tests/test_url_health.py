@@ -0,0 +1,146 @@
+"""
+Tests for url_health.check_urls against a local image server
+
+- TTL applies in incremental mode too: an image that was OK and later breaks
+  is reported broken once its cache entry is stale
+- Incremental revalidation sends If-None-Match / If-Modified-Since; 304 = OK
+- A full run re-checks stale entries without validators
+
+Usage:
+    python -m pytest scripts/tests -q
+"""
+
+import sqlite3
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from url_health import check_urls  # noqa: E402
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Mon, 05 Oct 2026 10:00:00 GMT"
+
+
+class StubImages:
+    """Serves /car.jpg until `broken` is set; records the request headers"""
+
+    def __init__(self):
+        self.broken = False
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                stub.requests.append(dict(self.headers))
+                if stub.broken:
+                    self.send_response(404)
+                elif (self.headers.get("If-None-Match") == ETAG
+                      or self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+                    self.send_response(304)
+                else:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "image/jpeg")
+                    self.send_header("ETag", ETAG)
+                    self.send_header("Last-Modified", LAST_MODIFIED)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/car.jpg"
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05},
+                                       daemon=True)
+
+
+@pytest.fixture
+def stub():
+    stub = StubImages()
+    stub.thread.start()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+@pytest.fixture
+def check(stub, tmp_path):
+    cache_path = tmp_path / "url_health.sqlite3"
+
+    def run(**kwargs):
+        return check_urls([stub.url], cache_path=cache_path, ttl_seconds=3600, **kwargs)[stub.url]
+
+    def age(seconds: float):
+        with sqlite3.connect(str(cache_path)) as conn:
+            conn.execute("UPDATE url_health SET checked_at = checked_at - ?", (seconds,))
+
+    run.age = age
+    return run
+
+
+def test_incremental_reuses_fresh_ok_results(stub, check):
+    assert check(incremental=True).ok
+    stub.broken = True
+
+    result = check(incremental=True)
+    assert result.ok and result.cached
+    assert len(stub.requests) == 1
+
+
+def test_incremental_detects_images_that_broke_after_the_ttl(stub, check):
+    assert check(incremental=True).ok
+    stub.broken = True
+    check.age(7200)
+
+    result = check(incremental=True)
+    assert not result.ok
+    assert result.status == 404
+    assert not check(incremental=True).ok  # broken results are never reused
+
+
+def test_incremental_revalidates_stale_entries_conditionally(stub, check):
+    check(incremental=True)
+    check.age(7200)
+
+    result = check(incremental=True)
+    assert result.ok and result.reason == "HEAD 304 (unchanged)"
+    assert result.content_type == "image/jpeg"
+    assert stub.requests[-1]["If-None-Match"] == ETAG
+    assert stub.requests[-1]["If-Modified-Since"] == LAST_MODIFIED
+
+    # The 304 refreshes checked_at: the next run is served from cache again
+    assert check(incremental=True).cached
+    assert len(stub.requests) == 2
+
+
+def test_full_run_rechecks_stale_entries_without_validators(stub, check):
+    check()
+    check.age(7200)
+
+    result = check()
+    assert result.ok and result.reason == "HEAD 200"
+    assert "If-None-Match" not in stub.requests[-1]
+    assert "If-Modified-Since" not in stub.requests[-1]
+
+
+def test_caches_without_last_modified_column_are_upgraded(stub, check, tmp_path):
+    with sqlite3.connect(str(tmp_path / "url_health.sqlite3")) as conn:
+        conn.execute("""
+            CREATE TABLE url_health (
+                url TEXT PRIMARY KEY, ok INTEGER NOT NULL, status INTEGER NOT NULL,
+                reason TEXT NOT NULL, content_type TEXT NOT NULL DEFAULT '', etag TEXT,
+                checked_at REAL NOT NULL
+            )
+        """)
+        conn.execute("INSERT INTO url_health VALUES (?, 1, 200, 'HEAD 200', 'image/jpeg', ?, 0)",
+                     (stub.url, ETAG))
+
+    result = check(incremental=True)
+    assert result.ok and result.reason == "HEAD 304 (unchanged)"
+    assert stub.requests[-1]["If-None-Match"] == ETAG
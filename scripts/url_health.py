@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Shared async URL-health checker for the image audit scripts.
+
+Used by audit_images.py, migrate_permanent_urls.py, fix_broken_images.py and
+photo-audit.py instead of each one doing blocking urllib HEAD/GET calls:
+
+- One aiohttp session: keep-alive connections pooled per host, with a global
+  cap and a per-host cap on concurrent connections (S3 / Unsplash / CDN)
+- HEAD first; ranged GET fallback when HEAD is refused (405/501, S3 403) or fails
+- Expired S3 pre-signed params (X-Amz-*) are stripped before checking
+- Results cached in SQLite by URL with TTL; nothing is reused past the TTL,
+  so an image that breaks after a good check is caught on the next stale run
+- Incremental mode: stale URLs that were OK are revalidated with a conditional
+  request (If-None-Match / If-Modified-Since; 304 = still OK, no body
+  transferred) instead of a full check; new and broken URLs are always checked
+
+Usage:
+    from url_health import check_urls
+    results = check_urls(urls, incremental=True)   # {url: CheckResult}
+    broken = [u for u, r in results.items() if not r.ok]
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import aiohttp
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 Chrome/122 Safari/537.36",
+    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+}
+
+DEFAULT_CACHE_PATH = Path(os.getenv(
+    "URL_HEALTH_CACHE", Path(__file__).resolve().parent / ".url_health_cache.sqlite3"))
+DEFAULT_TTL_SECONDS = int(os.getenv("URL_HEALTH_TTL_SECONDS", str(24 * 3600)))
+DEFAULT_CONCURRENCY = 200
+DEFAULT_PER_HOST = 16
+DEFAULT_TIMEOUT = 10
+
+# HEAD answers that don't mean "broken", just "ask with GET instead"
+HEAD_FALLBACK_STATUS = {403, 405, 501}
+
+
+@dataclass
+class CheckResult:
+    url: str
+    ok: bool
+    status: int
+    reason: str
+    content_type: str = ""
+    etag: Optional[str] = None
+    checked_at: float = 0.0
+    last_modified: Optional[str] = None
+    cached: bool = False
+
+
+def check_target(url: str) -> str:
+    """URL actually requested: expired S3 pre-signed params are stripped"""
+    return url.split("?")[0] if "X-Amz-" in url else url
+
+
+def is_image_type(content_type: str) -> bool:
+    return "image" in content_type or "octet" in content_type
+
+
+class UrlHealthCache:
+    """URL -> last result (status, ETag/Last-Modified, checked_at) in a local SQLite file"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS url_health (
+                url          TEXT PRIMARY KEY,
+                ok           INTEGER NOT NULL,
+                status       INTEGER NOT NULL,
+                reason       TEXT NOT NULL,
+                content_type TEXT NOT NULL DEFAULT '',
+                etag         TEXT,
+                checked_at   REAL NOT NULL
+            )
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(url_health)")}
+        if "last_modified" not in columns:  # caches written before Last-Modified was stored
+            self.conn.execute("ALTER TABLE url_health ADD COLUMN last_modified TEXT")
+        self.conn.commit()
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, CheckResult]:
+        urls = list(urls)
+        found: Dict[str, CheckResult] = {}
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            rows = self.conn.execute(
+                "SELECT url, ok, status, reason, content_type, etag, checked_at, last_modified "
+                f"FROM url_health WHERE url IN ({','.join('?' * len(chunk))})", chunk)
+            for url, ok, status, reason, content_type, etag, checked_at, last_modified in rows:
+                found[url] = CheckResult(url, bool(ok), status, reason, content_type, etag,
+                                         checked_at, last_modified, cached=True)
+        return found
+
+    def put_many(self, results: Iterable[CheckResult]):
+        self.conn.executemany("""
+            INSERT INTO url_health (url, ok, status, reason, content_type, etag, checked_at, last_modified)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET
+                ok = excluded.ok, status = excluded.status, reason = excluded.reason,
+                content_type = excluded.content_type, etag = excluded.etag,
+                checked_at = excluded.checked_at, last_modified = excluded.last_modified
+        """, [(r.url, int(r.ok), r.status, r.reason, r.content_type, r.etag, r.checked_at, r.last_modified)
+              for r in results])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class UrlHealthChecker:
+    """Concurrent HEAD/ranged-GET checks over one pooled keep-alive session"""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, per_host: int = DEFAULT_PER_HOST,
+                 timeout: float = DEFAULT_TIMEOUT, require_image: bool = False):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.require_image = require_image
+
+    async def check_many(self, urls: Iterable[str], previous: Optional[Dict[str, CheckResult]] = None,
+                         progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, CheckResult]:
+        """Check every URL; OK `previous` results with a validator are revalidated conditionally"""
+        urls = list(dict.fromkeys(urls))
+        previous = previous or {}
+        results: Dict[str, CheckResult] = {}
+        if not urls:
+            return results
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+            async def run(url: str):
+                results[url] = await self._check(session, url, previous.get(url))
+                if progress:
+                    progress(len(results), len(urls))
+
+            await asyncio.gather(*(run(url) for url in urls))
+        return results
+
+    async def _check(self, session: aiohttp.ClientSession, url: str,
+                     previous: Optional[CheckResult]) -> CheckResult:
+        if not url or url.startswith(("blob:", "data:")):
+            return CheckResult(url, False, 0, "not-http", checked_at=time.time())
+
+        target = check_target(url)
+        headers = {}
+        if previous is not None and previous.ok:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+
+        try:
+            async with session.head(target, headers=headers, allow_redirects=True) as r:
+                if r.status == 304 and previous is not None:
+                    return CheckResult(url, True, previous.status, "HEAD 304 (unchanged)",
+                                       previous.content_type, previous.etag, time.time(),
+                                       previous.last_modified)
+                if r.status < 400:
+                    return self._result(url, r, "HEAD")
+                if r.status not in HEAD_FALLBACK_STATUS:
+                    return CheckResult(url, False, r.status, f"HTTP {r.status}", checked_at=time.time())
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass  # some origins drop HEAD; the GET below decides
+
+        try:
+            async with session.get(target, headers={"Range": "bytes=0-1023"}, allow_redirects=True) as r:
+                if r.status < 400:
+                    return self._result(url, r, "GET-range")
+                return CheckResult(url, False, r.status, f"GET {r.status}", checked_at=time.time())
+        except asyncio.TimeoutError:
+            return CheckResult(url, False, 0, "timeout", checked_at=time.time())
+        except aiohttp.ClientError as e:
+            return CheckResult(url, False, 0, str(e)[:80] or type(e).__name__, checked_at=time.time())
+
+    def _result(self, url: str, r: aiohttp.ClientResponse, method: str) -> CheckResult:
+        content_type = r.headers.get("Content-Type", "")
+        ok = not self.require_image or is_image_type(content_type)
+        reason = f"{method} {r.status}" if ok else f"{method} {r.status} not an image ({content_type})"
+        return CheckResult(url, ok, r.status, reason, content_type, r.headers.get("ETag"), time.time(),
+                           r.headers.get("Last-Modified"))
+
+
+def check_urls(urls: Iterable[str], *, incremental: bool = False, use_cache: bool = True,
+               ttl_seconds: int = DEFAULT_TTL_SECONDS, cache_path: Path = DEFAULT_CACHE_PATH,
+               concurrency: int = DEFAULT_CONCURRENCY, per_host: int = DEFAULT_PER_HOST,
+               timeout: float = DEFAULT_TIMEOUT, require_image: bool = False,
+               progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, CheckResult]:
+    """
+    Check URLs (sync entry point for the scripts). OK results younger than
+    `ttl_seconds` are reused in both modes. Past the TTL a full run checks the
+    URL again from scratch; with `incremental`, a URL that was OK is revalidated
+    with a conditional request (ETag / Last-Modified) so unchanged images cost a
+    304, while one that has since broken still comes back as broken.
+    """
+    urls = list(dict.fromkeys(urls))
+    cache = UrlHealthCache(cache_path) if use_cache else None
+    try:
+        cached = cache.get_many(urls) if cache else {}
+        now = time.time()
+        results: Dict[str, CheckResult] = {}
+        pending = []
+        for url in urls:
+            hit = cached.get(url)
+            reusable = hit is not None and hit.ok and now - hit.checked_at < ttl_seconds
+            if reusable and require_image and not is_image_type(hit.content_type):
+                reusable = False
+            if reusable:
+                results[url] = hit
+            else:
+                pending.append(url)
+
+        checker = UrlHealthChecker(concurrency, per_host, timeout, require_image)
+        previous = cached if incremental else None
+        fresh = asyncio.run(checker.check_many(pending, previous=previous, progress=progress))
+        results.update(fresh)
+        if cache:
+            cache.put_many(fresh.values())
+        return results
+    finally:
+        if cache:
+            cache.close()
+
+
+def print_progress(done: int, total: int):
+    """Default progress printer: every 500 URLs and at the end"""
+    if done % 500 == 0 or done == total:
+        print(f"  Checked {done}/{total} URLs...", flush=True)
+
+
+if __name__ == "__main__":
+    # python scripts/url_health.py URL [URL ...]   (or URLs on stdin)
+    targets = sys.argv[1:] or [line.strip() for line in sys.stdin if line.strip()]
+    started = time.perf_counter()
+    checked = check_urls(targets, progress=print_progress)
+    for u, res in checked.items():
+        print(f"{'✅' if res.ok else '❌'} {res.reason:24s} {u[:100]}{' (cached)' if res.cached else ''}")
+    print(f"{len(checked)} URLs in {time.perf_counter() - started:.1f}s")